@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# bench_fetch.py - concurrent property fetch check
+# Copyright (C) 2019  Ivan Fonseca
+#
+# This file is part of xinput-gui.
+#
+# xinput-gui is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the # License,
+# or (at your option) any later version.
+#
+# xinput-gui is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with xinput-gui.  If not, see <https://www.gnu.org/licenses/>.
+
+'''Check that Xinput.fetch_all_props() fetches devices concurrently.
+
+Puts a fake xinput on PATH that answers from a synthetic trace (see
+synthetic.py) after a delay, then times fetching the properties of every
+device with and without the command worker. Exits with status 1 if either
+takes as long as fetching the devices one after another would.
+
+Usage: bench_fetch.py [--devices N] [--delay MS]
+'''
+
+from pathlib import Path
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from xinput_gui.xinput.trace import write_trace
+from xinput_gui.xinput.xinput import FETCH_WORKERS, Xinput
+
+from synthetic import synthetic_trace
+
+
+# Fake xinput, answering from the trace in $XINPUT_GUI_TRACE after sleeping
+# for $XINPUT_GUI_DELAY seconds
+FAKE_XINPUT = '''#!{python}
+import json, os, sys, time
+argv = ['xinput'] + sys.argv[1:]
+with open(os.environ['XINPUT_GUI_TRACE'], encoding='utf-8') as trace:
+    for line in trace:
+        entry = json.loads(line)
+        if entry['argv'] == argv:
+            break
+    else:
+        sys.exit(1)
+if argv[1] == 'list-props':
+    time.sleep(float(os.environ['XINPUT_GUI_DELAY']))
+sys.stdout.write(entry['stdout'])
+sys.exit(entry['returncode'])
+'''
+
+
+def time_fetch(use_worker: bool) -> float:
+    '''Time listing devices and fetching all their properties.
+
+    Returns:
+        Time to fetch the properties, in seconds.
+    '''
+
+    xinput = Xinput(use_worker=use_worker)
+    try:
+        xinput.get_devices()
+
+        start = time.perf_counter()
+        fetched = xinput.fetch_all_props()
+        elapsed = time.perf_counter() - start
+
+        failed = [device.id for device, error in fetched if error is not None]
+        if failed:
+            raise RuntimeError('Unable to fetch properties of devices {}'.format(failed))
+    finally:
+        xinput.close()
+
+    return elapsed
+
+
+def main() -> None:
+    '''Run the check.'''
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--devices', type=int, default=FETCH_WORKERS - 2,
+                        help='devices besides the core devices (default: {})'.format(
+                            FETCH_WORKERS - 2))
+    parser.add_argument('--delay', type=float, default=200, metavar='MS',
+                        help='time each list-props takes (default: 200)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fake = Path(tmp_dir, 'xinput')
+        fake.write_text(FAKE_XINPUT.format(python=sys.executable))
+        fake.chmod(0o755)
+
+        trace = Path(tmp_dir, 'trace.jsonl')
+        write_trace(synthetic_trace(args.devices), trace)
+
+        os.environ['PATH'] = tmp_dir + os.pathsep + os.environ.get('PATH', '')
+        os.environ['XINPUT_GUI_TRACE'] = str(trace)
+        os.environ['XINPUT_GUI_DELAY'] = str(args.delay / 1000)
+
+        # Core devices are fetched too
+        num_devices = args.devices + 2
+        serial = num_devices * args.delay / 1000
+
+        failed = False
+        for use_worker in (True, False):
+            elapsed = time_fetch(use_worker)
+            # Concurrent fetches take about as long as the slowest batch
+            too_slow = elapsed > serial / 2
+            failed = failed or too_slow
+
+            print('{:<16} {:>8.3f} s  (one after another: {:.3f} s){}'.format(
+                'with worker' if use_worker else 'without worker',
+                elapsed, serial, '  NOT CONCURRENT' if too_slow else ''))
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# bench_parser.py - xinput output parser micro-benchmark
+# Copyright (C) 2019  Ivan Fonseca
+#
+# This file is part of xinput-gui.
+#
+# xinput-gui is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the # License,
+# or (at your option) any later version.
+#
+# xinput-gui is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with xinput-gui.  If not, see <https://www.gnu.org/licenses/>.
+
+'''Time parsing `xinput list-props` and `xinput list` output.
+
+Parses the output of a synthetic device with thousands of properties (see
+synthetic.py), and a device list with as many devices, and prints the time
+per line.
+
+Usage: bench_parser.py [-n RUNS] [SIZE...]
+'''
+
+from pathlib import Path
+import argparse
+import statistics
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from xinput_gui.xinput.parser import parse_device_list, parse_props
+
+from synthetic import device_lines, props_output
+
+
+def bench(name: str, func, text: str, runs: int) -> None:
+    '''Time parsing some text and print the result.
+
+    Args:
+        name: benchmark name.
+        func: parser.
+        text: text to parse.
+        runs: number of times to parse it, the median is shown.
+    '''
+
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(text)
+        times.append(time.perf_counter() - start)
+
+    median = statistics.median(times)
+    lines = text.count('\n')
+    print('{:<24} {:>8} {:>12.3f} {:>12.3f}'.format(
+        name, lines, median * 1000, median / lines * 1000000))
+
+
+def main() -> None:
+    '''Run the benchmark.'''
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--runs', type=int, default=20,
+                        help='times each text is parsed (default: 20)')
+    parser.add_argument('sizes', type=int, nargs='*', default=[100, 1000, 10000],
+                        help='properties and devices to parse (default: 100 1000 10000)')
+    args = parser.parse_args()
+
+    print('{:<24} {:>8} {:>12} {:>12}'.format('parser', 'lines', 'total ms', 'us/line'))
+
+    for size in args.sizes:
+        bench('parse_props {}'.format(size), parse_props,
+              props_output(4, 'Synthetic Mouse', size), args.runs)
+    for size in args.sizes:
+        bench('parse_device_list {}'.format(size), parse_device_list,
+              '\n'.join(line for _, line in device_lines(size, size // 10)) + '\n', args.runs)
+
+
+if __name__ == '__main__':
+    main()
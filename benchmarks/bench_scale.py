@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# bench_scale.py - device count scaling benchmark
+# Copyright (C) 2019  Ivan Fonseca
+#
+# This file is part of xinput-gui.
+#
+# xinput-gui is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the # License,
+# or (at your option) any later version.
+#
+# xinput-gui is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with xinput-gui.  If not, see <https://www.gnu.org/licenses/>.
+
+'''Measure how refreshing devices scales with the number of devices.
+
+Replays synthetic hierarchies (see synthetic.py), so it runs anywhere,
+without xinput or an X server. For each size it reports the time to list
+devices and to load every device's properties, the number of xinput
+commands that took, and the memory the loaded devices use. Use --latency to
+add the cost of running xinput to each command.
+
+Usage: bench_scale.py [-n RUNS] [--props N] [--latency MS] [--trace FILE] [DEVICES...]
+'''
+
+from pathlib import Path
+from typing import List
+import argparse
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from xinput_gui.xinput.trace import ReplayWorker, read_trace
+from xinput_gui.xinput.xinput import Xinput
+
+from synthetic import synthetic_trace
+
+
+def refresh(xinput: Xinput) -> None:
+    '''Refresh devices the way the GUI does, and load all properties.'''
+
+    xinput.get_devices()
+    xinput.fetch_all_props()
+
+
+def bench(name: str, entries: List[dict], runs: int, latency: float) -> None:
+    '''Benchmark refreshing one hierarchy and print the result.
+
+    Args:
+        name: hierarchy name.
+        entries: trace entries to replay.
+        runs: number of refreshes to time.
+        latency: time each command takes, in seconds.
+    '''
+
+    list_times = []
+    props_times = []
+    for _ in range(runs):
+        worker = ReplayWorker(entries, latency)
+        xinput = Xinput(command_worker=worker)
+
+        start = time.perf_counter()
+        xinput.get_devices()
+        list_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        xinput.fetch_all_props()
+        props_times.append(time.perf_counter() - start)
+
+        xinput.close()
+
+    # Memory is measured on a separate refresh, tracing slows everything down
+    worker = ReplayWorker(entries, latency)
+    xinput = Xinput(command_worker=worker)
+    tracemalloc.start()
+    refresh(xinput)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    xinput.close()
+
+    print('{:<10} {:>8} {:>12.2f} {:>12.2f} {:>10} {:>12.1f} {:>10.1f}'.format(
+        name,
+        len(xinput.devices),
+        statistics.median(list_times) * 1000,
+        statistics.median(props_times) * 1000,
+        worker.count,
+        retained / 1024,
+        peak / 1024))
+
+
+def main() -> None:
+    '''Run the benchmark.'''
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--runs', type=int, default=5,
+                        help='refreshes timed per size, the median is shown (default: 5)')
+    parser.add_argument('--props', type=int, default=20,
+                        help='properties per synthetic device (default: 20)')
+    parser.add_argument('--latency', type=float, default=0, metavar='MS',
+                        help='time each replayed command takes (default: 0)')
+    parser.add_argument('--trace', type=Path, action='append', default=[],
+                        help='also replay a recorded trace, see --record-trace (repeatable)')
+    parser.add_argument('devices', type=int, nargs='*', default=[10, 100, 1000],
+                        help='synthetic device counts (default: 10 100 1000)')
+    args = parser.parse_args()
+
+    print('{:<10} {:>8} {:>12} {:>12} {:>10} {:>12} {:>10}'.format(
+        'hierarchy', 'devices', 'list ms', 'props ms', 'commands', 'retained KiB', 'peak KiB'))
+
+    for num_devices in args.devices:
+        bench(str(num_devices), synthetic_trace(num_devices, args.props),
+              args.runs, args.latency / 1000)
+    for path in args.trace:
+        bench(path.name, read_trace(path), args.runs, args.latency / 1000)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# bench_startup.py - startup time benchmark
+# Copyright (C) 2019  Ivan Fonseca
+#
+# This file is part of xinput-gui.
+#
+# xinput-gui is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the # License,
+# or (at your option) any later version.
+#
+# xinput-gui is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with xinput-gui.  If not, see <https://www.gnu.org/licenses/>.
+
+'''Measure xinput-gui startup time in fresh processes.
+
+Each run starts a new interpreter and reports, from the moment it was
+spawned:
+
+- import: the GUI modules (GTK included) are imported.
+- paint: the main window is first drawn.
+- devices: the first device list is shown.
+- cli: `xinput-gui --list` has finished.
+
+The median of each is compared against a budget, and the exit status is 1
+if any is over, so this can be used to catch regressions. The GUI stages
+need a display; use Xvfb where there isn't one.
+
+Usage: bench_startup.py [-n RUNS] [--budget STAGE=MS ...]
+'''
+
+from pathlib import Path
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Default budgets, in milliseconds
+BUDGETS = {
+    'import': 400,
+    'paint': 800,
+    'devices': 1000,
+    'cli': 100,
+}
+
+# Run in the child to time the GUI. Prints a JSON object of stage -> wall
+# clock time.
+GUI_SCRIPT = '''
+import json, sys, time
+sys.path.insert(0, {root!r})
+
+times = {{}}
+from xinput_gui.view_controller import ViewController
+times['import'] = time.time()
+
+from gi.repository import GLib, Gtk
+
+controller = ViewController()
+
+def on_draw(*args):
+    times.setdefault('paint', time.time())
+
+controller.main_window.win_main.connect('draw', on_draw)
+
+show_devices = controller.show_devices
+
+def on_devices(devices):
+    show_devices(devices)
+    times.setdefault('devices', time.time())
+    GLib.idle_add(Gtk.main_quit)
+
+controller.show_devices = on_devices
+controller.start()
+
+print(json.dumps(times))
+'''
+
+CLI_SCRIPT = '''
+import sys
+sys.path.insert(0, {root!r})
+sys.argv = ['xinput-gui', '--list']
+from xinput_gui.__main__ import main
+main()
+'''
+
+
+def run_gui() -> dict:
+    '''Start the GUI once.
+
+    Returns:
+        Stage -> milliseconds since spawn dict.
+    '''
+
+    start = time.time()
+    proc = subprocess.run([sys.executable, '-c', GUI_SCRIPT.format(root=str(ROOT))],
+                          stdout=subprocess.PIPE, check=True, timeout=60)
+    times = json.loads(proc.stdout.decode('utf-8').splitlines()[-1])
+
+    return {stage: (stamp - start) * 1000 for stage, stamp in times.items()}
+
+
+def run_cli() -> float:
+    '''Run `xinput-gui --list` once.
+
+    Returns:
+        Milliseconds from spawn to exit.
+    '''
+
+    start = time.time()
+    subprocess.run([sys.executable, '-c', CLI_SCRIPT.format(root=str(ROOT))],
+                   stdout=subprocess.DEVNULL, check=True, timeout=60)
+
+    return (time.time() - start) * 1000
+
+
+def parse_budget(text: str):
+    '''Parse a STAGE=MS budget argument.'''
+
+    stage, _, budget = text.partition('=')
+    if stage not in BUDGETS:
+        raise argparse.ArgumentTypeError('unknown stage "{}"'.format(stage))
+
+    return stage, float(budget)
+
+
+def main() -> None:
+    '''Run the benchmark.'''
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--runs', type=int, default=5,
+                        help='times to start each mode (default: 5)')
+    parser.add_argument('--budget', type=parse_budget, action='append', default=[],
+                        metavar='STAGE=MS',
+                        help='override a stage budget, e.g. paint=500')
+    parser.add_argument('--no-gui', action='store_true',
+                        help='only time the command line mode')
+    args = parser.parse_args()
+
+    budgets = dict(BUDGETS)
+    budgets.update(args.budget)
+
+    samples = {stage: [] for stage in BUDGETS}
+
+    for _ in range(args.runs):
+        if not args.no_gui:
+            for stage, elapsed in run_gui().items():
+                samples[stage].append(elapsed)
+        samples['cli'].append(run_cli())
+
+    over = False
+    print('{:<10} {:>10} {:>10} {:>10}'.format('stage', 'median ms', 'min ms', 'budget'))
+    for stage, times in samples.items():
+        if not times:
+            continue
+
+        median = statistics.median(times)
+        status = ''
+        if median > budgets[stage]:
+            status = '  OVER'
+            over = True
+
+        print('{:<10} {:>10.1f} {:>10.1f} {:>10.0f}{}'.format(
+            stage, median, min(times), budgets[stage], status))
+
+    sys.exit(1 if over else 0)
+
+
+if __name__ == '__main__':
+    main()
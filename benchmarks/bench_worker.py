@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# bench_worker.py - command worker micro-benchmark
+# Copyright (C) 2019  Ivan Fonseca
+#
+# This file is part of xinput-gui.
+#
+# xinput-gui is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the # License,
+# or (at your option) any later version.
+#
+# xinput-gui is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with xinput-gui.  If not, see <https://www.gnu.org/licenses/>.
+
+'''Compare running commands through the command worker against
+subprocess.run.
+
+The app has GTK loaded when it runs commands, which makes forking it more
+expensive. Use --ballast to allocate memory first and get closer to that.
+
+Usage: bench_worker.py [-n RUNS] [--ballast MB] [COMMAND...]
+'''
+
+from pathlib import Path
+from subprocess import PIPE
+import argparse
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from xinput_gui.xinput.worker import CommandWorker
+
+
+def bench(name: str, func, runs: int, per_run: int = 1) -> float:
+    '''Time func over a number of runs and print the result.
+
+    Args:
+        name: benchmark name.
+        func: function to time.
+        runs: number of times to call func.
+        per_run: number of commands func runs each time.
+
+    Returns:
+        Mean time per command, in seconds.
+    '''
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        func()
+    mean = (time.perf_counter() - start) / (runs * per_run)
+
+    print('{:<24} {:>10.3f} ms/command'.format(name, mean * 1000))
+    return mean
+
+
+def main() -> None:
+    '''Run the benchmark.'''
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--runs', type=int, default=200,
+                        help='commands to run per method (default: 200)')
+    parser.add_argument('--ballast', type=int, default=0, metavar='MB',
+                        help='memory to allocate before forking (default: 0)')
+    parser.add_argument('command', nargs='*', default=['true'],
+                        help='command to run (default: true)')
+    args = parser.parse_args()
+
+    # Touch every page so it has to be mapped into forked children
+    ballast = bytearray(args.ballast * 1024 * 1024)
+    for i in range(0, len(ballast), 4096):
+        ballast[i] = 1
+
+    worker = CommandWorker(enabled=True)
+    # Don't count helper startup
+    worker.run(args.command)
+
+    print('{} x {}, {} MB ballast'.format(args.runs, ' '.join(args.command), args.ballast))
+
+    direct = bench('subprocess.run',
+                   lambda: subprocess.run(args.command, stdout=PIPE, stderr=PIPE),
+                   args.runs)
+    single = bench('CommandWorker.run',
+                   lambda: worker.run(args.command),
+                   args.runs)
+    batch = bench('CommandWorker.run_many',
+                  lambda: worker.run_many([args.command] * 10),
+                  max(args.runs // 10, 1), 10)
+
+    print('speedup: {:.2f}x single, {:.2f}x batched'.format(direct / single, direct / batch))
+
+    worker.close()
+
+
+if __name__ == '__main__':
+    main()
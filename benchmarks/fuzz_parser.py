@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# fuzz_parser.py - xinput output parser fuzzing
+# Copyright (C) 2019  Ivan Fonseca
+#
+# This file is part of xinput-gui.
+#
+# xinput-gui is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the # License,
+# or (at your option) any later version.
+#
+# xinput-gui is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with xinput-gui.  If not, see <https://www.gnu.org/licenses/>.
+
+'''Fuzz the xinput output parsers.
+
+Feeds the parsers randomly mutated `xinput list-props` and `xinput list`
+output and checks they never raise, then times them on inputs built to
+make regular expressions backtrack and checks the time grows linearly with
+the input size. Exits with status 1 if either check fails.
+
+Usage: fuzz_parser.py [-n ITERATIONS] [--seed SEED] [--size CHARS]
+'''
+
+from pathlib import Path
+import argparse
+import random
+import sys
+import time
+import traceback
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from xinput_gui.xinput.parser import (
+    format_values, parse_device_list, parse_props, parse_value, split_values)
+
+from synthetic import device_lines, props_output
+
+
+# Real list-props output, with every kind of value
+PROPS_SAMPLE = '''Device 'Logitech USB Optical Mouse':
+\tDevice Enabled (142):\t1
+\tCoordinate Transformation Matrix (144):\t1.000000, 0.000000, 0.000000, 0.000000, 1.000000, 0.000000, 0.000000, 0.000000, 1.000000
+\tlibinput Accel Profile Enabled (283):\t1, 0
+\tlibinput Scroll Methods Available (286):\t0, 0, 1
+\tDevice Node (263):\t"/dev/input/event5"
+\tEvdev Axis Labels (265):\t"Rel X" (156), "Rel Y" (157), "Rel Vert Wheel" (291)
+\tlibinput Drag Lock Buttons (297):\t<no items>
+\tEvdev Middle Button Emulation (299):\tNone (0)
+'''
+# Fragments mutations insert, picked to confuse the parsers
+FRAGMENTS = [
+    '(', ')', '):', ' (', ' (12):', '"', ',', ', ', '\t', '\n', '\r', ' ', '  ',
+    'id=', '\tid=7\t', '[', ']', '[slave  pointer  (2)]', '[floating slave]',
+    '⎜', '↳', '∼', '~', '0', '42', '1.5', '-3e40', 'nan', '²', '٣',
+    "Device '", '<no items>', '\x00', '\x0b', ' ',
+]
+# Inputs built to make regular expressions backtrack, by size
+PATHOLOGICAL = {
+    'spaces': lambda n: ' ' * n,
+    'tabs and spaces': lambda n: '\t ' * (n // 2),
+    'open parens': lambda n: ' (' * (n // 2),
+    'paren digits': lambda n: ' (' + '1' * n,
+    'unclosed ids': lambda n: ' (1):' * (n // 5),
+    'quotes': lambda n: '"' * n,
+    'unclosed quote': lambda n: '\tA (1):\t"' + 'a ' * (n // 2),
+    'commas': lambda n: ',' * n,
+    'id markers': lambda n: ' id=' * (n // 4),
+    'id then spaces': lambda n: ' id=1' + ' ' * n,
+    'brackets': lambda n: ' id=1 [slave pointer' + ' ' * n,
+    'many lines': lambda n: '\tP (1):\t1\n' * (n // 10),
+    'prefix': lambda n: '⎜ ' * (n // 2) + 'id=1',
+}
+
+
+def mutate(text: str, rand: random.Random) -> str:
+    '''Apply a few random mutations to some text.'''
+
+    for _ in range(rand.randint(1, 8)):
+        pos = rand.randint(0, len(text))
+        action = rand.randrange(4)
+
+        if action == 0:
+            text = text[:pos] + rand.choice(FRAGMENTS) * rand.randint(1, 4) + text[pos:]
+        elif action == 1:
+            text = text[:pos] + text[pos + rand.randint(1, 40):]
+        elif action == 2:
+            end = pos + rand.randint(1, 80)
+            text = text[:end] + text[pos:end] + text[end:]
+        else:
+            lines = text.split('\n')
+            rand.shuffle(lines)
+            text = '\n'.join(lines)
+
+    return text
+
+
+def check(text: str) -> None:
+    '''Run every parser on some text.
+
+    Raises:
+        Exception: whatever a parser raised.
+    '''
+
+    for prop in parse_props(text):
+        format_values(prop.type, prop.values)
+    parse_device_list(text)
+    parse_value(text)
+    split_values(text)
+
+
+def fuzz(iterations: int, seed: int) -> int:
+    '''Check the parsers don't raise on mutated output.
+
+    Returns:
+        Number of inputs that made a parser raise.
+    '''
+
+    rand = random.Random(seed)
+    corpus = [
+        PROPS_SAMPLE,
+        props_output(4, 'Synthetic Mouse', 30),
+        '\n'.join(line for _, line in device_lines(12, 3)) + '\n',
+    ]
+
+    failures = 0
+    for iteration in range(iterations):
+        text = mutate(rand.choice(corpus), rand)
+        try:
+            check(text)
+        except Exception:
+            failures += 1
+            if failures <= 5:
+                print('Iteration {} raised on {!r}:'.format(iteration, text))
+                traceback.print_exc()
+
+    print('{} inputs, {} raised'.format(iterations, failures))
+    return failures
+
+
+def time_check(text: str) -> float:
+    '''Get the best of a few times to run every parser on some text.'''
+
+    times = []
+    for _ in range(3):
+        start = time.perf_counter()
+        check(text)
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def linearity(size: int, growth: int, tolerance: float) -> int:
+    '''Check parsing time grows linearly with input size.
+
+    Args:
+        size: size of the smaller inputs, in characters.
+        growth: how many times larger the larger inputs are.
+        tolerance: how much faster than the input the time may grow.
+
+    Returns:
+        Number of inputs whose parsing time grew too fast.
+    '''
+
+    failures = 0
+
+    print('{:<18} {:>12} {:>12} {:>8}'.format('input', 'small ms', 'large ms', 'ratio'))
+    for name, build in PATHOLOGICAL.items():
+        small = time_check(build(size))
+        large = time_check(build(size * growth))
+        # Tiny times are mostly noise
+        ratio = large / max(small, 1e-4)
+
+        slow = ratio > growth * tolerance
+        failures += slow
+        print('{:<18} {:>12.3f} {:>12.3f} {:>8.1f}{}'.format(
+            name, small * 1000, large * 1000, ratio, '  TOO SLOW' if slow else ''))
+
+    return failures
+
+
+def main() -> None:
+    '''Run the fuzzer.'''
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--iterations', type=int, default=20000,
+                        help='mutated inputs to parse (default: 20000)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='random seed, to reproduce a run (default: 0)')
+    parser.add_argument('--size', type=int, default=20000, metavar='CHARS',
+                        help='size of the smaller linearity inputs (default: 20000)')
+    parser.add_argument('--growth', type=int, default=8,
+                        help='how many times larger the larger inputs are (default: 8)')
+    parser.add_argument('--tolerance', type=float, default=3,
+                        help='how much faster than the input the time may grow '
+                             '(default: 3)')
+    args = parser.parse_args()
+
+    failures = fuzz(args.iterations, args.seed)
+    failures += linearity(args.size, args.growth, args.tolerance)
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
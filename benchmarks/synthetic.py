@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# synthetic.py - synthetic device hierarchy traces
+# Copyright (C) 2019  Ivan Fonseca
+#
+# This file is part of xinput-gui.
+#
+# xinput-gui is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the # License,
+# or (at your option) any later version.
+#
+# xinput-gui is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with xinput-gui.  If not, see <https://www.gnu.org/licenses/>.
+
+'''Generate a trace of a synthetic device hierarchy, of any size.
+
+The trace answers `xinput list --short`, `xinput list --short ID` and
+`xinput list-props ID` for every device, formatted the way xinput prints
+them. Replay it with `xinput-gui --replay-trace` or ReplayWorker.
+
+Usage: synthetic.py [--props N] [--floating N] DEVICES OUTPUT
+'''
+
+from pathlib import Path
+from typing import List
+import argparse
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from xinput_gui.xinput.trace import trace_entry, write_trace
+
+
+# First ID xinput gives to devices that aren't the core devices
+FIRST_ID = 4
+# Properties every device has, before the generated ones.
+#   (name, value) tuples, value as printed by list-props.
+BASE_PROPS = [
+    ('Device Enabled', '1'),
+    ('Coordinate Transformation Matrix',
+     '1.000000, 0.000000, 0.000000, 0.000000, 1.000000, 0.000000, '
+     '0.000000, 0.000000, 1.000000'),
+    ('libinput Accel Speed', '0.000000'),
+    ('libinput Accel Profiles Available', '1, 1'),
+    ('libinput Send Events Mode Enabled', '0, 0'),
+    ('Device Node', '"/dev/input/event{id}"'),
+    ('Device Product ID', '1133, {id}'),
+    ('libinput Scroll Method Enabled', '0, 0, 1'),
+    ('libinput Click Method Enabled', '1, 0'),
+]
+# Generated property values, cycled through
+EXTRA_VALUES = ['0', '1, 0', '0.500000', '"text {id}"', '<no items>', 'None (0)']
+
+
+def device_lines(num_devices: int, num_floating: int) -> List[str]:
+    '''Get the `xinput list --short` line of every device.
+
+    Devices are split between the core pointer and core keyboard, and the
+    last ones are floating.
+
+    Args:
+        num_devices: number of slave devices.
+        num_floating: how many of them are floating.
+
+    Returns:
+        List of (id, line) tuples, in list order.
+    '''
+
+    attached = num_devices - num_floating
+    pointers = [('Synthetic Mouse {}'.format(i), FIRST_ID + i)
+                for i in range(0, attached, 2)]
+    keyboards = [('Synthetic Keyboard {}'.format(i), FIRST_ID + i)
+                 for i in range(1, attached, 2)]
+    floating = [('Synthetic Floating {}'.format(i), FIRST_ID + i)
+                for i in range(attached, num_devices)]
+
+    lines = [(2, '⎡ Virtual core pointer                    \tid=2\t[master pointer  (3)]')]
+    for name, id_ in pointers:
+        lines.append((id_, '⎜   ↳ {:<38}\tid={}\t[slave  pointer  (2)]'.format(name, id_)))
+    lines.append((3, '⎣ Virtual core keyboard                   \tid=3\t[master keyboard (2)]'))
+    for name, id_ in keyboards:
+        lines.append((id_, '    ↳ {:<38}\tid={}\t[slave  keyboard (3)]'.format(name, id_)))
+    for name, id_ in floating:
+        lines.append((id_, '∼ {:<42}\tid={}\t[floating slave]'.format(name, id_)))
+
+    return lines
+
+
+def props_output(device_id: int, name: str, num_props: int) -> str:
+    '''Get the `xinput list-props` output of a device.
+
+    Args:
+        device_id: xinput device ID.
+        name: device name.
+        num_props: number of properties, at least the base ones.
+    '''
+
+    lines = ["Device '{}':".format(name)]
+    for index in range(max(num_props, len(BASE_PROPS))):
+        if index < len(BASE_PROPS):
+            prop_name, value = BASE_PROPS[index]
+        else:
+            prop_name = 'Synthetic Property {}'.format(index)
+            value = EXTRA_VALUES[index % len(EXTRA_VALUES)]
+
+        lines.append('\t{} ({}):\t{}'.format(prop_name, 300 + index,
+                                             value.format(id=device_id)))
+
+    return '\n'.join(lines) + '\n'
+
+
+def synthetic_trace(num_devices: int, num_props: int = 20, num_floating: int = 0) -> List[dict]:
+    '''Generate the trace of a device hierarchy.
+
+    Args:
+        num_devices: number of slave devices, besides the core devices.
+        num_props: properties of each device.
+        num_floating: how many of the devices are floating.
+
+    Returns:
+        List of trace entries.
+    '''
+
+    lines = device_lines(num_devices, min(num_floating, num_devices))
+
+    entries = [trace_entry(['xinput', 'list', '--short'], 0,
+                           '\n'.join(line for _, line in lines) + '\n', '')]
+    for device_id, line in lines:
+        name = line.split('\t')[0].lstrip('⎡⎜⎣↳∼ ').rstrip()
+        entries.append(trace_entry(['xinput', 'list', '--short', str(device_id)], 0,
+                                   line + '\n', ''))
+        entries.append(trace_entry(['xinput', 'list-props', str(device_id)], 0,
+                                   props_output(device_id, name, num_props), ''))
+
+    return entries
+
+
+def main() -> None:
+    '''Write a synthetic trace.'''
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--props', type=int, default=20,
+                        help='properties per device (default: 20)')
+    parser.add_argument('--floating', type=int, default=0,
+                        help='number of floating devices (default: 0)')
+    parser.add_argument('devices', type=int,
+                        help='number of devices, besides the core devices')
+    parser.add_argument('output', type=Path,
+                        help='trace file to write')
+    args = parser.parse_args()
+
+    write_trace(synthetic_trace(args.devices, args.props, args.floating), args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -18,11 +18,25 @@
 
 '''App entry point.'''
 
-from .view_controller import ViewController
+import sys
 
 
 def main():
-    '''Start xinput-gui.'''
+    '''Start xinput-gui.
+
+    With arguments, runs a command line command instead of the GUI.
+    '''
+
+    if len(sys.argv) > 1:
+        from .cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
+
+    # Must come before GTK opens its display
+    from .xinput.xi2 import init_threads
+    init_threads()
+
+    # GTK is only loaded for the GUI
+    from .view_controller import ViewController
 
     view_controller = ViewController()
     view_controller.start()
@@ -0,0 +1,235 @@
+# cli.py - command line interface
+# Copyright (C) 2019  Ivan Fonseca
+#
+# This file is part of xinput-gui.
+#
+# xinput-gui is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the # License,
+# or (at your option) any later version.
+#
+# xinput-gui is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with xinput-gui.  If not, see <https://www.gnu.org/licenses/>.
+
+'''Command line interface.
+
+Meant for login scripts, so it must start quickly: only the xinput package
+is used, and GTK is never imported.
+'''
+
+from pathlib import Path
+from typing import List
+import argparse
+import sys
+
+from .settings import Settings
+from .xinput.backend import XinputError
+from .xinput.devices import Device, DeviceType, Prop
+from .xinput.profiles import ProfileError, apply_profile, format_report, load_profiles
+from .xinput.trace import ReplayWorker, TraceRecorder, read_trace
+from .xinput.xinput import Xinput
+
+
+def get_parser() -> argparse.ArgumentParser:
+    '''Get the command line argument parser.'''
+
+    parser = argparse.ArgumentParser(
+        prog='xinput-gui',
+        description='Edit xinput device properties. Starts the GUI when no '
+                    'command is given.')
+
+    commands = parser.add_mutually_exclusive_group(required=True)
+    commands.add_argument('--list', action='store_true',
+                          help='list devices')
+    commands.add_argument('--get', nargs='+', metavar=('DEVICE', 'PROP'),
+                          help='show all properties of a device, or the value of one')
+    commands.add_argument('--set', nargs='+', metavar=('DEVICE PROP', 'VALUE'),
+                          help='set a device property')
+    commands.add_argument('--apply-profile', metavar='NAME',
+                          help='apply a profile')
+
+    parser.add_argument('--backend', choices=['subprocess', 'native'],
+                        help='backend to use (default: from the config file)')
+    parser.add_argument('--log-file', metavar='PATH', type=Path,
+                        help='write every xinput command run, with its timing and exit '
+                             'status, to PATH as JSON Lines')
+    parser.add_argument('--record-trace', metavar='PATH', type=Path,
+                        help='record every xinput command run, with its output, to a '
+                             'trace file that --replay-trace can use')
+    parser.add_argument('--replay-trace', metavar='PATH', type=Path,
+                        help="answer xinput commands from a trace file instead of "
+                             "running them, e.g. to reproduce another machine's devices")
+
+    return parser
+
+
+def find_device(xinput: Xinput, device: str) -> Device:
+    '''Find a device by ID or name.
+
+    Raises:
+        XinputError: if there's no such device.
+    '''
+
+    if device.isdigit() and xinput.registry.get(int(device)) is not None:
+        return xinput.registry.get(int(device))
+
+    candidates = xinput.registry.get_by_name(device)
+    if candidates:
+        return candidates[0]
+
+    raise XinputError('No device "{}"'.format(device))
+
+
+def find_prop(device: Device, prop: str) -> Prop:
+    '''Find a device property by ID or name.
+
+    Raises:
+        XinputError: if the device has no such property.
+    '''
+
+    for candidate in device.props:
+        if str(candidate.id) == prop or candidate.name == prop:
+            return candidate
+
+    raise XinputError('Device "{}" has no property "{}"'.format(device.name, prop))
+
+
+def describe_device(device: Device) -> str:
+    '''Describe a device's place in the hierarchy, like xinput does.'''
+
+    if device.type == DeviceType.FLOATING:
+        return 'floating slave'
+
+    return '{} {} ({})'.format('master' if device.master else 'slave',
+                               device.type.value,
+                               device.attachment)
+
+
+def list_devices(xinput: Xinput) -> int:
+    '''--list command.'''
+
+    for device in xinput.devices:
+        print('{}\t{}\t[{}]'.format(device.id, device.name, describe_device(device)))
+
+    return 0
+
+
+def get_props(xinput: Xinput, args: List[str]) -> int:
+    '''--get command.'''
+
+    if len(args) > 2:
+        raise XinputError('--get takes a device and at most one property')
+
+    device = find_device(xinput, args[0])
+
+    if len(args) == 2:
+        print(find_prop(device, args[1]).val)
+        return 0
+
+    for prop in device.props:
+        print('{} ({}):\t{}'.format(prop.name, prop.id, prop.val))
+
+    return 0
+
+
+def set_prop(xinput: Xinput, args: List[str]) -> int:
+    '''--set command.'''
+
+    if len(args) < 3:
+        raise XinputError('--set takes a device, a property and a value')
+
+    device = find_device(xinput, args[0])
+    prop = find_prop(device, args[1])
+
+    # Keep values with separators in one piece, the way Prop.write_value()
+    # does
+    values = ['"{}"'.format(val) if ' ' in val or ',' in val else val for val in args[2:]]
+
+    result = device.set_props([(prop.id, ', '.join(values))])[0]
+    if result.error is not None:
+        print('Unable to set {}: {}'.format(prop.name, result.error), file=sys.stderr)
+        return 1
+
+    return 0
+
+
+def apply_named_profile(xinput: Xinput, name: str) -> int:
+    '''--apply-profile command.'''
+
+    profile = load_profiles().get(name)
+    if profile is None:
+        raise ProfileError('No profile named "{}"'.format(name))
+
+    report = apply_profile(xinput, profile)
+    sys.stdout.write(format_report(report))
+
+    failed = report.errors or any(change.error is not None for change in report.changes)
+    return 1 if failed else 0
+
+
+def main(argv: List[str]) -> int:
+    '''Run a command.
+
+    Args:
+        argv: command line arguments, without the program name.
+
+    Returns:
+        Exit status.
+    '''
+
+    args = get_parser().parse_args(argv)
+
+    if args.replay_trace is not None:
+        try:
+            command_worker = ReplayWorker(read_trace(args.replay_trace))
+        except (OSError, ValueError) as err:
+            print('xinput-gui: unable to read trace: {}'.format(err), file=sys.stderr)
+            return 1
+
+        # Traces hold xinput commands, so only the subprocess backend can
+        # replay them
+        xinput = Xinput(command_worker=command_worker)
+    else:
+        # Commands are run once, starting the command worker isn't worth it
+        xinput = Xinput(use_worker=False)
+
+        backend = args.backend or Settings().backend
+        xinput.set_backend(backend)
+        if xinput.backend.name != backend:
+            print('xinput-gui: unable to use {} backend, running xinput instead'.format(backend),
+                  file=sys.stderr)
+
+    if args.record_trace is not None:
+        try:
+            xinput.recorder = TraceRecorder(args.record_trace)
+        except OSError as err:
+            print('xinput-gui: unable to write trace: {}'.format(err), file=sys.stderr)
+            xinput.close()
+            return 1
+
+    try:
+        xinput.get_devices()
+
+        if args.list:
+            return list_devices(xinput)
+        if args.get:
+            return get_props(xinput, args.get)
+        if args.set:
+            return set_prop(xinput, args.set)
+        return apply_named_profile(xinput, args.apply_profile)
+    except (XinputError, ProfileError) as err:
+        print('xinput-gui: {}'.format(err), file=sys.stderr)
+        return 1
+    finally:
+        xinput.close()
+
+        if args.log_file is not None:
+            try:
+                xinput.export_log(args.log_file)
+            except OSError as err:
+                print('xinput-gui: unable to write log: {}'.format(err), file=sys.stderr)
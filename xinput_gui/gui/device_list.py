@@ -23,10 +23,10 @@ from typing import TYPE_CHECKING, List
 import gi
 gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk
-from pkg_resources import resource_filename
 
 from ..settings import Settings
 from ..xinput.devices import Device, DeviceType
+from .ui import build_ui
 
 if TYPE_CHECKING:
     from ..view_controller import ViewController
@@ -43,6 +43,8 @@ class DeviceList:
         self.main_window = main_window
         self.settings = settings
         self.refreshing = False
+        # Device ID -> Gtk.TreeRowReference of its row
+        self.rows = {}
 
         builder = self.get_builder()
 
@@ -57,15 +59,13 @@ class DeviceList:
             'tree_column_devices_id')
         self.tool_remove_master = builder.get_object('tool_remove_master')
         self.tool_reattach_slave = builder.get_object('tool_reattach_slave')
+        self.tool_cancel = builder.get_object('tool_cancel')
+        self.spinner_busy = builder.get_object('spinner_busy')
 
     def get_builder(self) -> Gtk.Builder:
         '''Get device list Gtk Builder.'''
 
-        builder = Gtk.Builder()
-        builder.add_objects_from_file(
-            resource_filename('xinput_gui', 'res/xinput-gui.ui'),
-            ['grid_device_list', 'store_devices'])
-        return builder
+        return build_ui(['grid_device_list', 'store_devices'])
 
     def apply_settings(self) -> None:
         '''Apply current settings.'''
@@ -76,37 +76,143 @@ class DeviceList:
     def refresh_devices(self, devices: List[Device]) -> None:
         '''Refresh the device list.
 
+        Rows are matched to devices by ID, and only rows whose name, type or
+        parent changed are touched, so selection, expansion and scroll
+        position are kept.
+
         Args:
             devices: List of Devices.
         '''
 
-        self.store_devices.clear()
-        self.tree_devices_selection.unselect_all()
-        self.tool_remove_master.set_sensitive(False)
+        ids = {device.id for device in devices}
+        removed = [id_ for id_ in self.rows if id_ not in ids]
+
+        self.update_devices(devices, removed)
+
+        if self.tree_devices_selection.count_selected_rows() == 0:
+            self.tool_remove_master.set_sensitive(False)
+
+    def update_devices(self, changed: List[Device], removed: List[int]) -> None:
+        '''Apply a hierarchy change to the device list.
+
+        Only the rows of changed and removed devices are touched. Devices are
+        placed before rows are removed, so slaves of a removed master are
+        moved out from under it first.
+
+        Args:
+            changed: Devices that were added or moved, in device list order.
+            removed: IDs of removed devices.
+        '''
+
+        for device in changed:
+            self.place_device(device)
+
+        for id_ in removed:
+            treeiter = self.get_row(id_)
+            self.rows.pop(id_, None)
+            if treeiter is not None:
+                self.store_devices.remove(treeiter)
+
+    def place_device(self, device: Device) -> None:
+        '''Add a device's row, or move it under its current parent.
+
+        Args:
+            device: Device to place.
+        '''
+
+        device_row = [
+            int(device.id),
+            device.name,
+            device.type.value,
+        ]
+
+        parent_iter = None
+        if not device.master and device.type != DeviceType.FLOATING:
+            parent_iter = self.get_row(device.attachment)
+
+        treeiter = self.get_row(device.id)
+        if treeiter is not None:
+            cur_parent = self.store_devices.iter_parent(treeiter)
+            cur_parent_id = None if cur_parent is None else self.store_devices[cur_parent][0]
+            parent_id = None if parent_iter is None else self.store_devices[parent_iter][0]
+
+            if cur_parent_id == parent_id:
+                if list(self.store_devices[treeiter]) != device_row:
+                    self.store_devices.set_row(treeiter, device_row)
+                return
 
-        master_iter = None
-        floating_devices = []
-        for device in devices:
-            device_row = [
-                int(device.id),
-                device.name,
-                device.type.value,
-            ]
+            self.store_devices.remove(treeiter)
 
-            if device.type == DeviceType.FLOATING:
-                floating_devices.append(device_row)
-                continue
+        if device.master:
+            # Masters go before floating devices
+            floating_iter = None
+            for top_iter in self.iter_rows(None):
+                if self.store_devices[top_iter][2] == DeviceType.FLOATING.value:
+                    floating_iter = top_iter
+                    break
+            treeiter = self.store_devices.insert_before(None, floating_iter, device_row)
+        else:
+            treeiter = self.store_devices.append(parent_iter, device_row)
+
+        self.rows[device.id] = Gtk.TreeRowReference.new(
+            self.store_devices, self.store_devices.get_path(treeiter))
 
-            cur_iter = self.store_devices.append(master_iter, device_row)
+        if parent_iter is not None:
+            self.tree_devices.expand_row(self.store_devices.get_path(parent_iter), False)
 
-            if device.master:
-                self.store_devices.remove(cur_iter)
-                master_iter = self.store_devices.append(None, device_row)
+    def select_device(self, id_: int) -> None:
+        '''Select a device's row.
 
-        for device in floating_devices:
-            self.store_devices.append(None, device)
+        Args:
+            id_: xinput device ID.
+        '''
 
-        self.tree_devices.expand_all()
+        treeiter = self.get_row(id_)
+        if treeiter is not None:
+            self.tree_devices_selection.select_iter(treeiter)
+
+    def get_row(self, id_: int) -> Gtk.TreeIter:
+        '''Get a device's row.
+
+        Args:
+            id_: xinput device ID.
+
+        Returns:
+            Row iter, or None if the device has no row.
+        '''
+
+        row = self.rows.get(id_)
+        if row is None or not row.valid():
+            return None
+
+        return self.store_devices.get_iter(row.get_path())
+
+    def iter_rows(self, parent_iter: Gtk.TreeIter):
+        '''Iterate over rows, depth first.
+
+        Args:
+            parent_iter: parent row, or None for the whole tree.
+        '''
+
+        treeiter = self.store_devices.iter_children(parent_iter)
+        while treeiter is not None:
+            yield treeiter
+            yield from self.iter_rows(treeiter)
+            treeiter = self.store_devices.iter_next(treeiter)
+
+    def set_busy(self, busy: bool) -> None:
+        '''Show or hide the busy indicator.
+
+        Args:
+            busy: if background work is running.
+        '''
+
+        if busy:
+            self.spinner_busy.start()
+        else:
+            self.spinner_busy.stop()
+
+        self.tool_cancel.set_sensitive(busy)
 
     def show_device(self, device: Device) -> None:
         '''Display properties of selected device.
@@ -176,3 +282,8 @@ class DeviceList:
             '''tool_refresh_devices "clicked" signal.'''
 
             self.controller.refresh_devices()
+
+        def on_tool_cancel_clicked(self, *args) -> None:
+            '''tool_cancel "clicked" signal.'''
+
+            self.controller.cancel_tasks()
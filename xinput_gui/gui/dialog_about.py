@@ -21,10 +21,12 @@
 import gi
 gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk
-from pkg_resources import require, resource_filename
 
+from ..resources import get_version
+from .ui import build_ui
 
-__version__ = require('xinput_gui')[0].version
+
+__version__ = get_version()
 
 
 class AboutDialog:
@@ -45,11 +47,7 @@ class AboutDialog:
     def get_builder(self) -> Gtk.Builder:
         '''Get about dialog Gtk Builder.'''
 
-        builder = Gtk.Builder()
-        builder.add_objects_from_file(
-            resource_filename('xinput_gui', 'res/xinput-gui.ui'),
-            ['dialog_about'])
-        return builder
+        return build_ui(['dialog_about'])
 
     def show(self) -> None:
         '''Show the about dialog.'''
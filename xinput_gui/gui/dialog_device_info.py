@@ -23,9 +23,9 @@ from typing import TYPE_CHECKING
 import gi
 gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk
-from pkg_resources import resource_filename
 
 from ..xinput.devices import Device
+from .ui import build_ui
 
 if TYPE_CHECKING:
     from ..view_controller import ViewController
@@ -50,24 +50,21 @@ class DeviceInfoDialog:
     def get_builder(self) -> Gtk.Builder:
         '''Get device info dialog Gtk Builder.'''
 
-        builder = Gtk.Builder()
-        builder.add_objects_from_file(
-            resource_filename('xinput_gui', 'res/xinput-gui.ui'),
-            ['dialog_device_info', 'buffer_device_info'])
-        return builder
+        return build_ui(['dialog_device_info', 'buffer_device_info'])
 
-    def show(self, device: Device) -> None:
+    def show(self, device: Device, info: str) -> None:
         '''Show the device info dialog.
 
         Args:
             device: Device whose info is being shown.
+            info: Device info.
         '''
 
         # Setup dialog
 
         labels = self.dialog_device_info.get_message_area().get_children()
         labels[1].set_label(device.name)
-        self.buffer_device_info.set_text(device.get_info())
+        self.buffer_device_info.set_text(info)
 
         # Show dialog
 
@@ -18,20 +18,32 @@
 
 '''Edit dialog.'''
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, List
 
 import gi
 gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk
-from pkg_resources import resource_filename
 
 from ..xinput.devices import Device, Prop
+from ..xinput.parser import PropType
+from .ui import build_ui
 
 if TYPE_CHECKING:
     from ..view_controller import ViewController
     from .win_main import MainWindow
 
 
+# Most values a property can have to get sliders
+LIVE_EDIT_MAX_VALUES = 4
+# Decimal places of float sliders
+FLOAT_DIGITS = 3
+# Integer properties that are safe to write on every slider step, and the
+# (lower, upper) range of their values
+LIVE_INTEGER_RANGES = {
+    'libinput Scrolling Pixel Distance': (10, 50),
+}
+
+
 class EditDialog:
     '''Edit dialog.'''
 
@@ -49,17 +61,24 @@ class EditDialog:
         self.entry_new_val = builder.get_object('entry_new_val')
         self.btn_edit_cancel = builder.get_object('btn_edit_cancel')
         self.btn_edit_apply = builder.get_object('btn_edit_apply')
+        self.box_edit_live = builder.get_object('box_edit_live')
 
         self.dialog_edit.set_transient_for(main_window.win_main)
 
+        # Property being edited, the slider adjustments for its values, and
+        # the check buttons for the values of flags
+        self.prop = None
+        self.adjustments = []
+        self.toggles = []
+        # If a slider is being dragged
+        self.dragging = False
+        # If the property was changed by sliders
+        self.edited_live = False
+
     def get_builder(self) -> Gtk.Builder:
         '''Get edit dialog Gtk Builder.'''
 
-        builder = Gtk.Builder()
-        builder.add_objects_from_file(
-            resource_filename('xinput_gui', 'res/xinput-gui.ui'),
-            ['dialog_edit'])
-        return builder
+        return build_ui(['dialog_edit'])
 
     def show(self,
              device: Device,
@@ -80,17 +99,160 @@ class EditDialog:
         self.entry_new_val.set_text(prop.val)
         self.entry_new_val.grab_focus()
 
+        self.prop = prop
+        self.edited_live = False
+        if is_flag_prop(prop):
+            self.add_toggles(prop)
+        else:
+            self.add_sliders(prop)
+
         # Show dialog
 
         res = self.dialog_edit.run()
+
+        self.controller.end_live_edit()
         if res == Gtk.ResponseType.APPLY:
             new_prop_val = self.entry_new_val.get_text()
 
             self.controller.set_prop(new_prop_val)
+        elif self.edited_live:
+            # Put back the value sliders changed
+            self.controller.set_prop(prop.write_value())
 
         self.dialog_edit.hide()
+        self.remove_sliders()
         return res
 
+    def add_sliders(self, prop: Prop) -> None:
+        '''Add a slider for each value of a float property, or an integer
+        property in LIVE_INTEGER_RANGES.
+
+        Slider changes are written live, so other integer properties don't
+        get sliders: there's no telling which values are valid for them, and
+        writing a wrong one, e.g. to Device Enabled, can make the device
+        being used unusable.
+
+        Args:
+            prop: Prop being edited.
+        '''
+
+        if not 0 < len(prop.values) <= LIVE_EDIT_MAX_VALUES:
+            return
+
+        int_range = LIVE_INTEGER_RANGES.get(prop.name)
+        if prop.type == PropType.INTEGER and int_range is not None:
+            if not all(int_range[0] <= val <= int_range[1] for val in prop.values):
+                return
+        elif prop.type != PropType.FLOAT:
+            return
+
+        for val in prop.values:
+            if prop.type == PropType.FLOAT:
+                bound = max(1.0, abs(val) * 2)
+                adjustment = Gtk.Adjustment(value=val, lower=-bound, upper=bound,
+                                            step_increment=0.01, page_increment=0.1)
+                digits = FLOAT_DIGITS
+            else:
+                adjustment = Gtk.Adjustment(value=val, lower=int_range[0], upper=int_range[1],
+                                            step_increment=1, page_increment=5)
+                digits = 0
+
+            scale = Gtk.Scale(orientation=Gtk.Orientation.HORIZONTAL, adjustment=adjustment)
+            scale.set_digits(digits)
+            scale.set_draw_value(False)
+            scale.set_hexpand(True)
+            scale.connect('button-press-event', self.drag_started)
+            scale.connect('button-release-event', self.drag_ended)
+
+            spin = Gtk.SpinButton(adjustment=adjustment, digits=digits)
+
+            row = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+            row.pack_start(scale, True, True, 0)
+            row.pack_start(spin, False, False, 0)
+            self.box_edit_live.pack_start(row, False, False, 0)
+
+            adjustment.connect('value-changed', self.slider_changed)
+            self.adjustments.append(adjustment)
+
+        self.box_edit_live.show_all()
+
+    def add_toggles(self, prop: Prop) -> None:
+        '''Add a check button for each value of a flag property.
+
+        Unlike sliders, toggles aren't written live, only once the new value
+        is applied.
+
+        Args:
+            prop: Prop being edited.
+        '''
+
+        for index, val in enumerate(prop.values):
+            label = 'Enabled' if len(prop.values) == 1 else 'Value {}'.format(index + 1)
+            toggle = Gtk.CheckButton(label=label)
+            toggle.set_active(bool(val))
+            toggle.connect('toggled', self.toggle_changed)
+
+            self.box_edit_live.pack_start(toggle, False, False, 0)
+            self.toggles.append(toggle)
+
+        self.box_edit_live.show_all()
+
+    def toggle_changed(self, *args) -> None:
+        '''A check button was toggled, show the new value.'''
+
+        values = [int(toggle.get_active()) for toggle in self.toggles]
+        self.entry_new_val.set_text(self.prop.write_value(values))
+
+    def remove_sliders(self) -> None:
+        '''Remove the sliders or check buttons of the last property.'''
+
+        for row in self.box_edit_live.get_children():
+            self.box_edit_live.remove(row)
+
+        self.adjustments = []
+        self.toggles = []
+        self.dragging = False
+
+    def get_slider_values(self) -> List:
+        '''Get the values set by the sliders, of the property's type.
+
+        Values of sliders that weren't moved are kept as they were, rather
+        than rounded to the sliders' precision.
+        '''
+
+        if self.prop.type == PropType.FLOAT:
+            return [val if adjustment.get_value() == val
+                    else round(adjustment.get_value(), FLOAT_DIGITS)
+                    for adjustment, val in zip(self.adjustments, self.prop.values)]
+
+        return [int(round(adjustment.get_value())) for adjustment in self.adjustments]
+
+    def slider_changed(self, *args) -> None:
+        '''A slider value changed, write it live.'''
+
+        new_val = self.prop.write_value(self.get_slider_values())
+        self.entry_new_val.set_text(new_val)
+        self.edited_live = True
+
+        self.controller.live_edit_prop(new_val)
+
+        # Clicks and keys are single changes, read them back straight away
+        if not self.dragging:
+            self.controller.live_readback()
+
+    def drag_started(self, *args) -> bool:
+        '''Slider "button-press-event" signal.'''
+
+        self.dragging = True
+        return False
+
+    def drag_ended(self, *args) -> bool:
+        '''Slider "button-release-event" signal.'''
+
+        self.dragging = False
+        self.controller.live_readback()
+        return False
+
     class SignalHandler:
         '''Handle edit dialog signals.'''
 
@@ -103,3 +265,16 @@ class EditDialog:
             '''entry_new_val "activate" signal.'''
 
             self.gui.btn_edit_apply.clicked()
+
+
+def is_flag_prop(prop: Prop) -> bool:
+    '''Check if a property holds on/off flags.
+
+    X has no flag type, so integer properties whose values are all 0 or 1
+    are taken as flags, as long as they're 8-bit or their format isn't
+    known.
+    '''
+
+    return (prop.type == PropType.INTEGER
+            and prop.format in (None, 8)
+            and all(val in (0, 1) for val in prop.values))
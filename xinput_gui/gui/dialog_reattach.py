@@ -23,9 +23,9 @@ from typing import TYPE_CHECKING, List
 import gi
 gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk
-from pkg_resources import resource_filename
 
 from ..xinput.devices import Device, DeviceType
+from .ui import build_ui
 
 if TYPE_CHECKING:
     from ..view_controller import ViewController
@@ -53,18 +53,14 @@ class ReattachDialog:
     def get_builder(self) -> Gtk.Builder:
         '''Get reattach dialog Gtk Builder.'''
 
-        builder = Gtk.Builder()
-        builder.add_objects_from_file(
-            resource_filename('xinput_gui', 'res/xinput-gui.ui'),
-            ['dialog_reattach', 'store_reattach'])
-        return builder
+        return build_ui(['dialog_reattach', 'store_reattach'])
 
-    def show(self, selected_device: Device, devices: List[Device]) -> Gtk.ResponseType:
+    def show(self, selected_device: Device, masters: List[Device]) -> Gtk.ResponseType:
         '''Show the reattach dialog.
 
         Args:
             selected_device: Device being shown.
-            devices: List of devices.
+            masters: List of master devices it can be reattached to.
         '''
 
         # Setup dialog
@@ -77,12 +73,13 @@ class ReattachDialog:
         self.rad_reattach_device.set_active(selected_device.type == DeviceType.FLOATING)
 
         self.store_reattach.clear()
-        for d in devices:
+        for master in masters:
+            self.store_reattach.append([master.id, master.name])
+
+        if masters:
             self.rad_reattach_device.set_sensitive(True)
             self.cmb_reattach_device.set_sensitive(True)
             self.cmb_reattach_device.set_active(0)
-            if d.master:
-                self.store_reattach.append([int(d.id), d.name])
 
         # Show dialog
 
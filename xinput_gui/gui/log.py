@@ -18,12 +18,14 @@
 
 '''Log.'''
 
+from collections import deque
 from typing import TYPE_CHECKING
 
 import gi
 gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk
-from pkg_resources import resource_filename
+
+from .ui import build_ui
 
 if TYPE_CHECKING:
     from .win_main import MainWindow
@@ -45,32 +47,60 @@ class Log:
         self.buffer_log = builder.get_object('buffer_log')
         self.text_log = builder.get_object('text_log')
         self.btn_clear_log = builder.get_object('btn_clear_log')
+        self.btn_export_log = builder.get_object('btn_export_log')
+
+        # Length of each entry in the buffer, oldest first
+        self.entry_lengths = deque()
 
     def get_builder(self) -> Gtk.Builder:
         '''Get device list Gtk Builder.'''
 
-        builder = Gtk.Builder()
-        builder.add_objects_from_file(
-            resource_filename('xinput_gui', 'res/xinput-gui.ui'),
-            ['grid_log', 'buffer_log'])
-        return builder
+        return build_ui(['grid_log', 'buffer_log'])
 
     def clear_log(self) -> None:
         '''Clear the log.'''
 
         self.buffer_log.set_text('')
+        self.entry_lengths.clear()
 
         # Unfocus clear button
         self.main_window.win_main.set_focus(None)
 
-    def update(self, log_text: str) -> None:
-        '''Update log.
+    def export_log(self) -> None:
+        '''Ask for a file and export the log to it as JSON Lines.'''
+
+        dialog = Gtk.FileChooserDialog(title='Export Log',
+                                       parent=self.main_window.win_main,
+                                       action=Gtk.FileChooserAction.SAVE)
+        dialog.add_buttons(Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL,
+                           Gtk.STOCK_SAVE, Gtk.ResponseType.OK)
+        dialog.set_do_overwrite_confirmation(True)
+        dialog.set_current_name('xinput-gui-log.jsonl')
+
+        res = dialog.run()
+        path = dialog.get_filename()
+        dialog.destroy()
+
+        if res == Gtk.ResponseType.OK and path:
+            self.main_window.controller.export_log(path)
+
+    def append(self, entry: str) -> None:
+        '''Add an entry to the end of the log.
+
+        Only the new text is inserted. Once there are more entries than the
+        log size setting allows, the oldest are deleted.
 
         Args:
-            log_text: Updated log text.
+            entry: Log entry text.
         '''
 
-        self.buffer_log.set_text(log_text)
+        self.buffer_log.insert(self.buffer_log.get_end_iter(), entry)
+        self.entry_lengths.append(len(entry))
+
+        while len(self.entry_lengths) > self.main_window.settings.log_size:
+            length = self.entry_lengths.popleft()
+            self.buffer_log.delete(self.buffer_log.get_start_iter(),
+                                   self.buffer_log.get_iter_at_offset(length))
 
     class SignalHandler:
         '''Handle log signals.'''
@@ -84,3 +114,8 @@ class Log:
             '''btn_clear_log "clicked" signal.'''
 
             self.gui.clear_log()
+
+        def on_btn_export_log_clicked(self, *args) -> None:
+            '''btn_export_log "clicked" signal.'''
+
+            self.gui.export_log()
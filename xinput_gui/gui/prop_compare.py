@@ -0,0 +1,176 @@
+# prop_compare.py - device property comparison
+# Copyright (C) 2019  Ivan Fonseca
+#
+# This file is part of xinput-gui.
+#
+# xinput-gui is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the # License,
+# or (at your option) any later version.
+#
+# xinput-gui is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with xinput-gui.  If not, see <https://www.gnu.org/licenses/>.
+
+'''Device property comparison.'''
+
+from typing import TYPE_CHECKING, List
+
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk
+
+from ..xinput.compare import ComparisonRow
+from ..xinput.devices import Device
+from .ui import build_ui
+
+if TYPE_CHECKING:
+    from ..view_controller import ViewController
+
+
+# Background of values that differ between devices
+DIFFERS_COLOR = 'rgba(237, 212, 0, 0.35)'
+# Shown for devices without a property
+MISSING_VAL = '-'
+
+
+class PropCompare:
+    '''Comparison of properties across devices.
+
+    Properties are rows and compared devices are columns. Rows where the
+    devices' values differ are highlighted.
+    '''
+
+    def __init__(self, controller: 'ViewController') -> None:
+        '''Init PropCompare.'''
+
+        self.controller = controller
+
+        builder = self.get_builder()
+
+        builder.connect_signals(PropCompare.SignalHandler(self))
+
+        self.grid_prop_compare = builder.get_object('grid_prop_compare')
+        self.store_compare_devices = builder.get_object('store_compare_devices')
+        self.tree_compare = builder.get_object('tree_compare')
+        self.chk_compare_differences = builder.get_object('chk_compare_differences')
+
+        # Devices and rows of the comparison being shown
+        self.devices = []
+        self.rows = []
+
+    def get_builder(self) -> Gtk.Builder:
+        '''Get property comparison Gtk Builder.'''
+
+        return build_ui(['grid_prop_compare', 'store_compare_devices'])
+
+    def set_devices(self, devices: List[Device]) -> None:
+        '''Fill the list of devices that can be compared.
+
+        Devices that were being compared stay checked.
+
+        Args:
+            devices: List of Devices.
+        '''
+
+        compared = set(self.get_compared_ids())
+
+        self.store_compare_devices.clear()
+        for device in devices:
+            self.store_compare_devices.append([device.id in compared, device.id, device.name])
+
+    def get_compared_ids(self) -> List[int]:
+        '''Get the IDs of the checked devices, in list order.'''
+
+        return [row[1] for row in self.store_compare_devices if row[0]]
+
+    def toggle_device(self, path: str) -> None:
+        '''Check or uncheck a device, and compare the checked devices.
+
+        Args:
+            path: device row path.
+        '''
+
+        row = self.store_compare_devices[path]
+        row[0] = not row[0]
+
+        self.controller.compare_devices(self.get_compared_ids())
+
+    def show_comparison(self, devices: List[Device], rows: List[ComparisonRow]) -> None:
+        '''Show a comparison, one column per device.
+
+        Args:
+            devices: compared Devices.
+            rows: ComparisonRows.
+        '''
+
+        self.devices = devices
+        self.rows = rows
+
+        for column in self.tree_compare.get_columns():
+            self.tree_compare.remove_column(column)
+
+        # Columns: property name, differs, then one value per device
+        self.tree_compare.append_column(self.create_column('Property', 0))
+        for index, device in enumerate(devices):
+            self.tree_compare.append_column(
+                self.create_column('{} ({})'.format(device.name, device.id), index + 2))
+
+        self.fill_rows()
+
+    def create_column(self, title: str, text_column: int) -> Gtk.TreeViewColumn:
+        '''Create a comparison column, highlighting rows that differ.
+
+        Args:
+            title: column title.
+            text_column: store column with the cell text.
+        '''
+
+        renderer = Gtk.CellRendererText()
+        renderer.set_property('cell-background', DIFFERS_COLOR)
+
+        column = Gtk.TreeViewColumn(title, renderer, text=text_column)
+        column.add_attribute(renderer, 'cell-background-set', 1)
+        column.set_resizable(True)
+
+        return column
+
+    def fill_rows(self) -> None:
+        '''Fill the comparison rows, only those that differ if asked to.'''
+
+        only_differences = self.chk_compare_differences.get_active()
+
+        # A new store, since the number of columns changes with the devices.
+        # It's filled before it's shown, so the view is only drawn once.
+        store = Gtk.ListStore(str, bool, *[str] * len(self.devices))
+        for row in self.rows:
+            if only_differences and not row.differs:
+                continue
+
+            store.append([row.name, row.differs] + [
+                MISSING_VAL if prop is None else prop.val for prop in row.props])
+
+        self.tree_compare.set_model(store)
+
+    class SignalHandler:
+        '''Handle property comparison signals.'''
+
+        def __init__(self, gui) -> None:
+            '''Init SignalHandler.'''
+
+            self.gui = gui
+
+        def on_cell_compare_device_toggled(self, renderer: Gtk.CellRendererToggle,
+                                           path: str) -> None:
+            '''Device "toggled" signal.'''
+
+            self.gui.toggle_device(path)
+
+        def on_chk_compare_differences_toggled(self, *args) -> None:
+            '''chk_compare_differences "toggled" signal.'''
+
+            self.gui.fill_rows()
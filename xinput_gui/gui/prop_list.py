@@ -18,15 +18,15 @@
 
 '''Device properties list.'''
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, List
 
 import gi
 gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk
-from pkg_resources import resource_filename
 
 from ..settings import Settings
-from ..xinput.devices import Device
+from ..xinput.devices import Device, Prop
+from .ui import build_ui
 
 if TYPE_CHECKING:
     from ..view_controller import ViewController
@@ -58,14 +58,15 @@ class PropList:
         self.tool_edit_prop = builder.get_object('tool_edit_prop')
         self.tool_refresh_props = builder.get_object('tool_refresh_props')
 
+        # ID of the device whose properties are shown
+        self.shown_device_id = None
+        # Property ID -> Gtk.TreeRowReference of its row
+        self.rows = {}
+
     def get_builder(self) -> Gtk.Builder:
         '''Get prop list Gtk Builder.'''
 
-        builder = Gtk.Builder()
-        builder.add_objects_from_file(
-            resource_filename('xinput_gui', 'res/xinput-gui.ui'),
-            ['grid_prop_list', 'store_props'])
-        return builder
+        return build_ui(['grid_prop_list', 'store_props'])
 
     def apply_settings(self) -> None:
         '''Apply current settings.'''
@@ -78,24 +79,119 @@ class PropList:
     def show_device_props(self, device: Device) -> None:
         '''Show device properties.
 
+        If the device's properties are already shown, only rows that changed
+        are touched, so the selection and scroll position are kept.
+
         Args:
             device: Device to display props of.
         '''
 
+        if device.id == self.shown_device_id:
+            self.update_props(device.props)
+            return
+
+        self.shown_device_id = device.id
+
         self.store_props.clear()
+        self.rows = {}
         self.tree_props_selection.unselect_all()
         self.tool_edit_prop.set_sensitive(False)
         self.tool_refresh_props.set_sensitive(True)
 
         for prop in device.props:
-            self.store_props.append(None, [
-                int(prop.id),
-                prop.name,
-                prop.val,
-            ])
+            self.add_row(prop)
 
         self.tree_props.scroll_to_point(0, 0)
 
+    def update_prop(self, prop: Prop) -> None:
+        '''Update a single property's row, or add it if it's new.
+
+        Args:
+            prop: Prop to show.
+        '''
+
+        treeiter = self.get_row(prop.id)
+        if treeiter is None:
+            self.add_row(prop)
+        elif self.store_props[treeiter][2] != prop.val:
+            self.store_props[treeiter][2] = prop.val
+
+    def add_row(self, prop: Prop) -> None:
+        '''Add a property's row at the end of the list.
+
+        Args:
+            prop: Prop to show.
+        '''
+
+        treeiter = self.store_props.append(None, [int(prop.id), prop.name, prop.val])
+        self.rows[prop.id] = Gtk.TreeRowReference.new(
+            self.store_props, self.store_props.get_path(treeiter))
+
+    def update_props(self, props: List[Prop]) -> None:
+        '''Update the shown properties in place.
+
+        Args:
+            props: all of the device's Props.
+        '''
+
+        prop_ids = {prop.id for prop in props}
+        for row_id in [row_id for row_id in self.rows if row_id not in prop_ids]:
+            self.remove_prop(row_id)
+
+        for prop in props:
+            self.update_prop(prop)
+
+    def remove_prop(self, prop_id: int) -> None:
+        '''Remove a deleted property's row.
+
+        Args:
+            prop_id: property ID.
+        '''
+
+        treeiter = self.get_row(prop_id)
+        self.rows.pop(prop_id, None)
+        if treeiter is not None:
+            self.store_props.remove(treeiter)
+
+    def get_row(self, prop_id: int) -> Gtk.TreeIter:
+        '''Get a property's row.
+
+        Args:
+            prop_id: property ID.
+
+        Returns:
+            Row iter, or None if the property isn't shown.
+        '''
+
+        row = self.rows.get(prop_id)
+        if row is None or not row.valid():
+            return None
+
+        return self.store_props.get_iter(row.get_path())
+
+    def select_prop(self, prop_id: int) -> None:
+        '''Select a property's row and scroll to it.
+
+        Args:
+            prop_id: property ID.
+        '''
+
+        treeiter = self.get_row(prop_id)
+        if treeiter is None:
+            return
+
+        self.tree_props_selection.select_iter(treeiter)
+        self.tree_props.scroll_to_cell(self.store_props.get_path(treeiter), None, False, 0, 0)
+
+    def clear_props(self) -> None:
+        '''Clear the property list, while properties are loading.'''
+
+        self.store_props.clear()
+        self.rows = {}
+        self.shown_device_id = None
+        self.tool_edit_prop.set_sensitive(False)
+        self.tool_refresh_props.set_sensitive(False)
+
     def enable_edit_tool(self) -> None:
         '''Enable edit prop tool.'''
 
@@ -119,11 +215,7 @@ class PropList:
             if not treeiter:
                 return
 
-            self.controller.prop_selected(
-                model[treeiter][0],
-                model[treeiter][1],
-                model[treeiter][2],
-            )
+            self.controller.prop_selected(model[treeiter][0])
 
         def on_tree_props_row_activated(self, *args) -> None:
             '''tree_props "row-activated" signal.'''
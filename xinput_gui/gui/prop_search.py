@@ -0,0 +1,121 @@
+# prop_search.py - property search
+# Copyright (C) 2019  Ivan Fonseca
+#
+# This file is part of xinput-gui.
+#
+# xinput-gui is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the # License,
+# or (at your option) any later version.
+#
+# xinput-gui is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with xinput-gui.  If not, see <https://www.gnu.org/licenses/>.
+
+'''Property search.'''
+
+from typing import TYPE_CHECKING, List
+
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk
+
+from ..xinput.devices import DeviceRegistry
+from ..xinput.search import SearchResult
+from .ui import build_ui
+
+if TYPE_CHECKING:
+    from ..view_controller import ViewController
+
+
+# Most results shown at once, so short queries don't fill a huge list
+MAX_RESULTS = 500
+
+
+class PropSearch:
+    '''Search of the properties of all devices.'''
+
+    def __init__(self, controller: 'ViewController') -> None:
+        '''Init PropSearch.'''
+
+        self.controller = controller
+
+        builder = self.get_builder()
+
+        builder.connect_signals(PropSearch.SignalHandler(controller))
+
+        self.grid_prop_search = builder.get_object('grid_prop_search')
+        self.entry_prop_search = builder.get_object('entry_prop_search')
+        self.label_prop_search = builder.get_object('label_prop_search')
+        self.store_prop_search = builder.get_object('store_prop_search')
+        self.tree_prop_search = builder.get_object('tree_prop_search')
+
+    def get_builder(self) -> Gtk.Builder:
+        '''Get property search Gtk Builder.'''
+
+        return build_ui(['grid_prop_search', 'store_prop_search'])
+
+    def get_query(self) -> str:
+        '''Get the search text.'''
+
+        return self.entry_prop_search.get_text()
+
+    def show_results(self,
+                     results: List[SearchResult],
+                     registry: DeviceRegistry,
+                     loading: int) -> None:
+        '''Show search results.
+
+        Args:
+            results: SearchResults.
+            registry: DeviceRegistry, for device names.
+            loading: number of devices whose properties are still loading.
+        '''
+
+        results = [(registry.get(result.device_id), result.prop) for result in results]
+        results = [(device, prop) for device, prop in results if device is not None]
+
+        # Fill a detached store, so the view isn't redrawn for every row
+        self.tree_prop_search.set_model(None)
+        self.store_prop_search.clear()
+        for device, prop in results[:MAX_RESULTS]:
+            self.store_prop_search.append([device.id, device.name, prop.id, prop.name, prop.val])
+        self.tree_prop_search.set_model(self.store_prop_search)
+
+        if not self.get_query().strip():
+            status = ''
+        elif len(results) > MAX_RESULTS:
+            status = 'Showing {} of {} matching properties'.format(MAX_RESULTS, len(results))
+        else:
+            status = '{} matching properties'.format(len(results))
+
+        if loading:
+            status += ' (loading properties of {} devices)'.format(loading)
+
+        self.label_prop_search.set_text(status)
+
+    class SignalHandler:
+        '''Handle property search signals.'''
+
+        def __init__(self, controller: 'ViewController') -> None:
+            '''Init SignalHandler.'''
+
+            self.controller = controller
+
+        def on_entry_prop_search_search_changed(self, entry: Gtk.SearchEntry) -> None:
+            '''entry_prop_search "search-changed" signal.'''
+
+            self.controller.search_props(entry.get_text())
+
+        def on_tree_prop_search_row_activated(self,
+                                              tree: Gtk.TreeView,
+                                              path: Gtk.TreePath,
+                                              column: Gtk.TreeViewColumn) -> None:
+            '''tree_prop_search "row-activated" signal.'''
+
+            row = tree.get_model()[path]
+            self.controller.show_search_result(row[0], row[2])
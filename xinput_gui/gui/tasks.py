@@ -0,0 +1,268 @@
+# tasks.py - background tasks
+# Copyright (C) 2019  Ivan Fonseca
+#
+# This file is part of xinput-gui.
+#
+# xinput-gui is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the # License,
+# or (at your option) any later version.
+#
+# xinput-gui is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with xinput-gui.  If not, see <https://www.gnu.org/licenses/>.
+
+'''Background tasks.
+
+xinput calls are slow enough to freeze the window, so they're run on a
+worker thread. Results are posted back to the GTK main loop with
+GLib.idle_add, where all widgets are touched.
+
+Tasks run one at a time, in the order they were started, so an operation
+followed by a refresh always sees the operation's result.
+'''
+
+from typing import Any, Callable
+import queue
+import threading
+
+from gi.repository import GLib
+
+
+class Task:
+    '''A function to be run in the background.'''
+
+    def __init__(self,
+                 func: Callable[[], Any],
+                 callback: Callable[[Any], None],
+                 error_callback: Callable[[Exception], None],
+                 key: str,
+                 write: bool = False) -> None:
+        '''Init Task.
+
+        Args:
+            func: function to run on the worker thread.
+            callback: called on the main loop with func's result.
+            error_callback: called on the main loop if func raises.
+            key: tasks with the same key replace each other.
+            write: if the task changes devices, rather than only reading them.
+        '''
+
+        self.func = func
+        self.callback = callback
+        self.error_callback = error_callback
+        self.key = key
+        self.write = write
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        '''Cancel the task.
+
+        If it hasn't started it never will, and if it's running its result is
+        thrown away.
+        '''
+
+        self.cancelled = True
+
+
+class TaskRunner:
+    '''Runs tasks on a worker thread.'''
+
+    def __init__(self,
+                 busy_changed: Callable[[bool], None],
+                 task_failed: Callable[[Exception], None]) -> None:
+        '''Init TaskRunner.
+
+        Args:
+            busy_changed: called on the main loop when tasks start or stop
+                running.
+            task_failed: called on the main loop when a task without an
+                error callback raises.
+        '''
+
+        self.busy_changed = busy_changed
+        self.task_failed = task_failed
+
+        # Tasks that haven't finished yet, only touched on the main loop
+        self.pending = []
+        self.queue = queue.Queue()
+
+        self.thread = threading.Thread(target=self.work, daemon=True)
+        self.thread.start()
+
+    def run(self,
+            func: Callable[[], Any],
+            callback: Callable[[Any], None] = None,
+            error_callback: Callable[[Exception], None] = None,
+            key: str = None,
+            write: bool = False) -> Task:
+        '''Run a function in the background.
+
+        Args:
+            func: function to run on the worker thread.
+            callback: called on the main loop with func's result.
+            error_callback: called on the main loop if func raises, instead
+                of task_failed.
+            key: if given, any unfinished task with the same key is cancelled.
+            write: if the task changes devices. Writes aren't cancelled by
+                cancel_all(), since their changes are already shown.
+
+        Returns:
+            The new Task.
+        '''
+
+        if key is not None:
+            for task in self.pending:
+                if task.key == key:
+                    task.cancel()
+
+        task = Task(func, callback, error_callback, key, write)
+        self.pending.append(task)
+        self.queue.put(task)
+
+        if len(self.pending) == 1:
+            self.busy_changed(True)
+
+        return task
+
+    def cancel_all(self) -> None:
+        '''Cancel all unfinished tasks that only read.
+
+        Writes carry on, the user's changes were already shown as made.
+        '''
+
+        for task in self.pending:
+            if not task.write:
+                task.cancel()
+
+        self.pending = [task for task in self.pending if task.write]
+        if not self.pending:
+            self.busy_changed(False)
+
+    def work(self) -> None:
+        '''Worker thread loop.'''
+
+        while True:
+            task = self.queue.get()
+
+            result, error = None, None
+            if not task.cancelled:
+                try:
+                    result = task.func()
+                except Exception as err:
+                    error = err
+
+            GLib.idle_add(self.finish, task, result, error)
+
+    def finish(self, task: Task, result: Any, error: Exception) -> bool:
+        '''Deliver a task's result, on the main loop.'''
+
+        if task in self.pending:
+            self.pending.remove(task)
+            if not self.pending:
+                self.busy_changed(False)
+
+        if task.cancelled:
+            return False
+
+        if error is not None:
+            if task.error_callback is not None:
+                task.error_callback(error)
+            else:
+                self.task_failed(error)
+        elif task.callback is not None:
+            task.callback(result)
+
+        # Don't run again
+        return False
+
+
+class CoalescingWriter:
+    '''Runs writes through a TaskRunner, at most one at a time.
+
+    While a write is running, newer writes replace each other, so only the
+    latest is run once it's done. Used for live edits, where values change
+    faster than they can be written.
+
+    Only used on the main loop.
+    '''
+
+    def __init__(self, tasks: TaskRunner) -> None:
+        '''Init CoalescingWriter.
+
+        Args:
+            tasks: TaskRunner to run writes with.
+        '''
+
+        self.tasks = tasks
+
+        # Write that's running, and the latest one waiting for it
+        self.running = None
+        self.waiting = None
+        # Called once there are no more writes
+        self.idle_callbacks = []
+
+    def write(self, func: Callable[[], Any]) -> None:
+        '''Write, now or once the running write is done.
+
+        Args:
+            func: function that writes, run on the worker thread.
+        '''
+
+        self.waiting = func
+        if not self.busy():
+            self.start_next()
+
+    def busy(self) -> bool:
+        '''Check if a write is running.'''
+
+        # Cancelled tasks never call back
+        return self.running is not None and not self.running.cancelled
+
+    def when_idle(self, callback: Callable[[], None]) -> None:
+        '''Call a function once all writes are done.
+
+        Args:
+            callback: called on the main loop.
+        '''
+
+        if self.busy() or self.waiting is not None:
+            self.idle_callbacks.append(callback)
+        else:
+            callback()
+
+    def discard(self) -> None:
+        '''Drop the waiting write and idle callbacks.
+
+        A running write still finishes.
+        '''
+
+        self.waiting = None
+        self.idle_callbacks.clear()
+
+    def start_next(self) -> None:
+        '''Start the waiting write, or call idle callbacks if there's none.'''
+
+        func, self.waiting = self.waiting, None
+
+        if func is None:
+            self.running = None
+            callbacks, self.idle_callbacks = self.idle_callbacks, []
+            for callback in callbacks:
+                callback()
+            return
+
+        self.running = self.tasks.run(func,
+                                      lambda _: self.start_next(),
+                                      self.write_failed,
+                                      write=True)
+
+    def write_failed(self, error: Exception) -> None:
+        '''A write failed. Report it, and carry on with the next one.'''
+
+        self.tasks.task_failed(error)
+        self.start_next()
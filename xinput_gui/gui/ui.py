@@ -0,0 +1,80 @@
+# ui.py - shared UI definition loader
+# Copyright (C) 2019  Ivan Fonseca
+#
+# This file is part of xinput-gui.
+#
+# xinput-gui is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the # License,
+# or (at your option) any later version.
+#
+# xinput-gui is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with xinput-gui.  If not, see <https://www.gnu.org/licenses/>.
+
+'''Shared UI definition loader.
+
+Every component is built from the same UI file. Rather than each of them
+having Gtk.Builder parse the whole file for the few objects it needs, the
+file is read and split into its top-level objects once, and each builder
+only gets the objects it asks for.
+'''
+
+from typing import Dict, List
+from xml.etree import ElementTree
+
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk
+
+from ..resources import read_resource
+
+
+# Top-level object ID -> object XML, loaded on first use
+fragments = None
+# <requires> elements of the UI file
+requires = ''
+
+
+def load_fragments() -> Dict[str, str]:
+    '''Split the UI file into its top-level objects.
+
+    Returns:
+        Object ID -> object XML dict.
+    '''
+
+    global fragments, requires
+
+    if fragments is None:
+        root = ElementTree.fromstring(read_resource('xinput-gui.ui'))
+
+        requires = ''.join(ElementTree.tostring(element, encoding='unicode')
+                           for element in root.findall('requires'))
+        fragments = {element.get('id'): ElementTree.tostring(element, encoding='unicode')
+                     for element in root.findall('object')}
+
+    return fragments
+
+
+def build_ui(object_ids: List[str]) -> Gtk.Builder:
+    '''Get a builder holding some objects from the UI file.
+
+    Args:
+        object_ids: IDs of the top-level objects to build. Objects they
+            refer to, such as models, must be included too.
+
+    Returns:
+        Gtk.Builder.
+    '''
+
+    objects = load_fragments()
+
+    builder = Gtk.Builder()
+    builder.add_from_string('<interface>{}{}</interface>'.format(
+        requires, ''.join(objects[object_id] for object_id in object_ids)))
+
+    return builder
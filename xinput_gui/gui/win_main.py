@@ -23,20 +23,23 @@ from typing import TYPE_CHECKING
 import gi
 gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk
-from pkg_resources import require, resource_filename
 
+from ..resources import get_version
 from ..settings import Settings
 from .device_list import DeviceList
 from .dialog_about import AboutDialog
 from .log import Log
+from .prop_compare import PropCompare
 from .prop_list import PropList
+from .prop_search import PropSearch
+from .ui import build_ui
 from .win_settings import SettingsWindow
 
 if TYPE_CHECKING:
     from ..view_controller import ViewController
 
 
-__version__ = require('xinput_gui')[0].version
+__version__ = get_version()
 
 
 class MainWindow:
@@ -56,15 +59,22 @@ class MainWindow:
         self.win_main = builder.get_object('win_main')
         self.box_editor = builder.get_object('box_stack_editor')
         self.box_log = builder.get_object('box_stack_log')
+        self.box_search = builder.get_object('box_stack_search')
+        self.box_compare = builder.get_object('box_stack_compare')
+        self.stack_main = builder.get_object('stack_main')
+        self.menu_profiles = builder.get_object('menu_profiles')
 
         self.win_main.set_title('Xinput GUI {}'.format(__version__))
-        self.win_main.show_all()
 
-        self.about_dialog = AboutDialog(self)
         self.device_list = DeviceList(controller, self, settings)
         self.log = Log(self)
         self.prop_list = PropList(controller, self, settings)
-        self.settings_window = SettingsWindow(self, settings)
+        self.prop_search = PropSearch(controller)
+        self.prop_compare = PropCompare(controller)
+
+        # Built on first use
+        self.cached_about_dialog = None
+        self.cached_settings_window = None
 
         self.box_editor.pack_start(self.device_list.grid_device_list,
                                  True, True, 0)
@@ -72,17 +82,36 @@ class MainWindow:
                                  True, True, 0)
 
         self.box_log.pack_start(self.log.grid_log, True, True, 0)
+        self.box_search.pack_start(self.prop_search.grid_prop_search, True, True, 0)
+        self.box_compare.pack_start(self.prop_compare.grid_prop_compare, True, True, 0)
 
         self.apply_settings()
 
+        # Only show the window once it's complete, so it's laid out once
+        self.win_main.show_all()
+
+    @property
+    def about_dialog(self) -> AboutDialog:
+        '''About dialog, built on first use.'''
+
+        if self.cached_about_dialog is None:
+            self.cached_about_dialog = AboutDialog(self)
+
+        return self.cached_about_dialog
+
+    @property
+    def settings_window(self) -> SettingsWindow:
+        '''Settings window, built on first use.'''
+
+        if self.cached_settings_window is None:
+            self.cached_settings_window = SettingsWindow(self, self.settings)
+
+        return self.cached_settings_window
+
     def get_builder(self) -> Gtk.Builder:
         '''Get main window Gtk Builder.'''
 
-        builder = Gtk.Builder()
-        builder.add_objects_from_file(
-            resource_filename('xinput_gui', 'res/xinput-gui.ui'),
-            ['win_main'])
-        return builder
+        return build_ui(['win_main'])
 
     def apply_settings(self) -> None:
         '''Apply current settings.'''
@@ -98,6 +127,11 @@ class MainWindow:
             self.box_editor.set_orientation(Gtk.Orientation.HORIZONTAL)
             self.win_main.resize(900, 450)
 
+    def show_editor(self) -> None:
+        '''Switch to the editor page.'''
+
+        self.stack_main.set_visible_child_name('page_editor')
+
     def show_settings_window(self) -> None:
         '''Shows the settings window.'''
 
@@ -108,6 +142,25 @@ class MainWindow:
 
         self.about_dialog.show()
 
+    def fill_profiles_menu(self) -> None:
+        '''Fill the profiles menu with the profiles on disk.'''
+
+        for item in self.menu_profiles.get_children():
+            self.menu_profiles.remove(item)
+
+        names = self.controller.get_profile_names()
+        for name in names:
+            item = Gtk.MenuItem.new_with_label(name)
+            item.connect('activate', lambda _, name=name: self.controller.apply_profile(name))
+            self.menu_profiles.append(item)
+
+        if not names:
+            item = Gtk.MenuItem.new_with_label('No profiles')
+            item.set_sensitive(False)
+            self.menu_profiles.append(item)
+
+        self.menu_profiles.show_all()
+
     class SignalHandler:
         '''Handle main window signals.'''
 
@@ -126,6 +179,11 @@ class MainWindow:
 
             self.gui.show_settings_window()
 
+        def on_menu_item_profiles_activate(self, *args) -> None:
+            '''menu_item_profiles "activate" signal.'''
+
+            self.gui.fill_profiles_menu()
+
         def on_menu_about_activate(self, *args) -> None:
             '''menu_about "activate" signal.'''
 
@@ -21,9 +21,9 @@
 import gi
 gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk
-from pkg_resources import resource_filename
 
 from ..settings import Settings
+from .ui import build_ui
 
 
 class SettingsWindow:
@@ -51,11 +51,7 @@ class SettingsWindow:
     def get_builder(self) -> Gtk.Builder:
         '''Get settings window Gtk Builder.'''
 
-        builder = Gtk.Builder()
-        builder.add_objects_from_file(
-            resource_filename('xinput_gui', 'res/xinput-gui.ui'),
-            ['win_settings'])
-        return builder
+        return build_ui(['win_settings'])
 
     def show(self) -> None:
         '''Show the settings window.'''
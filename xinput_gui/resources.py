@@ -0,0 +1,73 @@
+# resources.py - package resources and metadata
+# Copyright (C) 2019  Ivan Fonseca
+#
+# This file is part of xinput-gui.
+#
+# xinput-gui is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the # License,
+# or (at your option) any later version.
+#
+# xinput-gui is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with xinput-gui.  If not, see <https://www.gnu.org/licenses/>.
+
+'''Package resources and metadata.
+
+pkg_resources scans every installed distribution when it's imported, which
+can take hundreds of milliseconds, so importlib is used instead. Older
+Pythons without it read resources next to this file, and only fall back to
+pkg_resources for the version.
+'''
+
+from pathlib import Path
+
+
+def read_resource(name: str) -> bytes:
+    '''Read a file from the res directory.
+
+    Args:
+        name: file name, e.g. 'xinput-gui.ui'.
+
+    Returns:
+        File contents.
+    '''
+
+    # Imported here, the command line mode only needs it the first time
+    try:
+        from importlib.resources import files
+    except ImportError:
+        # Python < 3.9
+        return Path(__file__).parent.joinpath('res', name).read_bytes()
+
+    return files('xinput_gui').joinpath('res').joinpath(name).read_bytes()
+
+
+def get_version() -> str:
+    '''Get the installed version of xinput-gui.
+
+    Returns:
+        Version, or 'unknown' if xinput-gui isn't installed.
+    '''
+
+    try:
+        from importlib.metadata import PackageNotFoundError, version
+    except ImportError:
+        # Python < 3.8
+        from pkg_resources import DistributionNotFound, require
+        try:
+            return require('xinput_gui')[0].version
+        except DistributionNotFound:
+            return 'unknown'
+
+    for name in ('xinput-gui', 'xinput_gui'):
+        try:
+            return version(name)
+        except PackageNotFoundError:
+            pass
+
+    return 'unknown'
@@ -19,11 +19,10 @@
 '''Application settings.'''
 
 from pathlib import Path
-from shutil import copyfile
 import json
 import os
 
-from pkg_resources import resource_filename
+from .resources import read_resource
 
 
 CONFIG_PATH = Path(os.environ['HOME']).joinpath('.xinput-gui.json')
@@ -41,6 +40,8 @@ class Settings:
         self.inline_prop_edit = True
         self.hide_device_ids = True
         self.hide_prop_ids = True
+        self.backend = 'subprocess'
+        self.log_size = 500
 
         self.load_config()
 
@@ -49,7 +50,7 @@ class Settings:
 
         # Create config if needed
         if not CONFIG_PATH.is_file():
-            copyfile(resource_filename('xinput_gui', 'res/config.json'), CONFIG_PATH)
+            CONFIG_PATH.write_bytes(read_resource('config.json'))
 
         with open(CONFIG_PATH) as config_file:
             self.config = json.load(config_file)
@@ -58,6 +59,8 @@ class Settings:
         self.inline_prop_edit = self.config.get('inline_prop_edit', self.inline_prop_edit)
         self.hide_device_ids = self.config.get('hide_device_ids', self.hide_device_ids)
         self.hide_prop_ids = self.config.get('hide_prop_ids', self.hide_prop_ids)
+        self.backend = self.config.get('backend', self.backend)
+        self.log_size = self.config.get('log_size', self.log_size)
 
     def save_config(self):
         '''Save config file.'''
@@ -66,6 +69,8 @@ class Settings:
         self.config['inline_prop_edit'] = self.inline_prop_edit
         self.config['hide_device_ids'] = self.hide_device_ids
         self.config['hide_prop_ids'] = self.hide_prop_ids
+        self.config['backend'] = self.backend
+        self.config['log_size'] = self.log_size
 
         with open(CONFIG_PATH, 'w', encoding='utf-8') as config_file:
             json.dump(self.config, config_file, indent=2)
@@ -18,21 +18,38 @@
 
 '''App view controller.'''
 
+from pathlib import Path
+from typing import Any, List, Tuple
+
 import gi
 gi.require_version('Gtk', '3.0')
-from gi.repository import Gtk
+from gi.repository import GLib, Gtk
 
 from .gui.dialog_create_master import CreateMasterDialog
 from .gui.dialog_device_info import DeviceInfoDialog
 from .gui.dialog_edit import EditDialog
 from .gui.dialog_reattach import ReattachDialog
+from .gui.tasks import CoalescingWriter, TaskRunner
 from .gui.win_main import MainWindow
 from .settings import Settings
 from .view_model import ViewModel
+from .xinput.backend import XinputError
+from .xinput.compare import compare_props
+from .xinput.devices import Device, Prop, PropResult
+from .xinput.events import PROPERTY_DELETED, HierarchyEvent, PropertyEvent
+from .xinput.profiles import ProfileError, ProfileReport, load_profiles
 
 
 class ViewController:
-    '''App view controller.'''
+    '''App view controller.
+
+    All xinput calls are made in the background through self.tasks, and
+    their results are shown once they're done, so the window never freezes.
+
+    Changes to the device hierarchy and to properties are picked up by
+    self.watcher as they happen, and only the devices and properties that
+    changed are updated.
+    '''
 
     def __init__(self) -> None:
         '''Init ViewController.'''
@@ -43,13 +60,73 @@ class ViewController:
         self.device_list = self.main_window.device_list
         self.prop_list = self.main_window.prop_list
         self.log = self.main_window.log
+        self.prop_search = self.main_window.prop_search
+        self.prop_compare = self.main_window.prop_compare
+
+        self.tasks = TaskRunner(self.device_list.set_busy, self.task_failed)
+        # Writes of live edits, at most one at a time
+        self.live_writer = CoalescingWriter(self.tasks)
+        # (device ID, property ID) being edited live, whose change events
+        # are ignored until it's read back
+        self.live_prop = None
 
         self.model.xinput.set_controller(self)
+        self.model.xinput.set_log_size(self.settings.log_size)
+        self.model.xinput.set_backend(self.settings.backend)
+
+        self.watcher = self.model.xinput.backend.create_watcher(self.xinput_event)
+        try:
+            self.watcher.start()
+        except (OSError, XinputError) as err:
+            self.model.xinput.log_error('Unable to watch for device changes: {}'.format(err))
+            self.watcher = None
+
+        # Task loading properties of all devices for searching, if any.
+        # It's kept rather than a flag, since a cancelled task never calls
+        # back.
+        self.indexing_task = None
+
+        # Dialogs are only built once they're needed
+        self.cached_dialog_create_master = None
+        self.cached_dialog_device_info = None
+        self.cached_dialog_edit = None
+        self.cached_dialog_reattach = None
+
+    @property
+    def dialog_create_master(self) -> CreateMasterDialog:
+        '''Create master device dialog, built on first use.'''
+
+        if self.cached_dialog_create_master is None:
+            self.cached_dialog_create_master = CreateMasterDialog(self, self.main_window)
+
+        return self.cached_dialog_create_master
+
+    @property
+    def dialog_device_info(self) -> DeviceInfoDialog:
+        '''Device info dialog, built on first use.'''
+
+        if self.cached_dialog_device_info is None:
+            self.cached_dialog_device_info = DeviceInfoDialog(self, self.main_window)
+
+        return self.cached_dialog_device_info
 
-        self.dialog_create_master = CreateMasterDialog(self, self.main_window)
-        self.dialog_device_info = DeviceInfoDialog(self, self.main_window)
-        self.dialog_edit = EditDialog(self, self.main_window)
-        self.dialog_reattach = ReattachDialog(self, self.main_window)
+    @property
+    def dialog_edit(self) -> EditDialog:
+        '''Edit dialog, built on first use.'''
+
+        if self.cached_dialog_edit is None:
+            self.cached_dialog_edit = EditDialog(self, self.main_window)
+
+        return self.cached_dialog_edit
+
+    @property
+    def dialog_reattach(self) -> ReattachDialog:
+        '''Reattach dialog, built on first use.'''
+
+        if self.cached_dialog_reattach is None:
+            self.cached_dialog_reattach = ReattachDialog(self, self.main_window)
+
+        return self.cached_dialog_reattach
 
     def start(self) -> None:
         '''Start app.'''
@@ -58,25 +135,219 @@ class ViewController:
 
         Gtk.main()
 
-    def log_updated(self, log_text: str) -> None:
-        '''Xinput log updated.
+        if self.watcher is not None:
+            self.watcher.stop()
+        self.model.xinput.close()
+
+    def log_appended(self, entry: str) -> None:
+        '''Entry added to the xinput log. May be called from any thread.
 
         Args:
-            log_text: Updated log text.
+            entry: New log entry.
         '''
 
-        self.log.update(log_text)
+        GLib.idle_add(self.log.append, entry)
+
+    def export_log(self, path: str) -> None:
+        '''Export the xinput log as JSON Lines.
+
+        Args:
+            path: file to write.
+        '''
+
+        try:
+            self.model.xinput.export_log(Path(path))
+        except OSError as err:
+            self.model.xinput.log_error('Unable to export log: {}'.format(err))
+
+    def task_failed(self, error: Exception) -> None:
+        '''A background task failed.
+
+        Args:
+            error: Error raised by the task.
+        '''
+
+        self.model.xinput.log_error(str(error))
+
+    def xinput_event(self, event: Any) -> None:
+        '''Xinput event received. Called from the watcher's thread.
+
+        Args:
+            event: Event from the watcher.
+        '''
+
+        GLib.idle_add(self.handle_event, event)
+
+    def handle_event(self, event: Any) -> bool:
+        '''Handle an xinput event, on the main loop.
+
+        Args:
+            event: Event from the watcher.
+        '''
+
+        if isinstance(event, HierarchyEvent):
+            self.tasks.run(lambda: self.model.xinput.apply_hierarchy_changes(event.infos),
+                           self.show_hierarchy_changes)
+        elif isinstance(event, PropertyEvent):
+            self.property_changed(event)
+
+        # Don't run again
+        return False
+
+    def show_hierarchy_changes(self, changes: Tuple[List[Device], List[int]]) -> None:
+        '''Show devices changed by a hierarchy event.
+
+        Args:
+            changes: (changed, removed) tuple, as returned by
+                Xinput.apply_hierarchy_changes.
+        '''
+
+        changed, removed = changes
+        device = self.model.selected_device
+
+        self.prop_compare.set_devices(self.model.xinput.devices)
+
+        self.model.refreshing = True
+        self.device_list.update_devices(changed, removed)
+        if device is not None and device.id not in removed:
+            # Moved rows lose their selection
+            self.device_list.select_device(device.id)
+        self.model.refreshing = False
+
+        if device is None:
+            return
+
+        if device.id in removed:
+            self.model.selected_device = None
+            self.prop_list.clear_props()
+        elif device in changed:
+            # Its properties were invalidated, load them again
+            self.device_selected(device.id)
+
+    def property_changed(self, event: PropertyEvent) -> None:
+        '''A device property was changed by someone.
+
+        Only the changed property of the selected device is read again.
+        Other devices that have the property just forget their cached
+        properties.
+
+        Args:
+            event: PropertyEvent from the watcher.
+        '''
+
+        if self.model.xinput.wrote_recently(event.device_id, event.prop_id):
+            # Caused by our own write, which was already read back
+            return
+
+        selected = self.model.selected_device
+
+        if event.device_id is None:
+            # Property IDs are shared by all devices, so the device can only
+            # be narrowed down to those that have the property
+            others = [device for device in self.model.xinput.devices
+                      if device.cached_props is not None
+                      and any(prop.id == event.prop_id for prop in device.cached_props)]
+        else:
+            device = self.model.xinput.get_device_by_id(event.device_id)
+            others = [] if device is None else [device]
+
+        for device in others:
+            if device is not selected:
+                device.invalidate_props()
+
+        if selected is None or selected.cached_props is None:
+            return
+
+        if event.device_id is None:
+            # Property IDs are shared by all devices, only bother if the
+            # selected device has it
+            if all(prop.id != event.prop_id for prop in selected.cached_props):
+                return
+        elif event.device_id != selected.id:
+            return
+        elif event.what == PROPERTY_DELETED:
+            self.hide_prop(selected, event.prop_id)
+            return
+
+        prop_id = event.prop_id
+        if self.live_prop == (selected.id, prop_id):
+            # Caused by live writes, it's read back once they're done
+            return
+
+        self.tasks.run(lambda: selected.update_prop(prop_id),
+                       lambda prop: self.show_prop(selected, prop),
+                       # The property is gone
+                       lambda _: self.hide_prop(selected, prop_id),
+                       key='prop {} {}'.format(selected.id, prop_id))
+
+    def show_prop(self, device: Device, prop: Prop) -> None:
+        '''Show a single updated property, if its device is still selected.
+
+        Args:
+            device: Device the property belongs to.
+            prop: Updated Prop.
+        '''
+
+        if device is not self.model.selected_device:
+            return
+
+        self.prop_list.update_prop(prop)
+
+        selected_prop = self.model.selected_prop
+        if selected_prop is not None and selected_prop.id == prop.id:
+            self.model.selected_prop = prop
+
+    def hide_prop(self, device: Device, prop_id: int) -> None:
+        '''Remove a deleted property.
+
+        Args:
+            device: Device the property belonged to.
+            prop_id: Property ID.
+        '''
+
+        device.forget_prop(prop_id)
+
+        if device is self.model.selected_device:
+            self.prop_list.remove_prop(prop_id)
+
+    def cancel_tasks(self) -> None:
+        '''Cancel all background tasks.'''
+
+        self.tasks.cancel_all()
 
     def refresh_devices(self) -> None:
         '''Refresh devices.'''
 
-        self.model.refreshing = True
+        self.tasks.run(self.model.refresh_devices, self.show_devices,
+                       key='devices')
 
-        devices = self.model.refresh_devices()
-        self.device_list.refresh_devices(devices)
+    def show_devices(self, devices: List[Device]) -> None:
+        '''Show refreshed devices.
 
+        Args:
+            devices: List of Devices.
+        '''
+
+        selected = self.model.selected_device
+
+        self.prop_compare.set_devices(devices)
+
+        self.model.refreshing = True
+        self.device_list.refresh_devices(devices)
         self.model.refreshing = False
 
+        if selected is None:
+            return
+
+        if self.model.xinput.get_device_by_id(selected.id) is None:
+            self.model.selected_device = None
+            self.prop_list.clear_props()
+            return
+
+        # The device is kept with its properties unless it moved or was
+        # replaced, in which case they're loaded again
+        self.device_selected(selected.id)
+
     def device_selected(self, id_: int) -> None:
         '''Device was selected.
 
@@ -88,16 +359,35 @@ class ViewController:
             return
 
         self.model.set_selected_device(id_)
+        device = self.model.selected_device
+        if device is None:
+            return
 
-        self.device_list.show_device(self.model.selected_device)
-        self.prop_list.show_device_props(self.model.selected_device)
+        self.device_list.show_device(device)
+
+        if device.cached_props is not None:
+            self.prop_list.show_device_props(device)
+            return
+
+        self.prop_list.clear_props()
+        self.tasks.run(lambda: device.props,
+                       lambda _: self.show_props(device),
+                       key='props')
+
+    def show_props(self, device: Device) -> None:
+        '''Show device properties, if the device is still selected.
+
+        Args:
+            device: Device whose properties were loaded.
+        '''
+
+        if device is self.model.selected_device:
+            self.prop_list.show_device_props(device)
 
     def show_create_master_dialog(self) -> None:
         '''Show create master dialog.'''
 
-        res = self.dialog_create_master.show()
-        if res == Gtk.ResponseType.APPLY:
-            self.refresh_devices()
+        self.dialog_create_master.show()
 
     def create_master_device(self, new_master_name: str) -> None:
         '''Create a master device.
@@ -106,26 +396,34 @@ class ViewController:
             new_master_name: Name of new master device.
         '''
 
-        self.model.create_master_device(new_master_name)
+        self.tasks.run(lambda: self.model.create_master_device(new_master_name),
+                       lambda _: self.show_devices(self.model.xinput.devices),
+                       write=True)
 
     def remove_selected_master_device(self) -> None:
         '''Remove selected master device.'''
 
-        self.model.remove_selected_master_device()
-        self.refresh_devices()
+        device = self.model.selected_device
+
+        self.tasks.run(lambda: self.model.remove_master_device(device),
+                       lambda _: self.show_devices(self.model.xinput.devices),
+                       write=True)
 
     def show_reattach_dialog(self) -> None:
         '''Show float/reattach dialog.'''
 
         res = self.dialog_reattach.show(self.model.selected_device,
-                                        self.model.xinput.devices)
-        if res == Gtk.ResponseType.APPLY:
+                                        self.model.xinput.registry.masters)
+        # The watcher picks up the change by itself
+        if res == Gtk.ResponseType.APPLY and self.watcher is None:
             self.refresh_devices()
 
     def float_selected_device(self) -> None:
         '''Float selected device.'''
 
-        self.model.float_selected_device()
+        device = self.model.selected_device
+
+        self.tasks.run(lambda: self.model.float_device(device), write=True)
 
     def reattach_selected_device(self, master_id: int) -> None:
         '''Reattach selected device to given master device.
@@ -134,42 +432,46 @@ class ViewController:
             master_id: ID of master device to reattach selected device to.
         '''
 
-        self.model.reattach_selected_device(master_id)
+        device = self.model.selected_device
+
+        self.tasks.run(lambda: self.model.reattach_device(device, master_id), write=True)
 
     def show_device_info(self) -> None:
         '''Show selected device info.'''
 
-        self.dialog_device_info.show(self.model.selected_device)
+        device = self.model.selected_device
+
+        self.tasks.run(device.get_info,
+                       lambda info: self.dialog_device_info.show(device, info))
 
     def refresh_props(self) -> None:
         '''Refresh selected device properties.'''
 
-        self.model.selected_device.get_props()
-        self.prop_list.show_device_props(self.model.selected_device)
+        device = self.model.selected_device
+
+        self.tasks.run(device.get_props,
+                       lambda _: self.show_props(device),
+                       key='props')
 
-    def prop_selected(self, id_: int, name: str, val: str) -> None:
+    def prop_selected(self, id_: int) -> None:
         '''Set selected device property.
 
         Args:
             id_: Property ID.
-            name: Property name.
-            val: Property value.
         '''
 
-        self.model.set_selected_prop(id_, name, val)
-        self.prop_list.enable_edit_tool()
+        self.model.set_selected_prop(id_)
+        if self.model.selected_prop is not None:
+            self.prop_list.enable_edit_tool()
 
     def show_edit_dialog(self) -> None:
-        '''Show property edit dialog.
+        '''Show property edit dialog.'''
 
-        Args:
-            prop: Property being edited.
-        '''
+        if self.model.selected_prop is None:
+            return
 
-        res = self.dialog_edit.show(self.model.selected_device,
-                                    self.model.selected_prop)
-        if res == Gtk.ResponseType.APPLY:
-            self.refresh_props()
+        self.dialog_edit.show(self.model.selected_device,
+                              self.model.selected_prop)
 
     def set_prop(self, new_val: str) -> None:
         '''Set the value of the currently selected device property.
@@ -178,5 +480,226 @@ class ViewController:
             new_val: New value for the property.
         '''
 
-        self.model.set_selected_device_prop(new_val)
-        self.refresh_props()
+        device = self.model.selected_device
+        prop = self.model.selected_prop
+        if prop is None:
+            return
+
+        # Show the new value straight away, the readback corrects it
+        self.show_pending_val(prop, new_val)
+
+        self.tasks.run(lambda: self.model.set_device_prop(device, prop, new_val),
+                       lambda result: self.show_prop_result(device, result, prop),
+                       lambda error: self.set_prop_failed(device, prop, error),
+                       write=True)
+
+    def show_pending_val(self, prop: Prop, new_val: str) -> None:
+        '''Show a value that's being written in the property's row.
+
+        Args:
+            prop: Prop being written.
+            new_val: value being written, ignored if it isn't valid.
+        '''
+
+        try:
+            values = prop.parse(new_val)
+        except ValueError:
+            return
+
+        self.prop_list.update_prop(Prop(prop.id, prop.name, prop.type, prop.format, values))
+
+    def live_edit_prop(self, new_val: str) -> None:
+        '''Write a value of the selected property while it's being edited.
+
+        The row is updated straight away. Writes are coalesced, and the
+        property isn't read back until live_readback().
+
+        Args:
+            new_val: New value for the property.
+        '''
+
+        device = self.model.selected_device
+        prop = self.model.selected_prop
+        if prop is None:
+            return
+
+        self.live_prop = (device.id, prop.id)
+        self.show_pending_val(prop, new_val)
+        self.live_writer.write(lambda: device.write_prop(prop.id, new_val))
+
+    def live_readback(self) -> None:
+        '''Read back the selected property once live writes are done.'''
+
+        device = self.model.selected_device
+        prop = self.model.selected_prop
+        if prop is None:
+            return
+
+        def readback() -> None:
+            self.live_prop = None
+            self.tasks.run(lambda: device.update_prop(prop.id),
+                           lambda new_prop: self.show_prop(device, new_prop),
+                           key='readback')
+
+        self.live_writer.when_idle(readback)
+
+    def end_live_edit(self) -> None:
+        '''Stop live editing, dropping writes that haven't started.'''
+
+        self.live_writer.discard()
+        self.live_prop = None
+
+    def search_props(self, query: str) -> None:
+        '''Search the properties of all devices.
+
+        Results come from the property index, so typing never runs xinput.
+        The first search loads the properties of devices that haven't been
+        loaded yet, once, in the background.
+
+        Args:
+            query: words to look for.
+        '''
+
+        xinput = self.model.xinput
+
+        unindexed = [device for device in xinput.devices
+                     if not xinput.prop_index.indexed(device.id)]
+        indexing = self.indexing_task is not None and not self.indexing_task.cancelled
+        if query.strip() and unindexed and not indexing:
+            self.indexing_task = self.tasks.run(lambda: xinput.fetch_all_props(unindexed),
+                                                self.props_indexed,
+                                                lambda error: self.props_indexed([], error))
+        elif not indexing:
+            unindexed = []
+
+        self.prop_search.show_results(xinput.prop_index.search(query), xinput.registry,
+                                      len(unindexed))
+
+    def props_indexed(self,
+                      fetched: List[Tuple[Device, Exception]],
+                      error: Exception = None) -> None:
+        '''Properties of all devices were loaded for searching.
+
+        Args:
+            fetched: (Device, error) tuples from Xinput.fetch_all_props().
+            error: error raised while loading them, if any.
+        '''
+
+        self.indexing_task = None
+        if error is not None:
+            self.task_failed(error)
+
+        # Don't try devices that failed again on every search
+        for device, fetch_error in fetched:
+            if fetch_error is not None:
+                self.model.xinput.log_error('Unable to load properties of device {}: {}'.format(
+                    device.id, fetch_error))
+                self.model.xinput.prop_index.update(device.id, [])
+
+        self.search_props(self.prop_search.get_query())
+
+    def show_search_result(self, device_id: int, prop_id: int) -> None:
+        '''Show a search result in the editor.
+
+        Args:
+            device_id: ID of the device with the property.
+            prop_id: property ID.
+        '''
+
+        self.main_window.show_editor()
+        self.device_list.select_device(device_id)
+
+        device = self.model.selected_device
+        if device is not None and device.id == device_id and device.cached_props is not None:
+            self.prop_list.select_prop(prop_id)
+
+    def compare_devices(self, ids: List[int]) -> None:
+        '''Compare the properties of some devices.
+
+        Devices whose properties aren't cached are fetched together, once
+        each, and the comparison is built in the background.
+
+        Args:
+            ids: IDs of the devices to compare.
+        '''
+
+        xinput = self.model.xinput
+        devices = [device for device in map(xinput.get_device_by_id, ids) if device is not None]
+
+        def compare() -> List:
+            missing = [device for device in devices if device.cached_props is None]
+            for device, error in xinput.fetch_all_props(missing):
+                if error is not None:
+                    xinput.log_error('Unable to load properties of device {}: {}'.format(
+                        device.id, error))
+
+            return compare_props(devices)
+
+        self.tasks.run(compare,
+                       lambda rows: self.prop_compare.show_comparison(devices, rows),
+                       key='compare')
+
+    def get_profile_names(self) -> List[str]:
+        '''Get the names of saved profiles.
+
+        Returns:
+            List of profile names, empty if they can't be loaded.
+        '''
+
+        try:
+            return list(load_profiles())
+        except ProfileError as err:
+            self.model.xinput.log_error(str(err))
+            return []
+
+    def apply_profile(self, name: str) -> None:
+        '''Apply a profile.
+
+        Args:
+            name: Profile name.
+        '''
+
+        self.tasks.run(lambda: self.model.apply_profile(name), self.profile_applied, write=True)
+
+    def profile_applied(self, report: ProfileReport) -> None:
+        '''Show the selected device's properties after applying a profile.
+
+        The profile may have invalidated them, in which case they're loaded
+        again in the background.
+
+        Args:
+            report: ProfileReport.
+        '''
+
+        # Selection may have changed while the profile was applied
+        device = self.model.selected_device
+        if device is not None:
+            self.device_selected(device.id)
+
+    def show_prop_result(self, device: Device, result: PropResult, old_prop: Prop) -> None:
+        '''Show the outcome of setting a property.
+
+        Args:
+            device: Device the property belongs to.
+            result: PropResult.
+            old_prop: Prop before it was set, shown again if the property
+                couldn't be read back.
+        '''
+
+        if result.error is not None:
+            self.model.xinput.log_error('Unable to set property {} of device {}: {}'.format(
+                result.prop_id, device.id, result.error))
+
+        self.show_prop(device, old_prop if result.prop is None else result.prop)
+
+    def set_prop_failed(self, device: Device, old_prop: Prop, error: Exception) -> None:
+        '''Setting a property raised. Show its old value again.
+
+        Args:
+            device: Device the property belongs to.
+            old_prop: Prop before it was set.
+            error: Error raised.
+        '''
+
+        self.task_failed(error)
+        self.show_prop(device, old_prop)
@@ -19,8 +19,11 @@
 '''App view model.'''
 
 from typing import TYPE_CHECKING, List
+import time
 
-from .xinput.devices import Device, Prop
+from .xinput import profiles
+from .xinput.devices import Device, Prop, PropResult
+from .xinput.profiles import ProfileReport
 from .xinput.xinput import Xinput
 
 if TYPE_CHECKING:
@@ -56,16 +59,14 @@ class ViewModel:
 
         self.selected_device = self.xinput.get_device_by_id(id_)
 
-    def set_selected_prop(self, id_: int, name: str, val: str) -> None:
-        '''Set selected device property.
+    def set_selected_prop(self, id_: int) -> None:
+        '''Set selected device property by ID.'''
 
-        Args:
-            id_: Property ID.
-            name: Property name.
-            val: Property value.
-        '''
-
-        self.selected_prop = Prop(id_, name, val)
+        self.selected_prop = None
+        for prop in self.selected_device.cached_props or []:
+            if prop.id == id_:
+                self.selected_prop = prop
+                break
 
     def create_master_device(self, new_master_name: str) -> None:
         '''Create a master device.
@@ -76,30 +77,67 @@ class ViewModel:
 
         self.xinput.create_master_device(new_master_name)
 
-    def remove_selected_master_device(self) -> None:
-        '''Remove selected master device.'''
+    def remove_master_device(self, device: Device) -> None:
+        '''Remove a master device.
+
+        Args:
+            device: Master device to remove.
+        '''
+
+        self.xinput.remove_master_device(device)
 
-        self.xinput.remove_master_device(self.selected_device)
+    def float_device(self, device: Device) -> None:
+        '''Float a slave device.
 
-    def float_selected_device(self) -> None:
-        '''Float selected device.'''
+        Args:
+            device: Device to float.
+        '''
 
-        self.selected_device.float()
+        device.float()
 
-    def reattach_selected_device(self, master_id: int) -> None:
-        '''Reattach selected device to given master device.
+    def reattach_device(self, device: Device, master_id: int) -> None:
+        '''Reattach a slave device to given master device.
 
         Args:
-            master_id: ID of master device to reattach selected device to.
+            device: Device to reattach.
+            master_id: ID of master device to reattach device to.
         '''
 
-        self.selected_device.reattach(master_id)
+        device.reattach(master_id)
 
-    def set_selected_device_prop(self, new_val: str) -> None:
-        '''Set selected device property.
+    def set_device_prop(self, device: Device, prop: Prop, new_val: str) -> PropResult:
+        '''Set a device property and read it back.
 
         Args:
+            device: Device to change.
+            prop: Property to change.
             new_val: New value for the property.
+
+        Returns:
+            PropResult.
         '''
 
-        self.selected_device.set_prop(self.selected_prop.id, new_val)
+        return device.set_props([(prop.id, new_val)])[0]
+
+    def apply_profile(self, name: str) -> ProfileReport:
+        '''Apply a profile and log what it changed.
+
+        Args:
+            name: Profile name.
+
+        Returns:
+            ProfileReport.
+        '''
+
+        profile = profiles.load_profiles().get(name)
+        if profile is None:
+            raise profiles.ProfileError('No profile named "{}"'.format(name))
+
+        start = time.time()
+        report = profiles.apply_profile(self.xinput, profile)
+        self.xinput.log_command(['apply-profile', name],
+                                profiles.format_report(report),
+                                start=start,
+                                wall_time=report.elapsed)
+
+        return report
@@ -0,0 +1,354 @@
+# backend.py - xinput backends
+# Copyright (C) 2019  Ivan Fonseca
+#
+# This file is part of xinput-gui.
+#
+# xinput-gui is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the # License,
+# or (at your option) any later version.
+#
+# xinput-gui is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with xinput-gui.  If not, see <https://www.gnu.org/licenses/>.
+
+'''xinput backends.
+
+A backend performs the actual device operations. The subprocess backend runs
+the xinput command and parses its output, the native backend (see xi2.py)
+talks to the X server directly through libXi.
+'''
+
+from typing import TYPE_CHECKING, Any, Callable, List, Tuple
+
+from .events import EventWatcher, TestXi2EventWatcher
+from .parser import DeviceEntry, PropEntry, parse_device_list, parse_props, split_values
+
+if TYPE_CHECKING:
+    from .xinput import Xinput
+
+
+BACKEND_SUBPROCESS = 'subprocess'
+BACKEND_NATIVE = 'native'
+
+
+class XinputError(Exception):
+    '''An xinput operation failed.'''
+
+
+class Backend:
+    '''Base class for xinput backends.'''
+
+    name = None
+
+    def __init__(self, xinput: 'Xinput') -> None:
+        '''Init Backend.
+
+        Args:
+            xinput: Xinput wrapper using this backend.
+        '''
+
+        self.xinput = xinput
+
+    def close(self) -> None:
+        '''Release any resources held by the backend.'''
+
+    def list_devices(self) -> List[DeviceEntry]:
+        '''List all devices.
+
+        Returns:
+            List of DeviceEntries, masters followed by their slaves, floating
+            devices last.
+        '''
+
+        raise NotImplementedError
+
+    def get_device(self, device_id: int) -> DeviceEntry:
+        '''Get a single device.
+
+        Args:
+            device_id: xinput device ID.
+
+        Returns:
+            DeviceEntry.
+
+        Raises:
+            XinputError: if the device doesn't exist.
+        '''
+
+        raise NotImplementedError
+
+    def list_props(self, device_id: int) -> List[PropEntry]:
+        '''List device properties.
+
+        Args:
+            device_id: xinput device ID.
+
+        Returns:
+            List of PropEntries.
+        '''
+
+        raise NotImplementedError
+
+    def get_prop(self, device_id: int, prop_id: int) -> PropEntry:
+        '''Get a single device property.
+
+        By default all properties are listed and the one asked for is picked
+        out, backends that can read a single property override this.
+
+        Args:
+            device_id: xinput device ID.
+            prop_id: property ID.
+
+        Returns:
+            PropEntry.
+
+        Raises:
+            XinputError: if the device doesn't have the property.
+        '''
+
+        for prop in self.list_props(device_id):
+            if prop.id == prop_id:
+                return prop
+
+        raise XinputError('Device {} has no property {}'.format(device_id, prop_id))
+
+    def get_props(self, device_id: int, prop_ids: List[int]) -> List[PropEntry]:
+        '''Get some device properties.
+
+        By default all properties are listed once and the ones asked for are
+        picked out.
+
+        Args:
+            device_id: xinput device ID.
+            prop_ids: IDs of properties to get.
+
+        Returns:
+            List of PropEntries, for the properties the device has.
+        '''
+
+        return [prop for prop in self.list_props(device_id) if prop.id in prop_ids]
+
+    def set_prop(self, device_id: int, prop_id: int, prop_val: str) -> None:
+        '''Set a device property.
+
+        Args:
+            device_id: xinput device ID.
+            prop_id: ID of property to change.
+            prop_val: new property value, as displayed by list-props.
+
+        Raises:
+            XinputError: if the property couldn't be set.
+        '''
+
+        raise NotImplementedError
+
+    def set_props(self, device_id: int, props: List[Tuple[int, str]]) -> List[str]:
+        '''Set several device properties.
+
+        Every property is attempted, even if an earlier one fails.
+
+        Args:
+            device_id: xinput device ID.
+            props: list of (property ID, new value) tuples.
+
+        Returns:
+            List of error messages in the same order as props, None for each
+            property that was set.
+        '''
+
+        errors = []
+        for prop_id, prop_val in props:
+            try:
+                self.set_prop(device_id, prop_id, prop_val)
+                errors.append(None)
+            except (XinputError, ValueError) as err:
+                errors.append(str(err))
+
+        return errors
+
+    def float(self, device_id: int) -> None:
+        '''Float a slave device.
+
+        Args:
+            device_id: xinput device ID.
+        '''
+
+        raise NotImplementedError
+
+    def reattach(self, device_id: int, master_id: int) -> None:
+        '''Reattach a slave device to a master.
+
+        Args:
+            device_id: xinput device ID.
+            master_id: ID of master device to reattach to.
+        '''
+
+        raise NotImplementedError
+
+    def create_master(self, name: str) -> None:
+        '''Create a master device.
+
+        Args:
+            name: new device name.
+        '''
+
+        raise NotImplementedError
+
+    def remove_master(self, device_id: int) -> None:
+        '''Remove a master device.
+
+        Args:
+            device_id: xinput master device ID.
+        '''
+
+        raise NotImplementedError
+
+    def get_info(self, device_id: int) -> str:
+        '''Get device info.
+
+        Args:
+            device_id: xinput device ID.
+
+        Returns:
+            Device info, as printed by `xinput list`.
+        '''
+
+        raise NotImplementedError
+
+    def create_watcher(self, callback: Callable[[Any], None]) -> EventWatcher:
+        '''Create a watcher for device events.
+
+        Args:
+            callback: called with each event, on the watcher's thread.
+
+        Returns:
+            EventWatcher, not yet started.
+        '''
+
+        raise NotImplementedError
+
+
+class SubprocessBackend(Backend):
+    '''Backend that runs the xinput command.'''
+
+    name = BACKEND_SUBPROCESS
+
+    def list_devices(self) -> List[DeviceEntry]:
+        '''List all devices.'''
+
+        cmd_out = self.xinput.run_command(['xinput', 'list', '--short'])
+        return parse_device_list(cmd_out)
+
+    def get_device(self, device_id: int) -> DeviceEntry:
+        '''Get a single device.'''
+
+        cmd_out = self.xinput.run_command(
+            ['xinput', 'list', '--short', str(device_id)])
+        entries = parse_device_list(cmd_out)
+        if not entries:
+            raise XinputError('Unable to find device {}'.format(device_id))
+
+        return entries[0]
+
+    def list_props(self, device_id: int) -> List[PropEntry]:
+        '''List device properties.'''
+
+        cmd_out = self.xinput.run_command(
+            ['xinput', 'list-props', str(device_id)])
+        if not cmd_out:
+            raise XinputError('Unable to list properties of device {}'.format(device_id))
+
+        return parse_props(cmd_out)
+
+    def set_prop(self, device_id: int, prop_id: int, prop_val: str) -> None:
+        '''Set a device property.'''
+
+        error = self.set_props(device_id, [(prop_id, prop_val)])[0]
+        if error is not None:
+            raise XinputError('Unable to set property {} of device {}: {}'.format(
+                prop_id, device_id, error))
+
+    def set_props(self, device_id: int, props: List[Tuple[int, str]]) -> List[str]:
+        '''Set several device properties, in one batch of commands.'''
+
+        procs = self.xinput.run_commands(
+            [set_prop_command(device_id, prop_id, prop_val) for prop_id, prop_val in props])
+
+        errors = []
+        for proc in procs:
+            if proc.returncode == 0:
+                errors.append(None)
+            else:
+                error = proc.stderr.decode('utf-8', 'replace').strip()
+                errors.append(error or 'xinput exited with status {}'.format(proc.returncode))
+
+        return errors
+
+    def float(self, device_id: int) -> None:
+        '''Float a slave device.'''
+
+        self.xinput.run_command(['xinput', 'float', str(device_id)])
+
+    def reattach(self, device_id: int, master_id: int) -> None:
+        '''Reattach a slave device to a master.'''
+
+        self.xinput.run_command(
+            ['xinput', 'reattach', str(device_id), str(master_id)])
+
+    def create_master(self, name: str) -> None:
+        '''Create a master device.'''
+
+        self.xinput.run_command(['xinput', 'create-master', name])
+
+    def remove_master(self, device_id: int) -> None:
+        '''Remove a master device.'''
+
+        self.xinput.run_command(['xinput', 'remove-master', str(device_id)])
+
+    def get_info(self, device_id: int) -> str:
+        '''Get device info.'''
+
+        return self.xinput.run_command(['xinput', 'list', str(device_id)])
+
+    def create_watcher(self, callback: Callable[[Any], None]) -> EventWatcher:
+        '''Create a watcher that reads xinput test-xi2.'''
+
+        return TestXi2EventWatcher(callback)
+
+
+def set_prop_command(device_id: int, prop_id: int, prop_val: str) -> List[str]:
+    '''Get the xinput command that sets a property.'''
+
+    cmd = ['xinput', 'set-prop', str(device_id), str(prop_id)]
+    cmd.extend(split_values(prop_val))
+    return cmd
+
+
+def create_backend(name: str, xinput: 'Xinput') -> Backend:
+    '''Create a backend by name.
+
+    Args:
+        name: backend name, BACKEND_SUBPROCESS or BACKEND_NATIVE.
+        xinput: Xinput wrapper using the backend.
+
+    Returns:
+        The new backend.
+
+    Raises:
+        XinputError: if the backend is unknown or can't be used.
+    '''
+
+    if name == BACKEND_SUBPROCESS:
+        return SubprocessBackend(xinput)
+
+    if name == BACKEND_NATIVE:
+        # Only load libXi bindings when they're asked for
+        from .xi2 import NativeBackend
+        return NativeBackend(xinput)
+
+    raise XinputError('Unknown backend "{}"'.format(name))
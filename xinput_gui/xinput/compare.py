@@ -0,0 +1,62 @@
+# compare.py - device property comparison
+# Copyright (C) 2019  Ivan Fonseca
+#
+# This file is part of xinput-gui.
+#
+# xinput-gui is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the # License,
+# or (at your option) any later version.
+#
+# xinput-gui is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with xinput-gui.  If not, see <https://www.gnu.org/licenses/>.
+
+'''Device property comparison.'''
+
+from collections import OrderedDict, namedtuple
+from typing import List
+
+from .devices import Device
+from .parser import values_match
+
+
+# A property compared across devices.
+#   name: property name.
+#   props: list with the device's Prop for each compared device, None where
+#       a device doesn't have the property.
+#   differs: if any device's value differs from the others, or a device
+#       doesn't have the property.
+ComparisonRow = namedtuple('ComparisonRow', ['name', 'props', 'differs'])
+
+
+def compare_props(devices: List[Device]) -> List[ComparisonRow]:
+    '''Compare the properties of several devices.
+
+    Properties are matched by name. Devices' cached properties are used, so
+    they should be loaded first, e.g. with Xinput.fetch_all_props().
+
+    Args:
+        devices: Devices to compare.
+
+    Returns:
+        List of ComparisonRows, in the order properties first appear.
+    '''
+
+    by_name = OrderedDict()
+    for column, device in enumerate(devices):
+        for prop in device.cached_props or []:
+            by_name.setdefault(prop.name, [None] * len(devices))[column] = prop
+
+    rows = []
+    for name, props in by_name.items():
+        first = props[0]
+        differs = any(prop is None or first is None or not values_match(first.values, prop.values)
+                      for prop in props[1:])
+        rows.append(ComparisonRow(name, props, differs))
+
+    return rows
@@ -18,9 +18,13 @@
 
 '''xinput device classes.'''
 
+from collections import namedtuple
 from enum import Enum
-from typing import TYPE_CHECKING
-import re
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Tuple
+
+from .backend import XinputError
+from .parser import (PropEntry, PropType, format_set_values, format_values, parse_input,
+                     values_match)
 
 if TYPE_CHECKING:
     from .xinput import Xinput
@@ -35,31 +39,111 @@ class DeviceType(Enum):
 
 
 class Prop:
-    '''An xinput device property.'''
+    '''An xinput device property.
+
+    Values are kept parsed. They're only formatted as text for display and
+    when they're written.
+    '''
+
+    # Devices can have dozens of properties, keep them small
+    __slots__ = ('id', 'name', 'type', 'format', 'values', 'cached_val')
 
-    def __init__(self, id_: int, name: str, val: str) -> None:
+    def __init__(self,
+                 id_: int,
+                 name: str,
+                 type_: PropType,
+                 format_: int,
+                 values: List) -> None:
         '''Init Prop.
 
         Args:
             id_: property ID.
             name: property name.
-            val: property value.
+            type_: PropType, None if unknown.
+            format_: 8, 16 or 32, None if unknown.
+            values: list of values.
         '''
 
         self.id = id_
         self.name = name
-        self.val = val
+        self.type = type_
+        self.format = format_
+        self.values = values
+
+        self.cached_val = None
+
+    @property
+    def val(self) -> str:
+        '''Property value, formatted the way list-props prints it.'''
+
+        if self.cached_val is None:
+            self.cached_val = format_values(self.type, self.values)
+
+        return self.cached_val
+
+    def parse(self, text: str) -> List:
+        '''Parse a new value for the property.
+
+        Args:
+            text: value, e.g. '1, 0.5'.
+
+        Returns:
+            List of values, of the property's type.
+
+        Raises:
+            ValueError: if a value isn't valid for the type.
+        '''
+
+        return parse_input(self.type, text)
+
+    def matches(self, values: List) -> bool:
+        '''Check if the property has the given values.
+
+        Args:
+            values: list of values, as returned by parse().
+        '''
+
+        return values_match(self.values, values)
+
+    def write_value(self, values: List = None) -> str:
+        '''Format values for writing to the property.
+
+        Args:
+            values: list of values, the property's own by default.
+
+        Returns:
+            Value text, as accepted by Device.set_props().
+        '''
+
+        if values is None:
+            values = self.values
+
+        args = format_set_values(self.type, values)
+        return ', '.join('"{}"'.format(arg) if ' ' in arg or ',' in arg else arg
+                         for arg in args)
+
+
+# Outcome of setting a property as part of a batch.
+#   prop_id: property ID.
+#   prop: Prop as read back after the batch, None if it couldn't be read.
+#   error: error message, None if the property was set.
+#   rolled_back: if the property was set, but put back to its previous value
+#       because another property in the batch failed.
+PropResult = namedtuple('PropResult', ['prop_id', 'prop', 'error', 'rolled_back'])
 
 
 class Device:
     '''An xinput device.'''
 
+    __slots__ = ('xinput', 'id', 'name', 'type', 'master', 'attachment', 'cached_props')
+
     def __init__(self,
                  xinput: 'Xinput',
                  id_: int,
                  name: str,
                  type_: DeviceType,
-                 master: bool) -> None:
+                 master: bool,
+                 attachment: int = None) -> None:
         '''Init Device.
 
         Args:
@@ -67,47 +151,201 @@ class Device:
             name: xinput device name.
             type_: xinput device type.
             master: if device is master.
+            attachment: ID of the paired master device for masters, or of the
+                master device for attached slaves. None if floating.
         '''
 
         self.xinput = xinput
-        self.id = id_
+        self.id = int(id_)
         self.name = name
         self.type = type_
         self.master = master
+        self.attachment = attachment
+
+        # Properties are only loaded once they're needed
+        self.cached_props = None
 
-        self.props = []
+    @property
+    def props(self) -> List[Prop]:
+        '''Device properties, loaded on first access.'''
 
-        self.get_props()
+        if self.cached_props is None:
+            self.get_props()
+
+        return self.cached_props
 
     def get_props(self) -> None:
-        '''Get device properties.'''
+        '''Get device properties, replacing any cached ones.'''
+
+        self.cache_props([prop_from_entry(entry)
+                          for entry in self.xinput.backend.list_props(self.id)])
+
+    def cache_props(self, props: List[Prop]) -> None:
+        '''Replace the cached properties, and index them for searching.
+
+        Args:
+            props: list of Props.
+        '''
+
+        self.cached_props = props
+        self.xinput.prop_index.update(self.id, props)
+
+    def update_prop(self, prop_id: int) -> Prop:
+        '''Read a single property again and update it in the cache.
+
+        Args:
+            prop_id: property ID.
+
+        Returns:
+            Updated Prop.
+        '''
+
+        entry = self.xinput.backend.get_prop(self.id, prop_id)
+        prop = prop_from_entry(entry)
+
+        # Replace the list rather than changing it, it may be shown on
+        # another thread
+        if self.cached_props is not None:
+            props = [prop if cached.id == prop_id else cached
+                     for cached in self.cached_props]
+            if all(cached.id != prop_id for cached in self.cached_props):
+                props.append(prop)
+            self.cache_props(props)
+
+        return prop
+
+    def forget_prop(self, prop_id: int) -> None:
+        '''Remove a deleted property from the cache.
+
+        Args:
+            prop_id: property ID.
+        '''
+
+        if self.cached_props is not None:
+            self.cache_props([prop for prop in self.cached_props if prop.id != prop_id])
+
+    def invalidate_props(self) -> None:
+        '''Forget cached properties, so they're reloaded on next access.
+
+        They're dropped from the search index too, so it doesn't serve
+        values that may be out of date.
+        '''
+
+        self.cached_props = None
+        self.xinput.prop_index.forget(self.id)
+
+    def move(self, type_: DeviceType, master: bool, attachment: int) -> bool:
+        '''Update where the device is in the hierarchy.
+
+        Properties are forgotten only if it actually moved, since they can
+        change along with the device's master.
+
+        Args:
+            type_: xinput device type.
+            master: if device is master.
+            attachment: as in __init__().
 
-        self.props.clear()
+        Returns:
+            If the device moved.
+        '''
 
-        props_cmd = 'xinput list-props {}'.format(self.id)
-        props_out = self.xinput.run_command(props_cmd)
-        props_out = props_out.splitlines()
-        props_out.pop(0)
-        props_out = list(map(lambda x: x.replace('\t', ''), props_out))
+        if (type_, master, attachment) == (self.type, self.master, self.attachment):
+            return False
 
-        for prop in props_out:
-            matches = re.search(r'^(.+) \((\d+)\):(.+)$', prop)
-            self.props.append(Prop(
-                matches.group(2).strip(),
-                matches.group(1).strip(),
-                matches.group(3).strip(),
-            ))
+        self.type = type_
+        self.master = master
+        self.attachment = attachment
+        self.invalidate_props()
+
+        return True
 
     def set_prop(self, prop_id: int, prop_val: str) -> None:
         '''Set a device property.
 
+        Goes through set_props(), so the property is read back into the cache
+        the same way.
+
         Args:
             prop_id: ID of property to change.
             prop_val: new property value.
+
+        Raises:
+            XinputError: if the property couldn't be set.
         '''
 
-        cmd = 'xinput set-prop {} {} {}'.format(self.id, prop_id, prop_val)
-        self.xinput.run_command(cmd)
+        result, = self.set_props([(prop_id, prop_val)], rollback=False)
+        if result.error is not None:
+            raise XinputError(result.error)
+
+    def write_prop(self, prop_id: int, prop_val: str) -> None:
+        '''Set a property without reading it back.
+
+        For live edits, which write many values in a row. The cached property
+        keeps its old value until it's read back with update_prop().
+
+        Args:
+            prop_id: ID of property to change.
+            prop_val: new property value.
+        '''
+
+        self.xinput.note_writes(self.id, [prop_id])
+        self.xinput.backend.set_prop(self.id, prop_id, prop_val)
+
+    def set_props(self,
+                  props: List[Tuple[int, str]],
+                  rollback: bool = True) -> List[PropResult]:
+        '''Set several properties at once.
+
+        The writes are handed to the backend as one batch, then only the
+        touched properties are read back and updated in the cache.
+
+        Args:
+            props: list of (property ID, new value) tuples.
+            rollback: if any write fails, put the properties that were set
+                back to their previous values.
+
+        Returns:
+            List of PropResults, in the same order as props.
+        '''
+
+        backend = self.xinput.backend
+        prop_ids = [prop_id for prop_id, _ in props]
+
+        # Previous values, for rolling back
+        old_vals = {}
+        if rollback:
+            for prop in self.cached_props or []:
+                if prop.id in prop_ids:
+                    old_vals[prop.id] = prop.write_value()
+
+            missing = [prop_id for prop_id in prop_ids if prop_id not in old_vals]
+            if missing:
+                for entry in backend.get_props(self.id, missing):
+                    old_vals[entry.id] = prop_from_entry(entry).write_value()
+
+        self.xinput.note_writes(self.id, prop_ids)
+        errors = backend.set_props(self.id, props)
+
+        rolled_back = set()
+        if rollback and any(error is not None for error in errors):
+            restore = [(prop_id, old_vals[prop_id])
+                       for prop_id, error in zip(prop_ids, errors)
+                       if error is None and prop_id in old_vals]
+            self.xinput.note_writes(self.id, [prop_id for prop_id, _ in restore])
+            restore_errors = backend.set_props(self.id, restore)
+            rolled_back = {prop_id for (prop_id, _), error in zip(restore, restore_errors)
+                           if error is None}
+
+        new_props = {entry.id: prop_from_entry(entry)
+                     for entry in backend.get_props(self.id, prop_ids)}
+
+        # Replace the list rather than changing it, it may be shown on
+        # another thread
+        if self.cached_props is not None:
+            self.cache_props([new_props.get(prop.id, prop) for prop in self.cached_props])
+
+        return [PropResult(prop_id, new_props.get(prop_id), error, prop_id in rolled_back)
+                for prop_id, error in zip(prop_ids, errors)]
 
     def float(self) -> None:
         '''Float slave device.'''
@@ -115,8 +353,8 @@ class Device:
         if self.master:
             return
 
-        cmd = 'xinput float {}'.format(self.id)
-        self.xinput.run_command(cmd)
+        self.invalidate_props()
+        self.xinput.backend.float(self.id)
 
     def reattach(self, master_id: int) -> None:
         '''Reattach device to master.
@@ -128,8 +366,8 @@ class Device:
         if self.master:
             return
 
-        cmd = 'xinput reattach {} {}'.format(self.id, master_id)
-        self.xinput.run_command(cmd)
+        self.invalidate_props()
+        self.xinput.backend.reattach(self.id, master_id)
 
     def get_info(self) -> str:
         '''Get device info.
@@ -138,7 +376,106 @@ class Device:
             Device info.
         '''
 
-        cmd = 'xinput list {}'.format(self.id)
-        cmd_out = self.xinput.run_command(cmd)
+        return self.xinput.backend.get_info(self.id)
+
+
+class DeviceRegistry:
+    '''A device list, indexed by ID, by name and by master.
+
+    Registries are never changed once built. When devices change a new one
+    is built, so readers on other threads never see it half updated.
+    '''
+
+    __slots__ = ('devices', 'by_id', 'by_name', 'masters', 'slaves')
+
+    def __init__(self, devices: Iterable[Device] = ()) -> None:
+        '''Init DeviceRegistry.
+
+        Args:
+            devices: Devices, in the order they're listed.
+        '''
+
+        self.devices = list(devices)
+        self.by_id = {}
+        self.by_name = {}
+        self.masters = []
+        self.slaves = {}
+
+        for device in self.devices:
+            self.by_id[device.id] = device
+            self.by_name.setdefault(device.name, []).append(device)
+
+            if device.master:
+                self.masters.append(device)
+            elif device.type != DeviceType.FLOATING:
+                self.slaves.setdefault(device.attachment, []).append(device)
+
+    def __iter__(self) -> Iterator[Device]:
+        return iter(self.devices)
+
+    def __len__(self) -> int:
+        return len(self.devices)
+
+    def get(self, id_: int) -> Device:
+        '''Get a device by ID.
+
+        Returns:
+            Device, or None if there's no such device.
+        '''
+
+        return self.by_id.get(id_)
+
+    def get_by_name(self, name: str) -> List[Device]:
+        '''Get the devices with a name. Several devices can share a name.
+
+        Returns:
+            List of Devices, empty if there are none.
+        '''
+
+        return self.by_name.get(name, [])
+
+    def get_slaves(self, master_id: int) -> List[Device]:
+        '''Get the slave devices attached to a master.
+
+        Returns:
+            List of Devices, empty if there are none.
+        '''
+
+        return self.slaves.get(master_id, [])
+
+
+def prop_from_entry(entry: PropEntry) -> Prop:
+    '''Get a Prop from a backend's PropEntry.'''
+
+    return Prop(entry.id, entry.name, entry.type, entry.format, entry.values)
+
+
+def sort_devices(devices: List[Device]) -> List[Device]:
+    '''Sort devices the way xinput lists them.
+
+    Args:
+        devices: List of Devices.
+
+    Returns:
+        New list with each master followed by its slaves, then floating
+        devices.
+    '''
+
+    masters = [device for device in devices if device.master]
+    floating = [device for device in devices if device.type == DeviceType.FLOATING]
+
+    slaves = {}
+    for device in devices:
+        if not device.master and device.type != DeviceType.FLOATING:
+            slaves.setdefault(device.attachment, []).append(device)
+
+    sorted_devices = []
+    for master in masters:
+        sorted_devices.append(master)
+        sorted_devices.extend(slaves.pop(master.id, []))
+
+    # Slaves of a master we don't know about yet, so they aren't lost
+    for orphans in slaves.values():
+        sorted_devices.extend(orphans)
 
-        return cmd_out
+    return sorted_devices + floating
@@ -0,0 +1,286 @@
+# events.py - xinput event watchers
+# Copyright (C) 2019  Ivan Fonseca
+#
+# This file is part of xinput-gui.
+#
+# xinput-gui is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the # License,
+# or (at your option) any later version.
+#
+# xinput-gui is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with xinput-gui.  If not, see <https://www.gnu.org/licenses/>.
+
+'''xinput event watchers.
+
+Watchers report changes made to devices by anyone, as they happen, so the
+device list doesn't have to be refreshed by hand. Each backend has its own
+watcher: the native backend selects XI2 events on its own connection (see
+xi2.py), the subprocess backend reads the output of `xinput test-xi2 --root`.
+'''
+
+from collections import namedtuple
+from typing import Any, Callable, List
+import re
+import shutil
+import subprocess
+import threading
+
+
+# Hierarchy change flags, as in XI2
+MASTER_ADDED = 1 << 0
+MASTER_REMOVED = 1 << 1
+SLAVE_ADDED = 1 << 2
+SLAVE_REMOVED = 1 << 3
+SLAVE_ATTACHED = 1 << 4
+SLAVE_DETACHED = 1 << 5
+DEVICE_ENABLED = 1 << 6
+DEVICE_DISABLED = 1 << 7
+
+ADDED = MASTER_ADDED | SLAVE_ADDED
+REMOVED = MASTER_REMOVED | SLAVE_REMOVED
+# Changes that affect the device list
+HIERARCHY_CHANGES = ADDED | REMOVED | SLAVE_ATTACHED | SLAVE_DETACHED
+
+# What happened to a property, as in XI2
+PROPERTY_DELETED = 0
+PROPERTY_CREATED = 1
+PROPERTY_MODIFIED = 2
+
+# A device's place in the hierarchy after a change.
+#   id: device ID.
+#   role, kind, attachment: as in DeviceEntry.
+#   flags: hierarchy change flags.
+HierarchyInfo = namedtuple('HierarchyInfo',
+                           ['id', 'role', 'kind', 'attachment', 'flags'])
+
+# The device hierarchy changed.
+#   infos: list of HierarchyInfos for devices that changed.
+HierarchyEvent = namedtuple('HierarchyEvent', ['infos'])
+
+# A device property was created, deleted or modified.
+#   device_id: device ID, None if the watcher can't tell which device.
+#   prop_id: property ID.
+#   what: PROPERTY_DELETED, PROPERTY_CREATED or PROPERTY_MODIFIED.
+PropertyEvent = namedtuple('PropertyEvent', ['device_id', 'prop_id', 'what'])
+
+
+class EventWatcher:
+    '''Base class for event watchers.'''
+
+    def __init__(self, callback: Callable[[Any], None]) -> None:
+        '''Init EventWatcher.
+
+        Args:
+            callback: called with each event, on the watcher's thread.
+        '''
+
+        self.callback = callback
+
+    def start(self) -> None:
+        '''Start watching for events.'''
+
+        raise NotImplementedError
+
+    def stop(self) -> None:
+        '''Stop watching for events.'''
+
+        raise NotImplementedError
+
+
+# Lines from `xinput test-xi2` output
+TEST_XI2_EVENT_RE = re.compile(r'^EVENT type (\d+) \((\w+)\)')
+TEST_XI2_DEVICE_RE = re.compile(
+    r'^\s+device (\d+) \[(master|slave|floating) (pointer|keyboard|slave) \((\d+)\)\]')
+TEST_XI2_CHANGES_RE = re.compile(r'^\s+changes:(.*)$')
+TEST_XI2_PROP_DEVICE_RE = re.compile(r'^\s+device: (\d+)')
+TEST_XI2_PROPERTY_RE = re.compile(r"^\s+property: (\d+) '")
+TEST_XI2_CHANGED_RE = re.compile(r'^\s+changed: (\w+)')
+
+TEST_XI2_FLAGS = {
+    '[new master]': MASTER_ADDED,
+    '[master removed]': MASTER_REMOVED,
+    '[new slave]': SLAVE_ADDED,
+    '[slave removed]': SLAVE_REMOVED,
+    '[slave attached]': SLAVE_ATTACHED,
+    '[slave detached]': SLAVE_DETACHED,
+    '[device enabled]': DEVICE_ENABLED,
+    '[device disabled]': DEVICE_DISABLED,
+}
+
+TEST_XI2_PROPERTY_CHANGES = {
+    'deleted': PROPERTY_DELETED,
+    'created': PROPERTY_CREATED,
+    'modified': PROPERTY_MODIFIED,
+}
+
+
+class TestXi2Parser:
+    '''Incremental parser for `xinput test-xi2` output.'''
+
+    def __init__(self) -> None:
+        '''Init TestXi2Parser.'''
+
+        # Type of the event being parsed
+        self.event_type = None
+        self.infos = []
+        # Fields of the PropertyEvent being parsed
+        self.prop_fields = {}
+
+    def feed(self, line: str) -> List[Any]:
+        '''Parse a line of output.
+
+        Args:
+            line: output line.
+
+        Returns:
+            List of events completed by this line.
+        '''
+
+        # Events are separated by blank lines
+        if not line.strip():
+            return self.flush()
+
+        matches = TEST_XI2_EVENT_RE.match(line)
+        if matches is not None:
+            events = self.flush()
+            self.event_type = matches.group(2)
+            return events
+
+        if self.event_type == 'HierarchyChanged':
+            self.feed_hierarchy(line)
+        elif self.event_type == 'PropertyEvent':
+            self.feed_property(line)
+
+        return []
+
+    def feed_hierarchy(self, line: str) -> None:
+        '''Parse a line of a HierarchyChanged event.'''
+
+        matches = TEST_XI2_DEVICE_RE.match(line)
+        if matches is not None:
+            role = matches.group(2)
+            floating = role == 'floating'
+            self.infos.append(HierarchyInfo(
+                int(matches.group(1)),
+                role,
+                None if floating else matches.group(3),
+                None if floating else int(matches.group(4)),
+                0,
+            ))
+            return
+
+        matches = TEST_XI2_CHANGES_RE.match(line)
+        if matches is not None and self.infos:
+            flags = 0
+            for name, flag in TEST_XI2_FLAGS.items():
+                if name in matches.group(1):
+                    flags |= flag
+            self.infos[-1] = self.infos[-1]._replace(flags=flags)
+
+    def feed_property(self, line: str) -> None:
+        '''Parse a line of a PropertyEvent.
+
+        test-xi2 doesn't print which device a property event is for, but
+        a device line is picked up if there is one.
+        '''
+
+        matches = TEST_XI2_PROP_DEVICE_RE.match(line)
+        if matches is not None:
+            self.prop_fields['device_id'] = int(matches.group(1))
+            return
+
+        matches = TEST_XI2_PROPERTY_RE.match(line)
+        if matches is not None:
+            self.prop_fields['prop_id'] = int(matches.group(1))
+            return
+
+        matches = TEST_XI2_CHANGED_RE.match(line)
+        if matches is not None and matches.group(1) in TEST_XI2_PROPERTY_CHANGES:
+            self.prop_fields['what'] = TEST_XI2_PROPERTY_CHANGES[matches.group(1)]
+
+    def flush(self) -> List[Any]:
+        '''Finish the event being parsed.
+
+        Returns:
+            List of completed events.
+        '''
+
+        events = []
+
+        infos = [info for info in self.infos if info.flags]
+        if infos:
+            events.append(HierarchyEvent(infos))
+
+        if 'prop_id' in self.prop_fields and 'what' in self.prop_fields:
+            events.append(PropertyEvent(self.prop_fields.get('device_id'),
+                                        self.prop_fields['prop_id'],
+                                        self.prop_fields['what']))
+
+        self.event_type = None
+        self.infos = []
+        self.prop_fields = {}
+
+        return events
+
+
+class TestXi2EventWatcher(EventWatcher):
+    '''Watches for events by reading `xinput test-xi2 --root`.
+
+    test-xi2 reports every input event on the root window, most of which are
+    skipped, so the native watcher should be preferred where it's available.
+    '''
+
+    def __init__(self, callback: Callable[[Any], None]) -> None:
+        '''Init TestXi2EventWatcher.'''
+
+        super().__init__(callback)
+
+        self.proc = None
+        self.thread = None
+
+    def start(self) -> None:
+        '''Start watching for events.'''
+
+        cmd = ['xinput', 'test-xi2', '--root']
+        # Make sure events aren't held back in xinput's stdout buffer
+        if shutil.which('stdbuf') is not None:
+            cmd = ['stdbuf', '-oL'] + cmd
+
+        self.proc = subprocess.Popen(cmd,
+                                     stdout=subprocess.PIPE,
+                                     stderr=subprocess.DEVNULL,
+                                     universal_newlines=True)
+
+        self.thread = threading.Thread(target=self.watch, args=(self.proc,),
+                                       daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        '''Stop watching for events.'''
+
+        if self.proc is None:
+            return
+
+        self.proc.terminate()
+        self.proc.wait()
+        self.proc = None
+
+    def watch(self, proc: subprocess.Popen) -> None:
+        '''Watcher thread loop.'''
+
+        parser = TestXi2Parser()
+
+        for line in proc.stdout:
+            for event in parser.feed(line):
+                self.callback(event)
+
+        for event in parser.flush():
+            self.callback(event)
+
+        proc.stdout.close()
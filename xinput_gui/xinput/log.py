@@ -0,0 +1,116 @@
+# log.py - command log records
+# Copyright (C) 2019  Ivan Fonseca
+#
+# This file is part of xinput-gui.
+#
+# xinput-gui is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the # License,
+# or (at your option) any later version.
+#
+# xinput-gui is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with xinput-gui.  If not, see <https://www.gnu.org/licenses/>.
+
+'''Command log records.
+
+Every command, or native call, is kept as a record rather than as text, so
+the log can be both displayed and exported as JSON Lines for analysis.
+'''
+
+from collections import namedtuple
+from pathlib import Path
+from typing import Iterable, Union
+import json
+import shlex
+
+
+LOG_SEPARATOR = '\n\n========== SEPARATOR ==========\n\n'
+
+# A command that was run.
+#   argv: list of command arguments. Native calls use the function name and
+#       its arguments, e.g. ['XIQueryDevice', '11'].
+#   start: when the command started, in seconds since the epoch.
+#   wall_time: how long the command ran, in seconds, None if unknown.
+#   returncode: exit status, 0 for native calls that succeeded.
+#   stdout_size: size of the output, in bytes.
+#   stdout: output text.
+#   stderr: error output text.
+CommandRecord = namedtuple('CommandRecord',
+                           ['argv', 'start', 'wall_time', 'returncode',
+                            'stdout_size', 'stdout', 'stderr'])
+
+# An error that wasn't the output of a command.
+#   start: when the error happened, in seconds since the epoch.
+#   message: error message.
+ErrorRecord = namedtuple('ErrorRecord', ['start', 'message'])
+
+
+def format_record(record: Union[CommandRecord, ErrorRecord]) -> str:
+    '''Get the text of a record, as shown in the log pane.
+
+    Args:
+        record: CommandRecord or ErrorRecord.
+
+    Returns:
+        Record text, ending with a separator.
+    '''
+
+    if isinstance(record, ErrorRecord):
+        return 'ERROR:\n{}{}'.format(record.message, LOG_SEPARATOR)
+
+    if record.wall_time is None:
+        timing = 'EXIT STATUS: {}'.format(record.returncode)
+    else:
+        timing = 'TIME: {:.1f} ms, EXIT STATUS: {}'.format(record.wall_time * 1000,
+                                                           record.returncode)
+
+    text = 'COMMAND:\n{}\n{}\nOUTPUT:\n{}'.format(
+        ' '.join(shlex.quote(arg) for arg in record.argv), timing, record.stdout)
+
+    if record.stderr:
+        text += '\nERRORS:\n{}'.format(record.stderr)
+
+    return text + LOG_SEPARATOR
+
+
+def record_to_json(record: Union[CommandRecord, ErrorRecord]) -> str:
+    '''Get a record as one line of JSON.
+
+    Command output is left out, only its size is kept.
+
+    Args:
+        record: CommandRecord or ErrorRecord.
+    '''
+
+    if isinstance(record, ErrorRecord):
+        data = {'start': record.start, 'error': record.message}
+    else:
+        data = {
+            'argv': record.argv,
+            'start': record.start,
+            'wall_time': record.wall_time,
+            'returncode': record.returncode,
+            'stdout_size': record.stdout_size,
+            'stderr': record.stderr,
+        }
+
+    return json.dumps(data, sort_keys=True)
+
+
+def write_jsonl(records: Iterable[Union[CommandRecord, ErrorRecord]], path: Path) -> None:
+    '''Write records to a JSON Lines file, one record per line.
+
+    Args:
+        records: CommandRecords and ErrorRecords.
+        path: file to write, replaced if it exists.
+    '''
+
+    with open(str(path), 'w', encoding='utf-8') as log_file:
+        for record in records:
+            log_file.write(record_to_json(record) + '\n')
+
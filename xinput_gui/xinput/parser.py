@@ -0,0 +1,406 @@
+# parser.py - xinput output parsers
+# Copyright (C) 2019  Ivan Fonseca
+#
+# This file is part of xinput-gui.
+#
+# xinput-gui is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the # License,
+# or (at your option) any later version.
+#
+# xinput-gui is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with xinput-gui.  If not, see <https://www.gnu.org/licenses/>.
+
+'''xinput output parsers.'''
+
+from collections import namedtuple
+from enum import Enum
+from typing import List, Tuple
+import re
+import struct
+
+
+# Indentation and tree drawing before device names in `xinput list`
+DEVICE_PREFIX_CHARS = ' \t\n\r\f\v⎜⎡⎣↳∼~'
+# The end of a device header line from `xinput list --short` or
+# `xinput list --long`, after the name,
+# e.g. "⎜   ↳ Logitech USB Mouse    id=9    [slave  pointer  (2)]".
+# It's searched for rather than matching the whole line, so that lines
+# without it are rejected in linear time.
+DEVICE_INFO_RE = re.compile(
+    r'\sid=(?P<id>\d+)\s+'
+    r'\[(?P<role>master|slave|floating)\s+(?P<kind>pointer|keyboard|slave)\s*'
+    r'(?:\((?P<attachment>\d+)\)\s*)?\]')
+
+# A device as described by xinput.
+#   id: device ID.
+#   name: device name.
+#   role: 'master', 'slave' or 'floating'.
+#   kind: 'pointer' or 'keyboard', None if floating.
+#   attachment: paired master ID for masters, master ID for slaves, None if
+#       floating.
+DeviceEntry = namedtuple('DeviceEntry',
+                         ['id', 'name', 'role', 'kind', 'attachment'])
+
+
+def parse_device_list(text: str) -> List[DeviceEntry]:
+    '''Parse the device hierarchy from `xinput list --short` (or `--long`).
+
+    Lines other than device headers, such as the class info printed by
+    `--long`, are ignored.
+
+    Args:
+        text: xinput list output.
+
+    Returns:
+        List of DeviceEntries, in the order xinput listed them.
+    '''
+
+    entries = []
+
+    for line in text.splitlines():
+        # Searching from the first "id=" skips the name
+        start = line.find('id=')
+        if start < 1:
+            continue
+
+        matches = DEVICE_INFO_RE.search(line, start - 1)
+        if matches is None:
+            continue
+
+        role = matches.group('role')
+        kind = None if role == 'floating' else matches.group('kind')
+        attachment = matches.group('attachment')
+        name = line[:matches.start()].lstrip(DEVICE_PREFIX_CHARS)
+
+        entries.append(DeviceEntry(
+            int(matches.group('id')),
+            name.strip(),
+            role,
+            kind,
+            None if attachment is None else int(attachment),
+        ))
+
+    return entries
+
+
+# The header line of `xinput list-props`, e.g. "Device 'Logitech USB Mouse':"
+PROPS_HEADER_PREFIX = "Device '"
+# A property line from `xinput list-props`, without its indentation,
+# e.g. "Device Enabled (142):	1". Only used for lines parse_prop_line()'s
+# fast path can't handle, such as names containing "):".
+PROP_LINE_RE = re.compile(r'(?P<name>.+?) \((?P<id>\d+)\):(?P<value>.*)', re.DOTALL)
+
+# A single value in a property value list: a quoted string or a bare token
+VALUE_RE = re.compile(r'"([^"]*)"|([^,\s]+)')
+# An atom ID, as printed after atom names by list-props
+ATOM_ID_RE = re.compile(r'^\(\d+\)$')
+# A single value as printed by list-props, with the ID list-props prints
+# after atom names
+TYPED_VALUE_RE = re.compile(r'(?:"(?P<quoted>[^"]*)"|(?P<bare>[^,\s]+))(?:\s*\((?P<atom>\d+)\))?')
+
+# Printed by list-props for properties without values
+NO_ITEMS = '<no items>'
+# How X stores FLOAT properties
+FLOAT32 = struct.Struct('=f')
+
+
+class PropType(Enum):
+    '''Property value types.'''
+
+    INTEGER = 'integer'
+    FLOAT = 'float'
+    ATOM = 'atom'
+    STRING = 'string'
+
+
+# An atom property value.
+#   name: atom name.
+#   id: atom ID, None if only the name is known.
+AtomValue = namedtuple('AtomValue', ['name', 'id'])
+
+# A device property.
+#   id: property ID.
+#   name: property name.
+#   type: PropType, None if the property has no values to tell it by.
+#   format: 8, 16 or 32, None if unknown (list-props doesn't print it).
+#   values: list of values, ints, floats, strs or AtomValues depending on
+#       type.
+PropEntry = namedtuple('PropEntry', ['id', 'name', 'type', 'format', 'values'])
+
+
+def parse_props(text: str) -> List[PropEntry]:
+    '''Parse device properties from `xinput list-props`.
+
+    Values are parsed here, once, so nothing else has to split them again.
+    Lines that aren't properties are taken as the continuation of the
+    previous property's value, or skipped if there's none, so unexpected
+    output never raises.
+
+    Args:
+        text: xinput list-props output.
+
+    Returns:
+        List of PropEntries.
+    '''
+
+    # [id, name, value lines] for each property
+    lines = []
+
+    for line in text.splitlines():
+        if line.startswith(PROPS_HEADER_PREFIX):
+            continue
+
+        line = line.strip()
+        if not line:
+            continue
+
+        prop_line = parse_prop_line(line)
+        if prop_line is not None:
+            lines.append([prop_line[0], prop_line[1], [prop_line[2]]])
+        elif lines:
+            lines[-1][2].append(line)
+
+    props = []
+
+    for id_, name, value_lines in lines:
+        type_, values = parse_value('\n'.join(value_lines))
+        props.append(PropEntry(id_, name, type_, None, values))
+
+    return props
+
+
+def parse_prop_line(line: str) -> Tuple[int, str, str]:
+    '''Parse a property line from `xinput list-props`.
+
+    Args:
+        line: line, without its indentation.
+
+    Returns:
+        (id, name, value) tuple, or None if the line isn't a property.
+    '''
+
+    # Fast path for the usual "Name (id):<tab>value"
+    head, sep, value = line.partition('):')
+    name, paren, id_ = head.rpartition(' (')
+    if sep and paren and name and id_.isdecimal():
+        return int(id_), name.strip(), value
+
+    matches = PROP_LINE_RE.match(line)
+    if matches is None:
+        return None
+
+    return int(matches.group('id')), matches.group('name').strip(), matches.group('value')
+
+
+def to_float32(val: float) -> float:
+    '''Round a float to the precision X stores FLOAT properties with.
+
+    Values read from X and values typed in then compare exactly.
+    '''
+
+    try:
+        return FLOAT32.unpack(FLOAT32.pack(val))[0]
+    except OverflowError:
+        return val
+
+
+def parse_value(text: str) -> Tuple[PropType, List]:
+    '''Parse a property value as printed by list-props.
+
+    list-props doesn't print types, so they're told by how values look:
+    atoms are followed by their ID, strings are quoted, and floats have a
+    decimal point.
+
+    Args:
+        text: property value, e.g. '1.000000, 0.000000' or '"Left" (301)'.
+
+    Returns:
+        (type, values) tuple. type is None if there are no values.
+    '''
+
+    text = text.strip()
+    if not text or text == NO_ITEMS:
+        return None, []
+
+    # Fast path for numbers, which most properties are: without quotes
+    # or atom IDs every value is a bare token
+    if '"' not in text and '(' not in text:
+        return parse_bare_values(text.replace(',', ' ').split())
+
+    tokens = [matches.group('quoted', 'bare', 'atom')
+              for matches in TYPED_VALUE_RE.finditer(text)]
+
+    if any(atom is not None for _, _, atom in tokens):
+        return PropType.ATOM, [
+            AtomValue(bare if quoted is None else quoted, None if atom is None else int(atom))
+            for quoted, bare, atom in tokens]
+
+    if any(quoted is not None for quoted, _, _ in tokens):
+        return PropType.STRING, [bare if quoted is None else quoted
+                                 for quoted, bare, _ in tokens]
+
+    return parse_bare_values([bare for _, bare, _ in tokens])
+
+
+def parse_bare_values(values: List[str]) -> Tuple[PropType, List]:
+    '''Parse unquoted property values, as integers, floats or strings.
+
+    Args:
+        values: list of values.
+
+    Returns:
+        (type, values) tuple.
+    '''
+
+    try:
+        return PropType.INTEGER, [int(val) for val in values]
+    except ValueError:
+        pass
+    try:
+        return PropType.FLOAT, [to_float32(float(val)) for val in values]
+    except ValueError:
+        return PropType.STRING, values
+
+
+def format_values(type_: PropType, values: List) -> str:
+    '''Format property values the way list-props prints them.
+
+    Args:
+        type_: PropType.
+        values: list of values.
+
+    Returns:
+        Property value text.
+    '''
+
+    if not values:
+        return NO_ITEMS
+
+    if type_ == PropType.ATOM:
+        return ', '.join('"{}"'.format(val.name) if val.id is None
+                         else '"{}" ({})'.format(val.name, val.id)
+                         for val in values)
+    if type_ == PropType.STRING:
+        return ', '.join('"{}"'.format(val) for val in values)
+    if type_ == PropType.FLOAT:
+        return ', '.join('{:f}'.format(val) for val in values)
+
+    return ', '.join(str(val) for val in values)
+
+
+def format_set_values(type_: PropType, values: List) -> List[str]:
+    '''Format property values as set-prop arguments.
+
+    Floats are written with as many digits as they need to be read back
+    exactly, rather than rounded to 6 places, and atoms by ID where it's
+    known.
+
+    Args:
+        type_: PropType.
+        values: list of values.
+
+    Returns:
+        List of arguments.
+    '''
+
+    if type_ == PropType.ATOM:
+        return [val.name if val.id is None else str(val.id) for val in values]
+    if type_ == PropType.FLOAT:
+        return [format_float(val) for val in values]
+
+    return [str(val) for val in values]
+
+
+def format_float(val: float) -> str:
+    '''Format a FLOAT property value in as few digits as read back the same.'''
+
+    for precision in range(6, 10):
+        text = '{:.{}g}'.format(val, precision)
+        if to_float32(float(text)) == val:
+            return text
+
+    return repr(val)
+
+
+def parse_input(type_: PropType, text: str) -> List:
+    '''Parse a value typed in by the user as a property of some type.
+
+    Args:
+        type_: PropType of the property.
+        text: value, separated like list-props output, e.g. '1, 0.5'.
+
+    Returns:
+        List of values.
+
+    Raises:
+        ValueError: if a value isn't valid for the type.
+    '''
+
+    values = split_values(text)
+
+    if type_ == PropType.INTEGER:
+        return [int(val, 0) for val in values]
+    if type_ == PropType.FLOAT:
+        return [to_float32(float(val)) for val in values]
+    if type_ == PropType.ATOM:
+        return [AtomValue(None, int(val)) if val.isdigit() else AtomValue(val, None)
+                for val in values]
+
+    return values
+
+
+def values_match(current: List, other: List) -> bool:
+    '''Check if two lists of property values are the same.
+
+    Atoms are compared by ID when both are known, by name otherwise.
+
+    Args:
+        current: list of values.
+        other: list of values.
+    '''
+
+    if len(current) != len(other):
+        return False
+
+    for current_val, other_val in zip(current, other):
+        if isinstance(current_val, AtomValue) and isinstance(other_val, AtomValue):
+            if current_val.id is not None and other_val.id is not None:
+                if current_val.id != other_val.id:
+                    return False
+            elif current_val.name != other_val.name:
+                return False
+        elif current_val != other_val:
+            return False
+
+    return True
+
+
+def split_values(val: str) -> List[str]:
+    '''Split a property value into the separate values set-prop expects.
+
+    Values may be separated by commas and/or whitespace, as in list-props
+    output. Quotes are removed from strings, and atom IDs following atom
+    names are dropped.
+
+    Args:
+        val: property value.
+
+    Returns:
+        List of values.
+    '''
+
+    values = []
+
+    for matches in VALUE_RE.finditer(val):
+        if matches.group(1) is not None:
+            values.append(matches.group(1))
+        elif not ATOM_ID_RE.match(matches.group(2)):
+            values.append(matches.group(2))
+
+    return values
@@ -0,0 +1,360 @@
+# profiles.py - device property profiles
+# Copyright (C) 2019  Ivan Fonseca
+#
+# This file is part of xinput-gui.
+#
+# xinput-gui is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the # License,
+# or (at your option) any later version.
+#
+# xinput-gui is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with xinput-gui.  If not, see <https://www.gnu.org/licenses/>.
+
+'''Device property profiles.
+
+A profile is a named set of property values for devices matched by name or
+by pattern. Profiles are stored in ~/.xinput-gui-profiles.json:
+
+    {
+      "laptop": [
+        {
+          "device": "SynPS/2 Synaptics TouchPad",
+          "props": {
+            "libinput Natural Scrolling Enabled": "1",
+            "libinput Accel Speed": "0.3"
+          }
+        },
+        {
+          "pattern": "Logitech .*",
+          "props": {"libinput Accel Profile Enabled": "0, 1"}
+        }
+      ]
+    }
+
+Properties are named rather than given by ID, since IDs change between X
+servers. Values are written as list-props displays them.
+'''
+
+from collections import OrderedDict, namedtuple
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List
+import json
+import os
+import re
+import time
+
+from .devices import Prop
+
+if TYPE_CHECKING:
+    from .xinput import Xinput
+
+
+PROFILES_PATH = Path(os.environ['HOME']).joinpath('.xinput-gui-profiles.json')
+
+
+class ProfileError(Exception):
+    '''A profile is malformed.'''
+
+
+# A property that a profile changed, or failed to change.
+#   device: Device the property belongs to.
+#   prop_name: property name.
+#   old_val: value before the profile was applied.
+#   new_val: value read back after, None if it couldn't be read.
+#   error: error message, None if the property was set.
+ProfileChange = namedtuple('ProfileChange',
+                           ['device', 'prop_name', 'old_val', 'new_val', 'error'])
+
+# Outcome of applying a profile.
+#   profile: Profile that was applied.
+#   changes: list of ProfileChanges.
+#   unchanged: number of properties that already had the profile's value.
+#   missing: list of (Device, property name) tuples, for matched devices that
+#       don't have a property.
+#   errors: list of (Device, error message) tuples, for devices whose
+#       properties couldn't be read.
+#   elapsed: time taken to apply the profile, in seconds.
+ProfileReport = namedtuple('ProfileReport',
+                           ['profile', 'changes', 'unchanged', 'missing', 'errors', 'elapsed'])
+
+
+class ProfileRule:
+    '''Property values for devices matching a name or pattern.'''
+
+    def __init__(self, device: str, pattern: str, props: Dict[str, str]) -> None:
+        '''Init ProfileRule.
+
+        Args:
+            device: exact device name, or None.
+            pattern: regular expression matching whole device names, or None.
+            props: property name -> value dict.
+        '''
+
+        self.device = device
+        self.pattern = pattern
+        self.props = props
+
+        try:
+            self.regex = None if pattern is None else re.compile(pattern)
+        except re.error as err:
+            raise ProfileError('Bad device pattern "{}": {}'.format(pattern, err))
+
+    def matches(self, device_name: str) -> bool:
+        '''Check if the rule applies to a device.
+
+        Args:
+            device_name: device name.
+        '''
+
+        if self.device is not None and device_name == self.device:
+            return True
+
+        return self.regex is not None and self.regex.fullmatch(device_name) is not None
+
+
+class Profile:
+    '''A named set of device property values.'''
+
+    def __init__(self, name: str, rules: List[ProfileRule]) -> None:
+        '''Init Profile.
+
+        Args:
+            name: profile name.
+            rules: list of ProfileRules. When several rules set the same
+                property of a device, the last one wins.
+        '''
+
+        self.name = name
+        self.rules = rules
+
+    def device_props(self, device_name: str) -> Dict[str, str]:
+        '''Get the property values the profile sets on a device.
+
+        Args:
+            device_name: device name.
+
+        Returns:
+            Property name -> value dict, empty if no rule matches.
+        '''
+
+        props = OrderedDict()
+        for rule in self.rules:
+            if rule.matches(device_name):
+                props.update(rule.props)
+
+        return props
+
+
+def load_profiles(path: Path = PROFILES_PATH) -> Dict[str, Profile]:
+    '''Load profiles.
+
+    Args:
+        path: profiles file.
+
+    Returns:
+        Profile name -> Profile dict, in file order. Empty if the file
+        doesn't exist.
+
+    Raises:
+        ProfileError: if the file is malformed.
+    '''
+
+    if not path.is_file():
+        return OrderedDict()
+
+    try:
+        with open(str(path), encoding='utf-8') as profiles_file:
+            data = json.load(profiles_file, object_pairs_hook=OrderedDict)
+    except (OSError, ValueError) as err:
+        raise ProfileError('Unable to read {}: {}'.format(path, err))
+
+    if not isinstance(data, dict):
+        raise ProfileError('{} must contain an object of profiles'.format(path))
+
+    profiles = OrderedDict()
+    for name, rules in data.items():
+        if not isinstance(rules, list):
+            raise ProfileError('Profile "{}" must be a list of rules'.format(name))
+
+        profile_rules = []
+        for rule in rules:
+            if (not isinstance(rule, dict)
+                    or not isinstance(rule.get('props'), dict)
+                    or ('device' not in rule and 'pattern' not in rule)):
+                raise ProfileError(
+                    'Rules in profile "{}" need "props" and a "device" or "pattern"'.format(name))
+
+            for key in ('device', 'pattern'):
+                if rule.get(key) is not None and not isinstance(rule[key], str):
+                    raise ProfileError('"{}" in profile "{}" must be a string'.format(key, name))
+
+            profile_rules.append(ProfileRule(
+                rule.get('device'),
+                rule.get('pattern'),
+                OrderedDict((prop, value_text(name, prop, val))
+                            for prop, val in rule['props'].items()),
+            ))
+
+        profiles[name] = Profile(name, profile_rules)
+
+    return profiles
+
+
+def value_text(profile_name: str, prop_name: str, val: Any) -> str:
+    '''Get a property value from a profile as text.
+
+    Values can be written as text, as a number, or as a list of either for
+    properties with several values.
+
+    Args:
+        profile_name: name of the profile, for errors.
+        prop_name: property name, for errors.
+        val: value from the profiles file.
+
+    Raises:
+        ProfileError: if the value isn't text, a number, or a list of them.
+    '''
+
+    values = val if isinstance(val, list) else [val]
+
+    texts = []
+    for item in values:
+        # bool is an int, but True isn't a value xinput takes
+        if isinstance(item, bool) or not isinstance(item, (str, int, float)):
+            raise ProfileError(
+                'Value of "{}" in profile "{}" must be text, a number or a list of them'.format(
+                    prop_name, profile_name))
+
+        text = str(item)
+        # Keep list items with separators in one piece, as Prop.write_value()
+        # does
+        if isinstance(val, list) and (' ' in text or ',' in text):
+            text = '"{}"'.format(text)
+        texts.append(text)
+
+    return ', '.join(texts)
+
+
+def values_equal(prop: Prop, wanted: str) -> bool:
+    '''Check if a property already has a profile value.
+
+    The profile value is parsed as the property's type and compared with its
+    parsed values, so "1" matches a float property showing "1.000000".
+
+    Args:
+        prop: Prop.
+        wanted: value from the profile.
+    '''
+
+    try:
+        return prop.matches(prop.parse(wanted))
+    except ValueError:
+        return False
+
+
+def apply_profile(xinput: 'Xinput', profile: Profile) -> ProfileReport:
+    '''Apply a profile to all matching devices.
+
+    The current properties of matching devices are read concurrently and
+    diffed against the profile. Only properties that differ are written, one
+    batch per device.
+
+    Args:
+        xinput: Xinput wrapper.
+        profile: Profile to apply.
+
+    Returns:
+        ProfileReport.
+    '''
+
+    start = time.perf_counter()
+
+    if not xinput.devices:
+        xinput.get_devices()
+
+    targets = [(device, profile.device_props(device.name)) for device in xinput.devices]
+    targets = [(device, props) for device, props in targets if props]
+
+    changes = []
+    unchanged = 0
+    missing = []
+    errors = []
+
+    fetched = xinput.fetch_all_props([device for device, _ in targets])
+    for (device, props), (_, error) in zip(targets, fetched):
+        if error is not None:
+            errors.append((device, str(error)))
+            continue
+
+        current = {prop.name: prop for prop in device.props}
+
+        batch = []
+        for name, val in props.items():
+            prop = current.get(name)
+            if prop is None:
+                missing.append((device, name))
+            elif values_equal(prop, val):
+                unchanged += 1
+            else:
+                batch.append((prop, val))
+
+        if not batch:
+            continue
+
+        results = device.set_props([(prop.id, val) for prop, val in batch])
+        for (prop, _), result in zip(batch, results):
+            changes.append(ProfileChange(
+                device,
+                prop.name,
+                prop.val,
+                None if result.prop is None else result.prop.val,
+                result.error,
+            ))
+
+    return ProfileReport(profile, changes, unchanged, missing, errors,
+                         time.perf_counter() - start)
+
+
+def format_report(report: ProfileReport) -> str:
+    '''Describe the outcome of applying a profile.
+
+    Args:
+        report: ProfileReport.
+
+    Returns:
+        Report text, one line per change.
+    '''
+
+    failed = sum(1 for change in report.changes if change.error is not None)
+
+    lines = ['Applied profile "{}" in {:.1f} ms: {} changed, {} already set, {} failed'.format(
+        report.profile.name,
+        report.elapsed * 1000,
+        len(report.changes) - failed,
+        report.unchanged,
+        failed + len(report.errors),
+    )]
+
+    for change in report.changes:
+        if change.error is None:
+            lines.append('  {} ({}): {}: {} -> {}'.format(
+                change.device.name, change.device.id, change.prop_name,
+                change.old_val, change.new_val))
+        else:
+            lines.append('  {} ({}): {}: failed: {}'.format(
+                change.device.name, change.device.id, change.prop_name, change.error))
+
+    for device, name in report.missing:
+        lines.append('  {} ({}): {}: no such property'.format(device.name, device.id, name))
+
+    for device, error in report.errors:
+        lines.append('  {} ({}): unable to read properties: {}'.format(
+            device.name, device.id, error))
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,139 @@
+# search.py - property search index
+# Copyright (C) 2019  Ivan Fonseca
+#
+# This file is part of xinput-gui.
+#
+# xinput-gui is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the # License,
+# or (at your option) any later version.
+#
+# xinput-gui is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with xinput-gui.  If not, see <https://www.gnu.org/licenses/>.
+
+'''Property search index.
+
+Devices add their properties to the index whenever they're loaded or
+changed, so searching never runs xinput.
+'''
+
+from collections import namedtuple
+from typing import TYPE_CHECKING, Container, List
+import threading
+
+if TYPE_CHECKING:
+    from .devices import Prop
+
+
+# A property matching a search.
+#   device_id: ID of the device with the property.
+#   prop: Prop, as last loaded.
+SearchResult = namedtuple('SearchResult', ['device_id', 'prop'])
+
+
+class PropIndex:
+    '''Index of the property names and values of every device.'''
+
+    def __init__(self) -> None:
+        '''Init PropIndex.'''
+
+        # Device ID -> list of (Prop, lowercase "name\nvalue") tuples
+        self.entries = {}
+        self.lock = threading.Lock()
+
+        # Last search, so typing more only searches what already matched
+        self.last_query = None
+        self.last_results = []
+
+    def update(self, device_id: int, props: List['Prop']) -> None:
+        '''Replace the indexed properties of a device.
+
+        Properties that haven't changed since they were indexed aren't
+        indexed again.
+
+        Args:
+            device_id: xinput device ID.
+            props: the device's Props.
+        '''
+
+        with self.lock:
+            old = {prop.id: (prop, text) for prop, text in self.entries.get(device_id, [])}
+
+            entries = []
+            for prop in props:
+                entry = old.get(prop.id)
+                if entry is None or entry[0] is not prop:
+                    entry = (prop, '{}\n{}'.format(prop.name, prop.val).lower())
+                entries.append(entry)
+
+            self.entries[device_id] = entries
+            self.last_query = None
+
+    def forget(self, device_id: int) -> None:
+        '''Forget a device's properties, once they may be out of date.
+
+        Args:
+            device_id: xinput device ID.
+        '''
+
+        with self.lock:
+            if self.entries.pop(device_id, None) is not None:
+                self.last_query = None
+
+    def retain(self, device_ids: Container[int]) -> None:
+        '''Forget devices that no longer exist.
+
+        Args:
+            device_ids: IDs of the devices to keep.
+        '''
+
+        with self.lock:
+            for device_id in [device_id for device_id in self.entries
+                              if device_id not in device_ids]:
+                del self.entries[device_id]
+            self.last_query = None
+
+    def indexed(self, device_id: int) -> bool:
+        '''Check if a device's properties have been indexed.'''
+
+        return device_id in self.entries
+
+    def search(self, query: str) -> List[SearchResult]:
+        '''Find properties whose name or value contains every word of a query.
+
+        Matching ignores case.
+
+        Args:
+            query: words to look for.
+
+        Returns:
+            List of SearchResults, grouped by device. Empty if the query is.
+        '''
+
+        query = query.lower()
+        words = query.split()
+        if not words:
+            return []
+
+        with self.lock:
+            # Anything matching the new query matched the one it extends
+            if self.last_query is not None and query.startswith(self.last_query):
+                candidates = self.last_results
+            else:
+                candidates = [(device_id, prop, text)
+                              for device_id, entries in self.entries.items()
+                              for prop, text in entries]
+
+            results = [(device_id, prop, text)
+                       for device_id, prop, text in candidates
+                       if all(word in text for word in words)]
+
+            self.last_query = query
+            self.last_results = results
+
+        return [SearchResult(device_id, prop) for device_id, prop, _ in results]
@@ -0,0 +1,203 @@
+# trace.py - recording and replaying xinput commands
+# Copyright (C) 2019  Ivan Fonseca
+#
+# This file is part of xinput-gui.
+#
+# xinput-gui is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the # License,
+# or (at your option) any later version.
+#
+# xinput-gui is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with xinput-gui.  If not, see <https://www.gnu.org/licenses/>.
+
+'''Recording and replaying xinput commands.
+
+A trace is a JSON Lines file with one command per line, holding its
+arguments and everything it returned:
+
+    {"argv": ["xinput", "list", "--short"], "returncode": 0, "stdout": "...", "stderr": ""}
+
+TraceRecorder writes the commands Xinput runs to a trace, and ReplayWorker
+stands in for the command worker and answers commands from one, so the
+subprocess backend can run without xinput or an X server.
+'''
+
+from pathlib import Path
+from typing import Iterable, List
+import json
+import threading
+import time
+
+from .worker import TimedProcess
+
+
+def trace_entry(argv: List[str], returncode: int, stdout: str, stderr: str) -> dict:
+    '''Get the trace entry of a command.
+
+    Args:
+        argv: command arguments.
+        returncode: exit status.
+        stdout: output text.
+        stderr: error output text.
+    '''
+
+    return {'argv': argv, 'returncode': returncode, 'stdout': stdout, 'stderr': stderr}
+
+
+def write_trace(entries: Iterable[dict], path: Path) -> None:
+    '''Write a trace file.
+
+    Args:
+        entries: trace entries, see trace_entry().
+        path: file to write, replaced if it exists.
+    '''
+
+    with open(str(path), 'w', encoding='utf-8') as trace_file:
+        for entry in entries:
+            trace_file.write(json.dumps(entry, sort_keys=True) + '\n')
+
+
+def read_trace(path: Path) -> List[dict]:
+    '''Read a trace file.
+
+    Args:
+        path: trace file.
+
+    Returns:
+        List of trace entries, in the order they were recorded.
+
+    Raises:
+        OSError: the file couldn't be read.
+        ValueError: a line isn't a trace entry.
+    '''
+
+    entries = []
+    with open(str(path), encoding='utf-8') as trace_file:
+        for line_num, line in enumerate(trace_file, 1):
+            if not line.strip():
+                continue
+
+            try:
+                entry = json.loads(line)
+                entries.append(trace_entry(list(entry['argv']),
+                                           int(entry['returncode']),
+                                           entry['stdout'],
+                                           entry['stderr']))
+            except (ValueError, TypeError, KeyError) as err:
+                raise ValueError('{}:{}: invalid trace entry: {}'.format(path, line_num, err))
+
+    return entries
+
+
+class TraceRecorder:
+    '''Appends commands to a trace file as they're run.'''
+
+    def __init__(self, path: Path) -> None:
+        '''Init TraceRecorder, emptying the trace file.
+
+        Args:
+            path: trace file.
+
+        Raises:
+            OSError: the file couldn't be written.
+        '''
+
+        self.path = path
+        self.lock = threading.Lock()
+
+        open(str(path), 'w').close()
+
+    def record(self, procs: List[TimedProcess]) -> None:
+        '''Record completed commands.
+
+        Args:
+            procs: completed commands.
+        '''
+
+        with self.lock, open(str(self.path), 'a', encoding='utf-8') as trace_file:
+            for proc in procs:
+                entry = trace_entry(list(proc.args),
+                                    proc.returncode,
+                                    proc.stdout.decode('utf-8', 'replace'),
+                                    proc.stderr.decode('utf-8', 'replace'))
+                trace_file.write(json.dumps(entry, sort_keys=True) + '\n')
+
+
+class ReplayWorker:
+    '''Answers commands from a trace instead of running them.
+
+    Used in place of a CommandWorker. A command that was recorded more than
+    once gets its last recorded result. Commands that aren't in the trace
+    fail, except set-prop, which succeeds without output, so properties can
+    be written while replaying.
+    '''
+
+    def __init__(self, entries: Iterable[dict], latency: float = 0) -> None:
+        '''Init ReplayWorker.
+
+        Args:
+            entries: trace entries, see trace_entry().
+            latency: time each command takes, in seconds, to simulate the
+                cost of running xinput.
+        '''
+
+        self.results = {tuple(entry['argv']): entry for entry in entries}
+        self.latency = latency
+        # Number of commands answered
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def close(self) -> None:
+        '''Nothing to stop, the trace stays loaded.'''
+
+    def run(self, cmd: List[str]) -> TimedProcess:
+        '''Answer a command.
+
+        Args:
+            cmd: command arguments.
+
+        Returns:
+            Recorded result of the command.
+        '''
+
+        start = time.time()
+        started = time.perf_counter()
+
+        entry = self.results.get(tuple(cmd))
+        if entry is None:
+            if cmd[1:2] == ['set-prop']:
+                entry = trace_entry(cmd, 0, '', '')
+            else:
+                entry = trace_entry(cmd, 1, '', 'No recorded result for: {}\n'.format(
+                    ' '.join(cmd)))
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self.lock:
+            self.count += 1
+
+        return TimedProcess(cmd,
+                            entry['returncode'],
+                            entry['stdout'].encode('utf-8'),
+                            entry['stderr'].encode('utf-8'),
+                            start,
+                            time.perf_counter() - started)
+
+    def run_many(self, cmds: List[List[str]]) -> List[TimedProcess]:
+        '''Answer several commands.
+
+        Args:
+            cmds: list of command arguments.
+
+        Returns:
+            Recorded results, in the same order.
+        '''
+
+        return [self.run(cmd) for cmd in cmds]
@@ -0,0 +1,284 @@
+# worker.py - persistent command worker
+# Copyright (C) 2019  Ivan Fonseca
+#
+# This file is part of xinput-gui.
+#
+# xinput-gui is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the # License,
+# or (at your option) any later version.
+#
+# xinput-gui is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with xinput-gui.  If not, see <https://www.gnu.org/licenses/>.
+
+'''Persistent command worker.
+
+Forking the app to run a command means copying the page tables of a process
+that has GTK loaded, every time. Instead, commands are sent to a small helper
+process that's started once and runs them on the app's behalf.
+
+Requests are single lines of JSON holding the command arguments. Each
+response is a sentinel header line with the exit status, the sizes of
+stdout and stderr and when and for how long the command ran, followed by
+the output itself:
+
+    \\0XINPUT-GUI-WORKER <returncode> <stdout size> <stderr size> <start> <wall time>\\n
+    <stdout><stderr>
+
+Since Python 3.10, subprocess uses vfork() on Linux, which doesn't copy the
+parent's page tables, and running commands directly is as fast as going
+through the helper (see benchmarks/bench_worker.py). The helper is only used
+by default on older versions.
+
+This module is run as a script to start the helper, so it must only import
+the standard library.
+'''
+
+from subprocess import PIPE, CompletedProcess
+from typing import List
+import json
+import subprocess
+import sys
+import threading
+import time
+
+
+SENTINEL = b'\0XINPUT-GUI-WORKER'
+# Most requests written to the helper before reading responses. Keeps the
+# unread requests well under the pipe buffer size, so neither side can block
+# writing while the other is blocked too.
+PIPELINE_DEPTH = 32
+# Use the helper by default when subprocess has to fork the whole app
+USE_WORKER = sys.version_info < (3, 10)
+
+
+class WorkerError(Exception):
+    '''The helper process died or sent a malformed response.'''
+
+
+class TimedProcess(CompletedProcess):
+    '''A completed command, with when and for how long it ran.'''
+
+    def __init__(self,
+                 args: List[str],
+                 returncode: int,
+                 stdout: bytes,
+                 stderr: bytes,
+                 start: float,
+                 wall_time: float) -> None:
+        '''Init TimedProcess.
+
+        Args:
+            args, returncode, stdout, stderr: as in CompletedProcess.
+            start: when the command started, in seconds since the epoch.
+            wall_time: how long the command ran, in seconds.
+        '''
+
+        super().__init__(args, returncode, stdout, stderr)
+
+        self.start = start
+        self.wall_time = wall_time
+
+
+class CommandWorker:
+    '''Runs commands through a persistent helper process.'''
+
+    def __init__(self, enabled: bool = USE_WORKER) -> None:
+        '''Init CommandWorker.
+
+        Args:
+            enabled: run commands through the helper. If False, commands
+                are run directly.
+        '''
+
+        self.enabled = enabled
+        self.proc = None
+        self.lock = threading.Lock()
+
+    def start(self) -> None:
+        '''Start the helper process, if it isn't running.'''
+
+        if self.proc is not None and self.proc.poll() is None:
+            return
+
+        self.proc = subprocess.Popen([sys.executable, '-I', __file__],
+                                     stdin=PIPE,
+                                     stdout=PIPE)
+
+    def close(self) -> None:
+        '''Stop the helper process.'''
+
+        with self.lock:
+            self.stop()
+
+    def stop(self) -> None:
+        '''Stop the helper process, without locking.'''
+
+        if self.proc is None:
+            return
+
+        proc, self.proc = self.proc, None
+
+        try:
+            proc.stdin.close()
+        except OSError:
+            # Flushing to a helper that died fails, make sure it's gone
+            proc.kill()
+        proc.wait()
+        proc.stdout.close()
+
+    def run(self, cmd: List[str]) -> TimedProcess:
+        '''Run a command.
+
+        Args:
+            cmd: command arguments.
+
+        Returns:
+            Completed command.
+        '''
+
+        return self.run_many([cmd])[0]
+
+    def run_many(self, cmds: List[List[str]]) -> List[TimedProcess]:
+        '''Run several commands in order.
+
+        Requests are written in batches of up to PIPELINE_DEPTH before their
+        responses are read, so a burst of commands doesn't wait on a round
+        trip to the helper for each one.
+
+        If the helper fails, commands that didn't get a response are run
+        directly instead. So are the commands of a thread that finds the
+        helper busy with another thread's commands, so commands run from
+        several threads at once still run concurrently.
+
+        Args:
+            cmds: list of command arguments.
+
+        Returns:
+            Completed commands, in the same order.
+        '''
+
+        if not self.enabled:
+            return [run_timed(cmd) for cmd in cmds]
+
+        # The helper runs one command at a time, don't wait for it
+        if not self.lock.acquire(blocking=False):
+            return [run_timed(cmd) for cmd in cmds]
+
+        results = []
+
+        try:
+            self.start()
+
+            for start in range(0, len(cmds), PIPELINE_DEPTH):
+                batch = cmds[start:start + PIPELINE_DEPTH]
+
+                for cmd in batch:
+                    self.proc.stdin.write(json.dumps(cmd).encode('utf-8') + b'\n')
+                self.proc.stdin.flush()
+
+                for cmd in batch:
+                    results.append(self.read_response(cmd))
+        except (OSError, ValueError, WorkerError):
+            self.stop()
+
+            for cmd in cmds[len(results):]:
+                results.append(run_timed(cmd))
+        finally:
+            self.lock.release()
+
+        return results
+
+    def read_response(self, cmd: List[str]) -> TimedProcess:
+        '''Read a single response from the helper.
+
+        Args:
+            cmd: command arguments the response is for.
+
+        Returns:
+            Completed command.
+        '''
+
+        header = self.proc.stdout.readline()
+        if not header.startswith(SENTINEL):
+            raise WorkerError('Bad response header: {!r}'.format(header))
+
+        try:
+            returncode, out_size, err_size, start, wall_time = header[len(SENTINEL):].split()
+            returncode, out_size, err_size = int(returncode), int(out_size), int(err_size)
+            start, wall_time = float(start), float(wall_time)
+        except ValueError:
+            raise WorkerError('Bad response header: {!r}'.format(header))
+
+        out = self.read_exactly(out_size)
+        err = self.read_exactly(err_size)
+
+        return TimedProcess(cmd, returncode, out, err, start, wall_time)
+
+    def read_exactly(self, size: int) -> bytes:
+        '''Read exactly size bytes from the helper.'''
+
+        data = b''
+        while len(data) < size:
+            chunk = self.proc.stdout.read(size - len(data))
+            if not chunk:
+                raise WorkerError('Helper exited mid-response')
+            data += chunk
+
+        return data
+
+
+def run_timed(cmd: List[str]) -> TimedProcess:
+    '''Run a command directly, timing it.
+
+    Args:
+        cmd: command arguments.
+
+    Returns:
+        Completed command. If it couldn't be run, e.g. because it's not
+        installed, the exit status is 127 and the error is in stderr, the
+        same as through the helper.
+    '''
+
+    start = time.time()
+    started = time.perf_counter()
+    try:
+        proc = subprocess.run(cmd, stdout=PIPE, stderr=PIPE)
+        returncode, out, err = proc.returncode, proc.stdout, proc.stderr
+    except OSError as error:
+        returncode, out, err = 127, b'', str(error).encode('utf-8')
+
+    return TimedProcess(cmd, returncode, out, err, start, time.perf_counter() - started)
+
+
+def serve() -> None:
+    '''Run the helper loop, until stdin is closed.'''
+
+    requests = sys.stdin.buffer
+    responses = sys.stdout.buffer
+
+    for line in requests:
+        start = time.time()
+        started = time.perf_counter()
+        try:
+            cmd = json.loads(line.decode('utf-8'))
+            proc = subprocess.run(cmd, stdout=PIPE, stderr=PIPE)
+            returncode, out, err = proc.returncode, proc.stdout, proc.stderr
+        except (OSError, ValueError) as error:
+            returncode, out, err = 127, b'', str(error).encode('utf-8')
+        wall_time = time.perf_counter() - started
+
+        responses.write(SENTINEL + ' {} {} {} {!r} {!r}\n'.format(
+            returncode, len(out), len(err), start, wall_time).encode('utf-8'))
+        responses.write(out)
+        responses.write(err)
+        responses.flush()
+
+
+if __name__ == '__main__':
+    serve()
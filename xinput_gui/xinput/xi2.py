@@ -0,0 +1,1168 @@
+# xi2.py - native XInput2 backend
+# Copyright (C) 2019  Ivan Fonseca
+#
+# This file is part of xinput-gui.
+#
+# xinput-gui is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the # License,
+# or (at your option) any later version.
+#
+# xinput-gui is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with xinput-gui.  If not, see <https://www.gnu.org/licenses/>.
+
+'''Native XInput2 backend.
+
+Calls libXi through ctypes on a persistent Display connection, instead of
+running the xinput command. Output is formatted the same way xinput formats
+it, so the rest of the app can't tell the backends apart.
+'''
+
+from ctypes import (CFUNCTYPE, POINTER, Structure, Union, byref, c_byte,
+                    c_char_p, c_double, c_int, c_long, c_short, c_ubyte,
+                    c_uint, c_ulong, c_void_p, cast, create_string_buffer,
+                    sizeof, string_at)
+from ctypes.util import find_library
+from typing import TYPE_CHECKING, Any, Callable, List, Tuple
+import ctypes
+import select
+import struct
+import threading
+import time
+
+from .backend import BACKEND_NATIVE, Backend, XinputError
+from .events import EventWatcher, HierarchyEvent, HierarchyInfo, PropertyEvent
+from .parser import (AtomValue, DeviceEntry, PropEntry, PropType, format_values,
+                     split_values)
+
+if TYPE_CHECKING:
+    from .xinput import Xinput
+
+
+Atom = c_ulong
+
+# X11 constants
+SUCCESS = 0
+ANY_PROPERTY_TYPE = 0
+PROP_MODE_REPLACE = 0
+XA_ATOM = 4
+XA_CARDINAL = 6
+XA_INTEGER = 19
+XA_STRING = 31
+GENERIC_EVENT = 35
+
+# XI2 constants
+XI_ALL_DEVICES = 0
+XI_MASTER_POINTER = 1
+XI_MASTER_KEYBOARD = 2
+XI_SLAVE_POINTER = 3
+XI_SLAVE_KEYBOARD = 4
+XI_FLOATING_SLAVE = 5
+
+XI_ADD_MASTER = 1
+XI_REMOVE_MASTER = 2
+XI_ATTACH_SLAVE = 3
+XI_DETACH_SLAVE = 4
+XI_FLOATING = 1
+
+XI_KEY_CLASS = 0
+XI_BUTTON_CLASS = 1
+XI_VALUATOR_CLASS = 2
+XI_SCROLL_CLASS = 3
+XI_TOUCH_CLASS = 8
+
+XI_HIERARCHY_CHANGED = 11
+XI_PROPERTY_EVENT = 12
+
+# How often the event watcher checks if it's been stopped, in seconds
+WATCH_INTERVAL = 0.25
+
+# Property values are fetched in chunks of this many 32 bit units
+PROP_CHUNK = 1000
+
+# Native struct formats for each property format, as stored client-side by
+# Xlib (format 32 values are stored in longs)
+INT_FORMATS = {8: 'b', 16: 'h', 32: 'l'}
+CARD_FORMATS = {8: 'B', 16: 'H', 32: 'L'}
+CARD_MASKS = {8: 0xff, 16: 0xffff, 32: 0xffffffff}
+# A float's bits, and the same bits as an unsigned 32 bit integer
+FLOAT_BITS = struct.Struct('=f')
+CARD32 = struct.Struct('=I')
+
+
+class XErrorEvent(Structure):
+    _fields_ = [
+        ('type', c_int),
+        ('display', c_void_p),
+        ('resourceid', c_ulong),
+        ('serial', c_ulong),
+        ('error_code', c_ubyte),
+        ('request_code', c_ubyte),
+        ('minor_code', c_ubyte),
+    ]
+
+
+class XIAnyClassInfo(Structure):
+    _fields_ = [
+        ('type', c_int),
+        ('sourceid', c_int),
+    ]
+
+
+class XIButtonState(Structure):
+    _fields_ = [
+        ('mask_len', c_int),
+        ('mask', POINTER(c_ubyte)),
+    ]
+
+
+class XIButtonClassInfo(Structure):
+    _fields_ = [
+        ('type', c_int),
+        ('sourceid', c_int),
+        ('num_buttons', c_int),
+        ('labels', POINTER(Atom)),
+        ('state', XIButtonState),
+    ]
+
+
+class XIKeyClassInfo(Structure):
+    _fields_ = [
+        ('type', c_int),
+        ('sourceid', c_int),
+        ('num_keycodes', c_int),
+        ('keycodes', POINTER(c_int)),
+    ]
+
+
+class XIValuatorClassInfo(Structure):
+    _fields_ = [
+        ('type', c_int),
+        ('sourceid', c_int),
+        ('number', c_int),
+        ('label', Atom),
+        ('min', c_double),
+        ('max', c_double),
+        ('value', c_double),
+        ('resolution', c_int),
+        ('mode', c_int),
+    ]
+
+
+class XIScrollClassInfo(Structure):
+    _fields_ = [
+        ('type', c_int),
+        ('sourceid', c_int),
+        ('number', c_int),
+        ('scroll_type', c_int),
+        ('increment', c_double),
+        ('flags', c_int),
+    ]
+
+
+class XITouchClassInfo(Structure):
+    _fields_ = [
+        ('type', c_int),
+        ('sourceid', c_int),
+        ('mode', c_int),
+        ('num_touches', c_int),
+    ]
+
+
+class XIDeviceInfo(Structure):
+    _fields_ = [
+        ('deviceid', c_int),
+        ('name', c_char_p),
+        ('use', c_int),
+        ('attachment', c_int),
+        ('enabled', c_int),
+        ('num_classes', c_int),
+        ('classes', POINTER(POINTER(XIAnyClassInfo))),
+    ]
+
+
+class XIAddMasterInfo(Structure):
+    _fields_ = [
+        ('type', c_int),
+        ('name', c_char_p),
+        ('send_core', c_int),
+        ('enable', c_int),
+    ]
+
+
+class XIRemoveMasterInfo(Structure):
+    _fields_ = [
+        ('type', c_int),
+        ('deviceid', c_int),
+        ('return_mode', c_int),
+        ('return_pointer', c_int),
+        ('return_keyboard', c_int),
+    ]
+
+
+class XIAttachSlaveInfo(Structure):
+    _fields_ = [
+        ('type', c_int),
+        ('deviceid', c_int),
+        ('new_master', c_int),
+    ]
+
+
+class XIDetachSlaveInfo(Structure):
+    _fields_ = [
+        ('type', c_int),
+        ('deviceid', c_int),
+    ]
+
+
+class XIAnyHierarchyChangeInfo(Union):
+    _fields_ = [
+        ('type', c_int),
+        ('add', XIAddMasterInfo),
+        ('remove', XIRemoveMasterInfo),
+        ('attach', XIAttachSlaveInfo),
+        ('detach', XIDetachSlaveInfo),
+    ]
+
+
+class XGenericEventCookie(Structure):
+    _fields_ = [
+        ('type', c_int),
+        ('serial', c_ulong),
+        ('send_event', c_int),
+        ('display', c_void_p),
+        ('extension', c_int),
+        ('evtype', c_int),
+        ('cookie', c_uint),
+        ('data', c_void_p),
+    ]
+
+
+class XEvent(Union):
+    _fields_ = [
+        ('type', c_int),
+        ('xcookie', XGenericEventCookie),
+        ('pad', c_long * 24),
+    ]
+
+
+class XIEventMask(Structure):
+    _fields_ = [
+        ('deviceid', c_int),
+        ('mask_len', c_int),
+        ('mask', POINTER(c_ubyte)),
+    ]
+
+
+class XIHierarchyInfo(Structure):
+    _fields_ = [
+        ('deviceid', c_int),
+        ('attachment', c_int),
+        ('use', c_int),
+        ('enabled', c_int),
+        ('flags', c_int),
+    ]
+
+
+class XIHierarchyEvent(Structure):
+    _fields_ = [
+        ('type', c_int),
+        ('serial', c_ulong),
+        ('send_event', c_int),
+        ('display', c_void_p),
+        ('extension', c_int),
+        ('evtype', c_int),
+        ('time', c_ulong),
+        ('flags', c_int),
+        ('num_info', c_int),
+        ('info', POINTER(XIHierarchyInfo)),
+    ]
+
+
+class XIPropertyEvent(Structure):
+    _fields_ = [
+        ('type', c_int),
+        ('serial', c_ulong),
+        ('send_event', c_int),
+        ('display', c_void_p),
+        ('extension', c_int),
+        ('evtype', c_int),
+        ('time', c_ulong),
+        ('deviceid', c_int),
+        ('property', Atom),
+        ('what', c_int),
+    ]
+
+
+XErrorHandler = CFUNCTYPE(c_int, c_void_p, POINTER(XErrorEvent))
+
+
+def init_threads() -> bool:
+    '''Make Xlib safe to use from several threads.
+
+    The backend, the event watcher and GTK all use Xlib from different
+    threads. This has to run before the process opens its first display, GTK's
+    included, so the GUI calls it before loading GTK. Later calls do nothing.
+
+    Returns:
+        Whether Xlib was found and supports threads.
+    '''
+
+    libx11_path = find_library('X11')
+    if libx11_path is None:
+        return False
+
+    libx11 = ctypes.CDLL(libx11_path)
+    libx11.XInitThreads.argtypes = []
+    libx11.XInitThreads.restype = c_int
+
+    return bool(libx11.XInitThreads())
+
+
+def load_libs() -> Tuple[ctypes.CDLL, ctypes.CDLL]:
+    '''Load and prototype libX11 and libXi.
+
+    Returns:
+        libX11 and libXi.
+
+    Raises:
+        XinputError: if either library can't be found.
+    '''
+
+    libx11_path = find_library('X11')
+    libxi_path = find_library('Xi')
+    if libx11_path is None or libxi_path is None:
+        raise XinputError('libX11 and libXi are required for the native backend')
+
+    # In case nothing opened a display yet, e.g. on the command line
+    init_threads()
+
+    libx11 = ctypes.CDLL(libx11_path)
+    libxi = ctypes.CDLL(libxi_path)
+
+    libx11.XOpenDisplay.argtypes = [c_char_p]
+    libx11.XOpenDisplay.restype = c_void_p
+    libx11.XCloseDisplay.argtypes = [c_void_p]
+    libx11.XSync.argtypes = [c_void_p, c_int]
+    libx11.XFree.argtypes = [c_void_p]
+    libx11.XInternAtom.argtypes = [c_void_p, c_char_p, c_int]
+    libx11.XInternAtom.restype = Atom
+    libx11.XGetAtomName.argtypes = [c_void_p, Atom]
+    libx11.XGetAtomName.restype = c_void_p
+    libx11.XGetErrorText.argtypes = [c_void_p, c_int, c_char_p, c_int]
+    libx11.XSetErrorHandler.argtypes = [c_void_p]
+    libx11.XSetErrorHandler.restype = c_void_p
+    libx11.XQueryExtension.argtypes = [c_void_p, c_char_p, POINTER(c_int),
+                                       POINTER(c_int), POINTER(c_int)]
+    libx11.XDefaultRootWindow.argtypes = [c_void_p]
+    libx11.XDefaultRootWindow.restype = c_ulong
+    libx11.XConnectionNumber.argtypes = [c_void_p]
+    libx11.XPending.argtypes = [c_void_p]
+    libx11.XNextEvent.argtypes = [c_void_p, POINTER(XEvent)]
+    libx11.XGetEventData.argtypes = [c_void_p, POINTER(XGenericEventCookie)]
+    libx11.XFreeEventData.argtypes = [c_void_p, POINTER(XGenericEventCookie)]
+    libx11.XFreeEventData.restype = None
+    libx11.XFlush.argtypes = [c_void_p]
+
+    libxi.XIQueryVersion.argtypes = [c_void_p, POINTER(c_int), POINTER(c_int)]
+    libxi.XIQueryDevice.argtypes = [c_void_p, c_int, POINTER(c_int)]
+    libxi.XIQueryDevice.restype = POINTER(XIDeviceInfo)
+    libxi.XIFreeDeviceInfo.argtypes = [POINTER(XIDeviceInfo)]
+    libxi.XIListProperties.argtypes = [c_void_p, c_int, POINTER(c_int)]
+    libxi.XIListProperties.restype = POINTER(Atom)
+    libxi.XIGetProperty.argtypes = [c_void_p, c_int, Atom, c_long, c_long,
+                                    c_int, Atom, POINTER(Atom), POINTER(c_int),
+                                    POINTER(c_ulong), POINTER(c_ulong),
+                                    POINTER(c_void_p)]
+    libxi.XIChangeProperty.argtypes = [c_void_p, c_int, Atom, Atom, c_int,
+                                       c_int, c_void_p, c_int]
+    libxi.XIChangeProperty.restype = None
+    libxi.XIChangeHierarchy.argtypes = [c_void_p,
+                                        POINTER(XIAnyHierarchyChangeInfo),
+                                        c_int]
+    libxi.XISelectEvents.argtypes = [c_void_p, c_ulong, POINTER(XIEventMask),
+                                     c_int]
+
+    return libx11, libxi
+
+
+class NativeBackend(Backend):
+    '''Backend that calls libXi directly.'''
+
+    name = BACKEND_NATIVE
+
+    def __init__(self, xinput: 'Xinput', display_name: str = None) -> None:
+        '''Init NativeBackend.
+
+        Args:
+            xinput: Xinput wrapper using this backend.
+            display_name: X display to connect to, $DISPLAY by default.
+
+        Raises:
+            XinputError: if the display can't be opened or doesn't support
+                XInput 2.
+        '''
+
+        super().__init__(xinput)
+
+        self.libx11, self.libxi = load_libs()
+        # Xlib connections aren't thread safe
+        self.lock = threading.RLock()
+        self.errors = []
+        self.atom_names = {}
+        # Other connections opened by this backend, whose errors are ignored
+        self.other_displays = set()
+        self.display_name = display_name
+
+        self.display = self.libx11.XOpenDisplay(
+            None if display_name is None else display_name.encode())
+        if not self.display:
+            raise XinputError('Unable to open X display')
+
+        # Xlib's default error handler exits the process, so keep errors
+        # around and raise them after each request instead. The handler must
+        # stay referenced for as long as it's installed, so it's only
+        # installed once there's a display for close() to restore it with.
+        self.error_handler = XErrorHandler(self.handle_error)
+        self.prev_error_handler = self.libx11.XSetErrorHandler(self.error_handler)
+
+        major, minor = c_int(2), c_int(0)
+        if self.libxi.XIQueryVersion(self.display, byref(major), byref(minor)) != SUCCESS:
+            self.close()
+            raise XinputError('X server does not support XInput 2')
+
+        self.float_atom = self.intern_atom('FLOAT')
+
+    def close(self) -> None:
+        '''Close the display connection and restore the error handler.'''
+
+        with self.lock:
+            if self.display:
+                self.libx11.XCloseDisplay(self.display)
+                self.display = None
+                self.libx11.XSetErrorHandler(self.prev_error_handler)
+
+    def handle_error(self, display: c_void_p, event: POINTER(XErrorEvent)) -> int:
+        '''Xlib error handler.
+
+        The handler is process wide, so errors on other connections (GTK's)
+        are passed on to the previous handler.
+        '''
+
+        if display in self.other_displays:
+            return 0
+
+        if display != self.display:
+            if self.prev_error_handler:
+                return XErrorHandler(self.prev_error_handler)(display, event)
+            return 0
+
+        text = create_string_buffer(256)
+        self.libx11.XGetErrorText(display, event.contents.error_code, text, 256)
+        self.errors.append('{} (request {}.{})'.format(
+            text.value.decode('utf-8', 'replace'),
+            event.contents.request_code,
+            event.contents.minor_code))
+        return 0
+
+    def check_errors(self, sync: bool = True) -> None:
+        '''Raise any X errors caused by previous requests.
+
+        Args:
+            sync: wait for the server to process all requests first. Not
+                needed after requests with replies.
+
+        Raises:
+            XinputError: if a request failed.
+        '''
+
+        if sync:
+            self.libx11.XSync(self.display, False)
+
+        if self.errors:
+            errors = ', '.join(self.errors)
+            self.errors.clear()
+            raise XinputError(errors)
+
+    def intern_atom(self, name: str) -> int:
+        '''Get the atom for a name, creating it if needed.'''
+
+        return self.libx11.XInternAtom(self.display, name.encode(), False)
+
+    def get_atom_name(self, atom: int) -> str:
+        '''Get the name of an atom. Atom names never change, so they're
+        cached.'''
+
+        if atom not in self.atom_names:
+            name_ptr = self.libx11.XGetAtomName(self.display, atom)
+            if not name_ptr:
+                return None
+            self.atom_names[atom] = string_at(name_ptr).decode('utf-8', 'replace')
+            self.libx11.XFree(name_ptr)
+
+        return self.atom_names[atom]
+
+    def query_devices(self, device_id: int) -> List[Tuple[DeviceEntry, List]]:
+        '''Query devices and their input classes.
+
+        Args:
+            device_id: xinput device ID, or XI_ALL_DEVICES.
+
+        Returns:
+            List of (DeviceEntry, list of class info structs) tuples.
+        '''
+
+        num_devices = c_int()
+        infos = self.libxi.XIQueryDevice(self.display, device_id, byref(num_devices))
+        self.check_errors(sync=False)
+        if not infos:
+            raise XinputError('Unable to find device {}'.format(device_id))
+
+        devices = []
+        try:
+            for i in range(num_devices.value):
+                info = infos[i]
+                devices.append((device_entry(info), self.get_classes(info)))
+        finally:
+            self.libxi.XIFreeDeviceInfo(infos)
+
+        return devices
+
+    def get_classes(self, info: XIDeviceInfo) -> List[Tuple]:
+        '''Copy a device's input classes out of an XIDeviceInfo.
+
+        Returns:
+            List of (class type, source ID, dict of class details) tuples.
+        '''
+
+        classes = []
+
+        for i in range(info.num_classes):
+            any_class = info.classes[i].contents
+            details = {}
+
+            if any_class.type == XI_BUTTON_CLASS:
+                button = cast(info.classes[i], POINTER(XIButtonClassInfo)).contents
+                details['num_buttons'] = button.num_buttons
+                details['labels'] = [self.atom_label(button.labels[n])
+                                     for n in range(button.num_buttons)]
+            elif any_class.type == XI_KEY_CLASS:
+                key = cast(info.classes[i], POINTER(XIKeyClassInfo)).contents
+                details['num_keycodes'] = key.num_keycodes
+            elif any_class.type == XI_VALUATOR_CLASS:
+                valuator = cast(info.classes[i], POINTER(XIValuatorClassInfo)).contents
+                details['number'] = valuator.number
+                details['label'] = self.atom_label(valuator.label)
+                details['min'] = valuator.min
+                details['max'] = valuator.max
+                details['resolution'] = valuator.resolution
+                details['mode'] = 'absolute' if valuator.mode else 'relative'
+            elif any_class.type == XI_SCROLL_CLASS:
+                scroll = cast(info.classes[i], POINTER(XIScrollClassInfo)).contents
+                details['number'] = scroll.number
+                details['scroll_type'] = 'vertical' if scroll.scroll_type == 1 else 'horizontal'
+                details['increment'] = scroll.increment
+                details['flags'] = scroll.flags
+            elif any_class.type == XI_TOUCH_CLASS:
+                touch = cast(info.classes[i], POINTER(XITouchClassInfo)).contents
+                details['mode'] = 'direct' if touch.mode == 1 else 'dependent'
+                details['num_touches'] = touch.num_touches
+
+            classes.append((any_class.type, any_class.sourceid, details))
+
+        return classes
+
+    def atom_label(self, atom: int) -> str:
+        '''Get an atom's name for display, "None" for no atom.'''
+
+        if not atom:
+            return 'None'
+        return self.get_atom_name(atom)
+
+    def list_devices(self) -> List[DeviceEntry]:
+        '''List all devices.'''
+
+        start = time.time()
+        with self.lock:
+            devices = [entry for entry, _ in self.query_devices(XI_ALL_DEVICES)]
+        devices = sort_devices(devices)
+
+        self.xinput.log_command(['XIQueryDevice', 'XIAllDevices'], ''.join(
+            '{}\tid={}\t[{}]\n'.format(entry.name, entry.id, describe_use(entry))
+            for entry in devices), start=start)
+
+        return devices
+
+    def get_device(self, device_id: int) -> DeviceEntry:
+        '''Get a single device.'''
+
+        start = time.time()
+        with self.lock:
+            entry = self.query_devices(device_id)[0][0]
+
+        self.xinput.log_command(['XIQueryDevice', str(device_id)],
+                                '{}\tid={}\t[{}]\n'.format(entry.name, entry.id,
+                                                            describe_use(entry)),
+                                start=start)
+
+        return entry
+
+    def read_prop(self, device_id: int, prop: int) -> Tuple[int, int, List]:
+        '''Get a raw property value.
+
+        Args:
+            device_id: xinput device ID.
+            prop: property atom.
+
+        Returns:
+            Property type atom, format and list of values.
+        '''
+
+        offset = 0
+        values = []
+        while True:
+            type_ = Atom()
+            format_ = c_int()
+            num_items = c_ulong()
+            bytes_after = c_ulong()
+            data = c_void_p()
+
+            status = self.libxi.XIGetProperty(
+                self.display, device_id, prop, offset, PROP_CHUNK, False,
+                ANY_PROPERTY_TYPE, byref(type_), byref(format_),
+                byref(num_items), byref(bytes_after), byref(data))
+            self.check_errors(sync=False)
+            if status != SUCCESS:
+                raise XinputError('Unable to get property {} of device {}'.format(
+                    prop, device_id))
+
+            try:
+                values.extend(unpack_values(type_.value, format_.value,
+                                            num_items.value, data,
+                                            self.float_atom))
+            finally:
+                if data:
+                    self.libx11.XFree(data)
+
+            if not bytes_after.value:
+                break
+            offset += num_items.value * format_.value // 32
+
+        return type_.value, format_.value, values
+
+    def prop_entry(self, prop_id: int, type_: int, format_: int, values: List) -> PropEntry:
+        '''Get a PropEntry from a raw property value.
+
+        Args:
+            prop_id: property atom.
+            type_, format_, values: as returned by read_prop().
+        '''
+
+        if not values:
+            prop_type = None
+        elif type_ == XA_ATOM:
+            prop_type = PropType.ATOM
+            values = [AtomValue(self.atom_label(val), val) for val in values]
+        elif type_ == XA_STRING:
+            prop_type = PropType.STRING
+        elif type_ == self.float_atom:
+            prop_type = PropType.FLOAT
+        else:
+            prop_type = PropType.INTEGER
+
+        return PropEntry(prop_id, self.get_atom_name(prop_id), prop_type, format_ or None,
+                         values)
+
+    def get_prop(self, device_id: int, prop_id: int) -> PropEntry:
+        '''Get a single device property.'''
+
+        start = time.time()
+        with self.lock:
+            type_, format_, values = self.read_prop(device_id, prop_id)
+            # Missing properties come back with no type
+            if type_ == ANY_PROPERTY_TYPE:
+                raise XinputError('Device {} has no property {}'.format(
+                    device_id, prop_id))
+
+            prop = self.prop_entry(prop_id, type_, format_, values)
+
+        self.xinput.log_command(['XIGetProperty', str(device_id), str(prop_id)],
+                                describe_props([prop]), start=start)
+
+        return prop
+
+    def get_props(self, device_id: int, prop_ids: List[int]) -> List[PropEntry]:
+        '''Get some device properties, reading only those.'''
+
+        start = time.time()
+        with self.lock:
+            props = []
+            for prop_id in prop_ids:
+                type_, format_, values = self.read_prop(device_id, prop_id)
+                if type_ == ANY_PROPERTY_TYPE:
+                    continue
+                props.append(self.prop_entry(prop_id, type_, format_, values))
+
+        self.xinput.log_command(
+            ['XIGetProperty', str(device_id)] + [str(prop_id) for prop_id in prop_ids],
+            describe_props(props), start=start)
+
+        return props
+
+    def list_props(self, device_id: int) -> List[PropEntry]:
+        '''List device properties.'''
+
+        start = time.time()
+        with self.lock:
+            num_props = c_int()
+            atoms = self.libxi.XIListProperties(self.display, device_id,
+                                                byref(num_props))
+            self.check_errors(sync=False)
+
+            prop_atoms = [atoms[i] for i in range(num_props.value)]
+            if atoms:
+                self.libx11.XFree(atoms)
+
+            props = []
+            for atom in prop_atoms:
+                type_, format_, values = self.read_prop(device_id, atom)
+                props.append(self.prop_entry(atom, type_, format_, values))
+
+        self.xinput.log_command(['XIListProperties', str(device_id)],
+                                describe_props(props), start=start)
+
+        return props
+
+    def set_prop(self, device_id: int, prop_id: int, prop_val: str) -> None:
+        '''Set a device property.
+
+        Values are converted to the property's current type and format, as
+        xinput set-prop does.
+        '''
+
+        argv = ['XIChangeProperty', str(device_id), str(prop_id), prop_val]
+        start = time.time()
+        try:
+            self.change_prop(device_id, prop_id, prop_val)
+        except (XinputError, ValueError) as err:
+            self.xinput.log_command(argv, '', start=start, returncode=1, stderr=str(err))
+            raise
+
+        self.xinput.log_command(argv, '', start=start)
+
+    def change_prop(self, device_id: int, prop_id: int, prop_val: str) -> None:
+        '''Convert and write a property value, see set_prop().'''
+
+        with self.lock:
+            type_, format_, _ = self.read_prop(device_id, prop_id)
+            if not format_:
+                raise XinputError('Property {} does not exist on device {}'.format(
+                    prop_id, device_id))
+
+            values = split_values(prop_val)
+
+            if type_ == XA_STRING:
+                data = '\0'.join(values).encode()
+                num_items = len(data)
+                buf = create_string_buffer(data, num_items)
+            else:
+                if type_ == self.float_atom:
+                    items = [float(val) for val in values]
+                elif type_ == XA_ATOM:
+                    items = [int(val) if val.isdigit() else self.intern_atom(val)
+                             for val in values]
+                else:
+                    items = [int(val, 0) for val in values]
+                buf = pack_values(type_, format_, items, self.float_atom)
+                num_items = len(items)
+
+            self.libxi.XIChangeProperty(self.display, device_id, prop_id, type_,
+                                        format_, PROP_MODE_REPLACE, buf, num_items)
+            self.check_errors()
+
+    def change_hierarchy(self, change: XIAnyHierarchyChangeInfo, argv: List[str]) -> None:
+        '''Make a single device hierarchy change.
+
+        Args:
+            change: the change.
+            argv: the change as logged, e.g. ['XIChangeHierarchy', 'XIDetachSlave', '11'].
+        '''
+
+        start = time.time()
+        try:
+            with self.lock:
+                status = self.libxi.XIChangeHierarchy(self.display, byref(change), 1)
+                self.check_errors()
+                if status != SUCCESS:
+                    raise XinputError('Unable to change device hierarchy')
+        except XinputError as err:
+            self.xinput.log_command(argv, '', start=start, returncode=1, stderr=str(err))
+            raise
+
+        self.xinput.log_command(argv, '', start=start)
+
+    def float(self, device_id: int) -> None:
+        '''Float a slave device.'''
+
+        change = XIAnyHierarchyChangeInfo()
+        change.detach = XIDetachSlaveInfo(XI_DETACH_SLAVE, device_id)
+        self.change_hierarchy(change, ['XIChangeHierarchy', 'XIDetachSlave', str(device_id)])
+
+    def reattach(self, device_id: int, master_id: int) -> None:
+        '''Reattach a slave device to a master.'''
+
+        change = XIAnyHierarchyChangeInfo()
+        change.attach = XIAttachSlaveInfo(XI_ATTACH_SLAVE, device_id, master_id)
+        self.change_hierarchy(change, ['XIChangeHierarchy', 'XIAttachSlave',
+                                       str(device_id), str(master_id)])
+
+    def create_master(self, name: str) -> None:
+        '''Create a master device.'''
+
+        change = XIAnyHierarchyChangeInfo()
+        change.add = XIAddMasterInfo(XI_ADD_MASTER, name.encode(), True, True)
+        self.change_hierarchy(change, ['XIChangeHierarchy', 'XIAddMaster', name])
+
+    def remove_master(self, device_id: int) -> None:
+        '''Remove a master device, floating its slaves.'''
+
+        change = XIAnyHierarchyChangeInfo()
+        change.remove = XIRemoveMasterInfo(XI_REMOVE_MASTER, device_id,
+                                           XI_FLOATING, 0, 0)
+        self.change_hierarchy(change, ['XIChangeHierarchy', 'XIRemoveMaster', str(device_id)])
+
+    def get_info(self, device_id: int) -> str:
+        '''Get device info, formatted like `xinput list <id>`.'''
+
+        start = time.time()
+        with self.lock:
+            entry, classes = self.query_devices(device_id)[0]
+
+        lines = ['{}\tid={}\t[{}]'.format(entry.name, entry.id, describe_use(entry)),
+                 '\tReporting {} classes:'.format(len(classes))]
+
+        for type_, sourceid, details in classes:
+            type_name = CLASS_NAMES.get(type_, 'Unknown class ({})'.format(type_))
+            lines.append('\t\tClass originated from: {}. Type: {}'.format(
+                sourceid, type_name))
+
+            if type_ == XI_BUTTON_CLASS:
+                lines.append('\t\tButtons supported: {}'.format(details['num_buttons']))
+                lines.append('\t\tButton labels: {}'.format(' '.join(
+                    '"{}"'.format(label) for label in details['labels'])))
+            elif type_ == XI_KEY_CLASS:
+                lines.append('\t\tKeycodes supported: {}'.format(details['num_keycodes']))
+            elif type_ == XI_VALUATOR_CLASS:
+                lines.append('\t\tDetail for Valuator {}:'.format(details['number']))
+                lines.append('\t\t  Label: {}'.format(details['label']))
+                lines.append('\t\t  Range: {:f} - {:f}'.format(details['min'], details['max']))
+                lines.append('\t\t  Resolution: {} units/m'.format(details['resolution']))
+                lines.append('\t\t  Mode: {}'.format(details['mode']))
+            elif type_ == XI_SCROLL_CLASS:
+                lines.append('\t\tScroll info for Valuator {}'.format(details['number']))
+                lines.append('\t\t  type: {} ({})'.format(
+                    1 if details['scroll_type'] == 'vertical' else 2,
+                    details['scroll_type']))
+                lines.append('\t\t  increment: {:f}'.format(details['increment']))
+                lines.append('\t\t  flags: 0x{:x}'.format(details['flags']))
+            elif type_ == XI_TOUCH_CLASS:
+                lines.append('\t\t{} touch device, supporting {} touches.'.format(
+                    details['mode'].capitalize(), details['num_touches']))
+
+        info = '\n'.join(lines) + '\n'
+        self.xinput.log_command(['XIQueryDevice', str(device_id)], info, start=start)
+
+        return info
+
+    def create_watcher(self, callback: Callable[[Any], None]) -> EventWatcher:
+        '''Create a watcher that selects XI2 events.'''
+
+        return NativeEventWatcher(self, callback)
+
+
+class NativeEventWatcher(EventWatcher):
+    '''Watches for XI2 events on its own display connection.'''
+
+    def __init__(self, backend: NativeBackend, callback: Callable[[Any], None]) -> None:
+        '''Init NativeEventWatcher.
+
+        Args:
+            backend: NativeBackend the watcher belongs to.
+            callback: called with each event, on the watcher's thread.
+        '''
+
+        super().__init__(callback)
+
+        self.backend = backend
+        self.libx11 = backend.libx11
+        self.libxi = backend.libxi
+        self.display = None
+        self.opcode = None
+        self.thread = None
+        self.stopped = threading.Event()
+
+    def start(self) -> None:
+        '''Start watching for events.
+
+        Raises:
+            XinputError: if the display can't be opened.
+        '''
+
+        # Events are read on another thread, which can't share the backend's
+        # connection
+        display_name = self.backend.display_name
+        self.display = self.libx11.XOpenDisplay(
+            None if display_name is None else display_name.encode())
+        if not self.display:
+            raise XinputError('Unable to open X display')
+        self.backend.other_displays.add(self.display)
+
+        opcode, event, error = c_int(), c_int(), c_int()
+        self.libx11.XQueryExtension(self.display, b'XInputExtension',
+                                    byref(opcode), byref(event), byref(error))
+        self.opcode = opcode.value
+
+        self.select_events([XI_HIERARCHY_CHANGED, XI_PROPERTY_EVENT])
+
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.watch, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        '''Stop watching for events.'''
+
+        if self.thread is None:
+            return
+
+        self.stopped.set()
+        self.thread.join()
+        self.thread = None
+
+        self.backend.other_displays.discard(self.display)
+        self.libx11.XCloseDisplay(self.display)
+        self.display = None
+
+    def select_events(self, event_types: List[int]) -> None:
+        '''Select XI2 events for all devices on the root window.'''
+
+        mask = (c_ubyte * 4)()
+        for event_type in event_types:
+            mask[event_type >> 3] |= 1 << (event_type & 7)
+
+        event_mask = XIEventMask(XI_ALL_DEVICES, len(mask), mask)
+        self.libxi.XISelectEvents(self.display,
+                                  self.libx11.XDefaultRootWindow(self.display),
+                                  byref(event_mask), 1)
+        self.libx11.XFlush(self.display)
+
+    def watch(self) -> None:
+        '''Watcher thread loop.'''
+
+        fd = self.libx11.XConnectionNumber(self.display)
+        event = XEvent()
+
+        while not self.stopped.is_set():
+            if not self.libx11.XPending(self.display):
+                select.select([fd], [], [], WATCH_INTERVAL)
+                continue
+
+            self.libx11.XNextEvent(self.display, byref(event))
+
+            cookie = event.xcookie
+            if cookie.type != GENERIC_EVENT or cookie.extension != self.opcode:
+                continue
+            if not self.libx11.XGetEventData(self.display, byref(cookie)):
+                continue
+
+            try:
+                parsed = self.parse_event(cookie)
+            finally:
+                self.libx11.XFreeEventData(self.display, byref(cookie))
+
+            if parsed is not None:
+                self.callback(parsed)
+
+    def parse_event(self, cookie: XGenericEventCookie) -> Any:
+        '''Copy an XI2 event out of its cookie.
+
+        Returns:
+            Event, or None if it's not one we report.
+        '''
+
+        if cookie.evtype == XI_HIERARCHY_CHANGED:
+            hierarchy = cast(cookie.data, POINTER(XIHierarchyEvent)).contents
+
+            infos = []
+            for i in range(hierarchy.num_info):
+                info = hierarchy.info[i]
+                if not info.flags:
+                    continue
+
+                entry = device_entry_from_use(info.deviceid, '', info.use,
+                                              info.attachment)
+                infos.append(HierarchyInfo(entry.id, entry.role, entry.kind,
+                                           entry.attachment, info.flags))
+
+            return HierarchyEvent(infos) if infos else None
+
+        if cookie.evtype == XI_PROPERTY_EVENT:
+            prop_event = cast(cookie.data, POINTER(XIPropertyEvent)).contents
+            return PropertyEvent(prop_event.deviceid, prop_event.property,
+                                 prop_event.what)
+
+        return None
+
+
+CLASS_NAMES = {
+    XI_KEY_CLASS: 'XIKeyClass',
+    XI_BUTTON_CLASS: 'XIButtonClass',
+    XI_VALUATOR_CLASS: 'XIValuatorClass',
+    XI_SCROLL_CLASS: 'XIScrollClass',
+    XI_TOUCH_CLASS: 'XITouchClass',
+}
+
+
+def device_entry(info: XIDeviceInfo) -> DeviceEntry:
+    '''Make a DeviceEntry from an XIDeviceInfo.'''
+
+    return device_entry_from_use(info.deviceid,
+                                 info.name.decode('utf-8', 'replace'),
+                                 info.use,
+                                 info.attachment)
+
+
+def device_entry_from_use(id_: int, name: str, use: int, attachment: int) -> DeviceEntry:
+    '''Make a DeviceEntry from an XI2 device use.'''
+
+    if use == XI_FLOATING_SLAVE:
+        return DeviceEntry(id_, name, 'floating', None, None)
+
+    role = 'master' if use in (XI_MASTER_POINTER, XI_MASTER_KEYBOARD) else 'slave'
+    kind = 'pointer' if use in (XI_MASTER_POINTER, XI_SLAVE_POINTER) else 'keyboard'
+
+    return DeviceEntry(id_, name, role, kind, attachment)
+
+
+def describe_use(entry: DeviceEntry) -> str:
+    '''Describe a device's use the way xinput list does.'''
+
+    if entry.role == 'floating':
+        return 'floating slave'
+
+    return '{:<6} {:<8} ({})'.format(entry.role, entry.kind, entry.attachment)
+
+
+def sort_devices(devices: List[DeviceEntry]) -> List[DeviceEntry]:
+    '''Sort devices in the order xinput list prints them: each master,
+    followed by its slaves, then floating devices.'''
+
+    sorted_devices = []
+
+    for master in devices:
+        if master.role != 'master':
+            continue
+        sorted_devices.append(master)
+        sorted_devices.extend(device for device in devices
+                              if device.role == 'slave' and device.attachment == master.id)
+
+    sorted_devices.extend(device for device in devices if device.role == 'floating')
+
+    return sorted_devices
+
+
+def describe_props(props: List[PropEntry]) -> str:
+    '''Describe properties the way list-props does, for the log.'''
+
+    return ''.join('\t{} ({}):\t{}\n'.format(prop.name, prop.id,
+                                              format_values(prop.type, prop.values))
+                   for prop in props)
+
+
+def unpack_values(type_: int, format_: int, num_items: int, data: c_void_p,
+                  float_atom: int) -> List:
+    '''Unpack raw property data.
+
+    Args:
+        type_: property type atom.
+        format_: property format (8, 16 or 32).
+        num_items: number of items in data.
+        data: property data returned by XIGetProperty.
+        float_atom: the FLOAT atom.
+
+    Returns:
+        List of values.
+    '''
+
+    if not num_items or not format_:
+        return []
+
+    if type_ == XA_STRING:
+        raw = string_at(data, num_items)
+        return [s.decode('utf-8', 'replace') for s in raw.rstrip(b'\0').split(b'\0')]
+
+    if type_ == float_atom and format_ == 32:
+        # Xlib puts each float's bits in the value of a long, not in its first
+        # bytes, so read the longs and take the bits back out of their values
+        longs = cast(data, POINTER(c_long * num_items)).contents
+        return [long_to_float(val) for val in longs]
+
+    item_size = {8: sizeof(c_byte), 16: sizeof(c_short), 32: sizeof(c_long)}[format_]
+    raw = string_at(data, num_items * item_size)
+
+    if type_ == XA_INTEGER:
+        return list(struct.unpack('{}{}'.format(num_items, INT_FORMATS[format_]), raw))
+
+    # Xlib sign extends format 32 data into longs
+    values = struct.unpack('{}{}'.format(num_items, INT_FORMATS[format_]), raw)
+    return [val & CARD_MASKS[format_] for val in values]
+
+
+def pack_values(type_: int, format_: int, values: List, float_atom: int):
+    '''Pack property values for XIChangeProperty.
+
+    Args:
+        type_: property type atom.
+        format_: property format (8, 16 or 32).
+        values: list of values.
+        float_atom: the FLOAT atom.
+
+    Returns:
+        ctypes buffer holding the values.
+    '''
+
+    if type_ == float_atom and format_ == 32:
+        # Each float's bits go in the value of a long, see unpack_values()
+        return (c_long * max(len(values), 1))(*[float_to_long(val) for val in values])
+
+    item_size = {8: sizeof(c_byte), 16: sizeof(c_short), 32: sizeof(c_long)}[format_]
+    buf = create_string_buffer(max(len(values), 1) * item_size)
+
+    for i, val in enumerate(values):
+        if type_ == XA_INTEGER:
+            struct.pack_into(INT_FORMATS[format_], buf, i * item_size, val)
+        else:
+            struct.pack_into(CARD_FORMATS[format_], buf, i * item_size, val)
+
+    return buf
+
+
+def long_to_float(val: int) -> float:
+    '''Get the float whose bits Xlib stored in a long.
+
+    Xlib sign extends the bits when longs are wider than 32 bits.
+    '''
+
+    return FLOAT_BITS.unpack(CARD32.pack(val & CARD_MASKS[32]))[0]
+
+
+def float_to_long(val: float) -> int:
+    '''Get the long value holding a float's bits, for Xlib.'''
+
+    bits, = CARD32.unpack(FLOAT_BITS.pack(val))
+    # Keep the value in range of a 32 bit long
+    return bits - (1 << 32) if bits & 0x80000000 else bits
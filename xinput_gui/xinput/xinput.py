@@ -18,94 +18,396 @@
 
 '''xinput wrapper.'''
 
-from typing import TYPE_CHECKING
-import re
-import subprocess
-
-from .devices import Device, DeviceType
+from collections import deque
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Tuple
+import threading
+import time
+
+from .backend import BACKEND_SUBPROCESS, XinputError, create_backend
+from .devices import Device, DeviceRegistry, DeviceType, sort_devices
+from .events import ADDED, HIERARCHY_CHANGES, REMOVED, HierarchyInfo
+from .log import CommandRecord, ErrorRecord, format_record, write_jsonl
+from .parser import DeviceEntry
+from .search import PropIndex
+from .worker import USE_WORKER, CommandWorker, TimedProcess
 
 if TYPE_CHECKING:
     from ..view_controller import ViewController
 
 
+# Default number of devices to fetch properties for at once
+FETCH_WORKERS = 8
+# Default number of log entries to keep
+LOG_SIZE = 500
+# How long after writing a property its change events are taken as caused
+# by the write, in seconds
+OWN_WRITE_WINDOW = 1.0
+
+
 class Xinput():
     '''xinput wrapper.'''
 
-    def __init__(self) -> None:
-        '''Init Xinput.'''
+    def __init__(self,
+                 use_worker: bool = USE_WORKER,
+                 log_size: int = LOG_SIZE,
+                 command_worker: CommandWorker = None) -> None:
+        '''Init Xinput.
+
+        Args:
+            use_worker: run commands through the command worker.
+            log_size: most log entries to keep, older ones are dropped.
+            command_worker: runs commands, by default a CommandWorker. Can
+                be anything with the same run_many() and close() methods,
+                e.g. a ReplayWorker, in which case use_worker is ignored.
+        '''
 
-        self.devices = []
-        self.log = ''
+        self.registry = DeviceRegistry()
+        self.prop_index = PropIndex()
+        self.log = deque(maxlen=log_size)
+        self.log_lock = threading.Lock()
+        self.controller = None
+        self.command_worker = command_worker or CommandWorker(use_worker)
+        # TraceRecorder commands are written to, if they're being recorded
+        self.recorder = None
+        # (device ID, property ID) -> when it was last written, from
+        # time.monotonic()
+        self.writes = {}
+        self.writes_lock = threading.Lock()
+        self.backend = create_backend(BACKEND_SUBPROCESS, self)
+
+    @property
+    def devices(self) -> List[Device]:
+        '''Devices, in the order xinput lists them.'''
+
+        return self.registry.devices
 
     def set_controller(self, controller: 'ViewController') -> None:
         self.controller = controller
 
-    def run_command(self, cmd) -> str:
+    def note_writes(self, device_id: int, prop_ids: List[int]) -> None:
+        '''Remember that properties are being written, see wrote_recently().
+
+        Args:
+            device_id: xinput device ID.
+            prop_ids: IDs of the properties.
+        '''
+
+        now = time.monotonic()
+        with self.writes_lock:
+            self.writes = {key: when for key, when in self.writes.items()
+                           if now - when < OWN_WRITE_WINDOW}
+            for prop_id in prop_ids:
+                self.writes[(device_id, prop_id)] = now
+
+    def wrote_recently(self, device_id: int, prop_id: int) -> bool:
+        '''Check if a property was written in the last OWN_WRITE_WINDOW seconds.
+
+        Used to tell the change events caused by our own writes, which have
+        already been read back, from changes made by others.
+
+        Args:
+            device_id: xinput device ID, None for any device.
+            prop_id: property ID.
+        '''
+
+        now = time.monotonic()
+        with self.writes_lock:
+            return any(now - when < OWN_WRITE_WINDOW
+                       for (written_device, written_prop), when in self.writes.items()
+                       if written_prop == prop_id
+                       and (device_id is None or written_device == device_id))
+
+    def close(self) -> None:
+        '''Release the backend and stop the command worker.'''
+
+        self.backend.close()
+        self.command_worker.close()
+
+    def set_backend(self, name: str) -> None:
+        '''Switch to another backend.
+
+        If the backend can't be used, the current backend is kept and the
+        reason is logged.
+
+        Args:
+            name: backend name.
+        '''
+
+        if name == self.backend.name:
+            return
+
+        try:
+            backend = create_backend(name, self)
+        except XinputError as err:
+            self.log_error('Unable to use {} backend: {}'.format(name, err))
+            return
+
+        self.backend.close()
+        self.backend = backend
+
+    def run_command(self, cmd: List[str]) -> str:
         '''Run a command.
 
+        Args:
+            cmd: command arguments.
+
         Returns:
             Command output.
         '''
 
-        cmd_out = subprocess.run(cmd.split(' '),
-                                 stdout=subprocess.PIPE,
-                                 stderr=subprocess.PIPE)
-        cmd_out = cmd_out.stdout.decode('utf-8')
+        return self.run_commands([cmd])[0].stdout.decode('utf-8')
+
+    def run_commands(self, cmds: List[List[str]]) -> List[TimedProcess]:
+        '''Run several commands, in one batch through the command worker.
 
-        # Update log
-        self.log += 'COMMAND:\n'
-        self.log += cmd
-        self.log += '\nOUTPUT:\n'
-        self.log += cmd_out
-        self.log += '\n\n========== SEPARATOR ==========\n\n'
+        Args:
+            cmds: list of command arguments.
 
-        self.controller.log_updated(self.log)
+        Returns:
+            Completed commands, in the same order.
+        '''
 
-        return cmd_out
+        procs = self.command_worker.run_many(cmds)
+        if self.recorder is not None:
+            self.recorder.record(procs)
+
+        for cmd, proc in zip(cmds, procs):
+            self.log_command(cmd,
+                             proc.stdout.decode('utf-8', 'replace'),
+                             start=proc.start,
+                             wall_time=proc.wall_time,
+                             returncode=proc.returncode,
+                             stderr=proc.stderr.decode('utf-8', 'replace'))
+
+        return procs
+
+    def log_command(self,
+                    argv: List[str],
+                    cmd_out: str,
+                    start: float = None,
+                    wall_time: float = None,
+                    returncode: int = 0,
+                    stderr: str = '') -> None:
+        '''Add a command and its output to the log.
 
-    def get_devices(self) -> None:
-        '''Get xinput devices.'''
+        Args:
+            argv: command arguments.
+            cmd_out: command output.
+            start: when the command started, from time.time(). Defaults to
+                now.
+            wall_time: how long the command ran, in seconds. If start was
+                given, defaults to the time since then.
+            returncode: exit status.
+            stderr: error output.
+        '''
+
+        now = time.time()
+        if start is None:
+            start = now
+        elif wall_time is None:
+            wall_time = now - start
+
+        self.add_log_entry(CommandRecord(list(argv), start, wall_time, returncode,
+                                         len(cmd_out.encode('utf-8')), cmd_out, stderr))
+
+    def log_error(self, message: str) -> None:
+        '''Add an error to the log.
+
+        Args:
+            message: error message.
+        '''
+
+        self.add_log_entry(ErrorRecord(time.time(), message))
+
+    def add_log_entry(self, record: Tuple) -> None:
+        '''Add a record to the log, dropping the oldest if it's full.
+
+        Args:
+            record: CommandRecord or ErrorRecord.
+        '''
+
+        with self.log_lock:
+            self.log.append(record)
+
+            if self.controller is not None:
+                self.controller.log_appended(format_record(record))
+
+    def set_log_size(self, log_size: int) -> None:
+        '''Change the most log entries to keep.
+
+        Args:
+            log_size: most log entries to keep.
+        '''
+
+        with self.log_lock:
+            self.log = deque(self.log, maxlen=log_size)
+
+    def get_log(self) -> str:
+        '''Get the log text.
+
+        Returns:
+            Every kept log entry.
+        '''
 
-        self.devices.clear()
+        with self.log_lock:
+            return ''.join(format_record(record) for record in self.log)
 
-        device_id_cmd = 'xinput list --id-only'
-        device_ids = self.run_command(device_id_cmd).splitlines()
-        device_ids = map(lambda x: re.search(r'\D*(\d+)\D*', x).group(1), device_ids)
+    def get_log_records(self) -> List[Tuple]:
+        '''Get the kept log records.
+
+        Returns:
+            List of CommandRecords and ErrorRecords, oldest first.
+        '''
+
+        with self.log_lock:
+            return list(self.log)
+
+    def export_log(self, path: Path) -> None:
+        '''Write the kept log records to a JSON Lines file.
+
+        Args:
+            path: file to write.
+
+        Raises:
+            OSError: if the file can't be written.
+        '''
+
+        write_jsonl(self.get_log_records(), path)
+
+    def get_devices(self) -> None:
+        '''Get xinput devices.
 
-        for device_id in device_ids:
-            device_name_cmd = 'xinput list --name-only {}'.format(device_id)
-            device_name_out = self.run_command(device_name_cmd)
-            device_name = device_name_out.rstrip('\n')
+        Devices that were already known are kept, along with their cached
+        properties, unless they moved in the hierarchy.
+        '''
 
-            device_type_cmd = 'xinput list --short {}'.format(device_id)
-            device_type_out = self.run_command(device_type_cmd)
-            if 'floating' in device_type_out:
-                device_type = DeviceType.FLOATING
-            elif 'pointer' in device_type_out:
-                device_type = DeviceType.POINTER
+        known = self.registry.by_id
+        devices = []
+
+        for entry in self.backend.list_devices():
+            device = known.get(entry.id)
+            # IDs are reused, a different name means a different device
+            if device is None or device.name != entry.name:
+                device = Device(self,
+                                entry.id,
+                                entry.name,
+                                device_type(entry),
+                                entry.role == 'master',
+                                entry.attachment)
             else:
-                device_type = DeviceType.KEYBOARD
+                device.move(device_type(entry), entry.role == 'master', entry.attachment)
+            devices.append(device)
+
+        # Build a new registry, so readers on other threads never see it
+        # half filled
+        self.registry = DeviceRegistry(devices)
+        self.prop_index.retain(self.registry.by_id)
+
+    def apply_hierarchy_changes(self,
+                                infos: List[HierarchyInfo]) -> Tuple[List[Device], List[int]]:
+        '''Update devices from a hierarchy change, without listing them all.
+
+        Only added devices are looked up, to get their names.
+
+        Args:
+            infos: HierarchyInfos from a HierarchyEvent.
+
+        Returns:
+            (changed, removed) tuple. changed is the list of Devices that were
+            added or moved, in device list order, removed is the list of IDs
+            of removed devices.
+        '''
+
+        devices = dict(self.registry.by_id)
+        changed = set()
+        removed = []
+
+        for info in infos:
+            device = devices.get(info.id)
+
+            if info.flags & REMOVED:
+                if device is not None:
+                    del devices[info.id]
+                    removed.append(info.id)
+                continue
+
+            # Enabling or disabling a known device doesn't change the list
+            if device is not None and not info.flags & HIERARCHY_CHANGES:
+                continue
+
+            if device is None or info.flags & ADDED:
+                try:
+                    entry = self.backend.get_device(info.id)
+                except XinputError as err:
+                    # Removed again before it could be looked up, which
+                    # shouldn't lose the rest of the changes
+                    self.log_error('Unable to look up added device {}: {}'.format(info.id, err))
+                    continue
+
+                devices[info.id] = Device(self,
+                                          entry.id,
+                                          entry.name,
+                                          device_type(entry),
+                                          entry.role == 'master',
+                                          entry.attachment)
+                changed.add(info.id)
+                continue
+
+            if device.move(device_type(info), info.role == 'master', info.attachment):
+                changed.add(info.id)
+
+        self.registry = DeviceRegistry(sort_devices(list(devices.values())))
+        self.prop_index.retain(self.registry.by_id)
+
+        return [device for device in self.devices if device.id in changed], removed
+
+    def fetch_all_props(self,
+                        devices: List[Device] = None,
+                        max_workers: int = FETCH_WORKERS) -> List[Tuple[Device, Exception]]:
+        '''Get properties of many devices at once.
+
+        Properties are fetched concurrently and stored in each device's
+        property cache. A device that fails doesn't stop the others.
+
+        Args:
+            devices: Devices to fetch properties of, all devices by default.
+            max_workers: most devices to fetch properties of at once.
 
-            device_master = 'master' in device_type_out
+        Returns:
+            List of (Device, error) tuples, in the same order as devices.
+            error is None if the device's properties were fetched.
+        '''
+
+        # Imported here to keep it out of command line startup
+        from concurrent.futures import ThreadPoolExecutor
+
+        if devices is None:
+            devices = list(self.devices)
+
+        def fetch(device: Device) -> Exception:
+            try:
+                device.get_props()
+            except Exception as err:
+                return err
+            return None
+
+        with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+            errors = list(executor.map(fetch, devices))
 
-            self.devices.append(Device(self,
-                                       device_id,
-                                       device_name,
-                                       device_type,
-                                       device_master))
+        return list(zip(devices, errors))
 
     def get_device_by_id(self, id_: int) -> Device:
         '''Get a device by it's ID.
 
         Args:
             id_: xinput device ID.
-        '''
 
-        for device in self.devices:
-            if int(device.id) == id_:
-                return device
+        Returns:
+            Device, or None if there's no such device.
+        '''
 
-        return None
+        return self.registry.get(id_)
 
     def create_master_device(self, name: str) -> None:
         '''Create a new xinput master device.
@@ -114,8 +416,7 @@ class Xinput():
             name: new device name.
         '''
 
-        cmd = 'xinput create-master "{}"'.format(name)
-        self.run_command(cmd)
+        self.backend.create_master(name)
 
         self.get_devices()
 
@@ -129,7 +430,16 @@ class Xinput():
         if not device.master:
             return
 
-        cmd = 'xinput remove-master {}'.format(device.id)
-        self.run_command(cmd)
+        self.backend.remove_master(device.id)
 
         self.get_devices()
+
+
+def device_type(entry: DeviceEntry) -> DeviceType:
+    '''Get the type of a DeviceEntry (or HierarchyInfo).'''
+
+    if entry.role == 'floating':
+        return DeviceType.FLOATING
+    if entry.kind == 'pointer':
+        return DeviceType.POINTER
+    return DeviceType.KEYBOARD